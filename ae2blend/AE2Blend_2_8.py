@@ -18,416 +18,809 @@
 #
 # Copyright 2015 Sam Maliszewski
 
-bl_info = {
-    "name": "AE2Blend",
-    "author": "Sam Maliszewski",
-    "version": (1, 3),
-    "blender": (2, 80, 0),
-    "location": "View3D",
-    "description": "Copy AfterEffects transform data directly into Blender",
-    "warning": "Version 1.3 - tested with AfterEffects CC 2018 and Blender 2.8",
-    "wiki_url": "",
-    "category": "Animation"}
-
 import bpy
+import importlib.util
 import math
+import os
+import sys
+import time
+from contextlib import contextmanager
+from bpy_extras.io_utils import ExportHelper, ImportHelper
+
+from . import stats
+
+def lazyImport(child):
+    # Submodule of the add-on that is only loaded when one of its attributes is first used.
+    # Only the add-on's own modules, anything else would share the lazy module with every add-on
+    name = __package__ + "." + child
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    setattr(sys.modules[__package__], child, module)
+    return module
+
+# The parser, the cache and NumPy with them load on first use, enabling the add-on imports none of them.
+# Functions here that use NumPy or tempfile themselves import them
+cache = lazyImport("cache")
+convert = lazyImport("convert")
+decimate = lazyImport("decimate")
+fcurves = lazyImport("fcurves")
+index = lazyImport("index")
+journal = lazyImport("journal")
+keyframes = lazyImport("keyframes")
+live = lazyImport("live")
+solve = lazyImport("solve")
+watch = lazyImport("watch")
+
+# SETTINGS
+
+# live.DEFAULT_PORT, repeated so registering doesn't load the socket modules
+LIVE_PORT = 9123
+
+class AE2BlendSettings(bpy.types.PropertyGroup):
+    """Settings of the add-on, every scene has its own as scene.AE2Blend"""
+
+    AEScale_property: bpy.props.FloatProperty(name = "AEScale", description = "Scale Value (higher scale = smaller values)", default = 100)
+    AEDist_property: bpy.props.FloatProperty(name = "AEDist", description = "Target Distance between positions", default = 1)
+    AESolveRigid_property: bpy.props.BoolProperty(name = "AESolveRigid", description = "Also solve rotation and offset, set on the AE2Blend Alignment empty for imports to be parented to", default = False)
+    AERotation_property: bpy.props.EnumProperty(items = [('Orientation', 'Orientation', 'Set Orientation as Delta Rotation'), ('XYZ', 'XYZ', 'Set XYZ as Delta Rotation')], name = 'AERotation', default = 'Orientation')
+    AEPosition_property: bpy.props.EnumProperty(items = [('Match', 'Match', 'Match Position from Source'), ('Cursor', 'Cursor', 'Start Position from Cursor')], name = 'AEPosition', default = 'Match')
+    AEFrame_property: bpy.props.EnumProperty(items = [('Match', 'Match', 'Match Frame from Source'), ('Playhead', 'Playhead', 'Start Frame from Playhead')], name = 'AEFrame', default = 'Match')
+    AETiming_property: bpy.props.EnumProperty(items = [('Source', 'Source', 'Use AfterEffects frame numbers as they are'), ('Retime', 'Retime', 'Convert frames from the source Units Per Second to the scene frame rate'), ('Resample', 'Resample', 'Convert to the scene frame rate and resample keys onto whole frames')], name = 'AETiming', default = 'Source')
+    AEChannels_property: bpy.props.EnumProperty(items = [('Position', 'Position', 'Import Position'), ('Scale', 'Scale', 'Import Scale'), ('Rotation', 'Rotation', 'Import Rotation (Z Rotation of 3D layers)'), ('XYRotation', 'X/Y Rotation', 'Import X Rotation and Y Rotation'), ('Orientation', 'Orientation', 'Import Orientation'), ('Zoom', 'Zoom', 'Import Camera Options Zoom as the camera lens'), ('Effects', 'Effects', 'Import Corner Pin and Point Control points as Empties')], name = 'AEChannels', options = {'ENUM_FLAG'}, default = {'Position', 'Scale', 'Rotation', 'XYRotation', 'Orientation', 'Zoom', 'Effects'})
+    AERange_property: bpy.props.BoolProperty(name = "AERange", description = "Import only the keys in a range of AfterEffects frames", default = False)
+    AERangeStart_property: bpy.props.IntProperty(name = "AERangeStart", description = "First AfterEffects frame to import", default = 0)
+    AERangeEnd_property: bpy.props.IntProperty(name = "AERangeEnd", description = "Last AfterEffects frame to import", default = 100)
+    AEBracket_property: bpy.props.BoolProperty(name = "AEBracket", description = "Also import the nearest key outside each end of the range, so the curves interpolate into the range as before", default = True)
+    AESharedAction_property: bpy.props.BoolProperty(name = "AESharedAction", description = "Paste one shared Action to all selected objects, offsets go to delta location and NLA strips", default = False)
+    AESync_property: bpy.props.BoolProperty(name = "AESync", description = "Paste only the differences: update changed keys, add new frames and remove frames that are gone", default = False)
+    AEDecimate_property: bpy.props.BoolProperty(name = "AEDecimate", description = "Remove keys that linear interpolation can rebuild within the tolerance", default = False)
+    AETolerance_property: bpy.props.FloatProperty(name = "AETolerance", description = "Largest error allowed when removing location and scale keys, in Blender units", default = 0.001, min = 0, precision = 4)
+    AEAngleTolerance_property: bpy.props.FloatProperty(name = "AEAngleTolerance", description = "Largest error allowed when removing rotation keys, in degrees", default = 0.1, min = 0, precision = 3)
+    AECache_property: bpy.props.BoolProperty(name = "AECache", description = "Keep parsed and converted keyframes in an on-disk cache for instant re-import", default = False)
+    AECacheDir_property: bpy.props.StringProperty(name = "AECacheDir", description = "Folder for the keyframe cache, empty uses the system temp folder", default = "", subtype = 'DIR_PATH')
+    AECacheSize_property: bpy.props.IntProperty(name = "AECacheSize", description = "Largest size of the keyframe cache in MB, least recently used entries are removed first", default = 512, min = 1)
+    AEWatch_property: bpy.props.BoolProperty(name = "AEWatch", description = "Parse and convert Keyframe Data copied to the Clipboard in the background, so imports only write it", default = False)
+    AEBatch_property: bpy.props.BoolProperty(name = "AEBatch", description = "Create one object per layer when the Keyframe Data holds several layers", default = True)
+    AEPointcloud_property: bpy.props.EnumProperty(items = [('Keys', 'Keys', 'One point per keyframe of every layer'), ('Layers', 'Layers', 'One point per layer at its first keyframe')], name = 'AEPointcloud', default = 'Keys')
+    AEExportMode_property: bpy.props.EnumProperty(items = [('Keys', 'Keys', "Export the keys of the object's own F-Curves"), ('Frames', 'Frames', 'Export the world transform on every frame of the scene range, for parented or constrained objects')], name = 'AEExportMode', default = 'Keys')
+    AELivePort_property: bpy.props.IntProperty(name = "AELivePort", description = "Localhost port Live Sync listens on", default = LIVE_PORT, min = 1024, max = 65535)
+    AELiveSocket_property: bpy.props.StringProperty(name = "AELiveSocket", description = "Unix socket for Live Sync to listen on instead of the port, empty uses the port", default = "", subtype = 'FILE_PATH')
+    AEShowStats_property: bpy.props.BoolProperty(name = "AEShowStats", description = "Show timing and counts of the last import", default = False)
+    AEStatsLog_property: bpy.props.BoolProperty(name = "AEStatsLog", description = "Append the statistics of every import as a JSON line to a log file", default = False)
+    AEStatsLogPath_property: bpy.props.StringProperty(name = "AEStatsLogPath", description = "JSON lines file import statistics are appended to", default = "//ae2blend_stats.jsonl", subtype = 'FILE_PATH')
+
+    AEm1x_property: bpy.props.FloatProperty(name = "AEm1x", description = "Marker 1 X position", default = 0)
+    AEm1y_property: bpy.props.FloatProperty(name = "AEm1y", description = "Marker 1 Y position", default = 0)
+    AEm1z_property: bpy.props.FloatProperty(name = "AEm1z", description = "Marker 1 Z position", default = 0)
+    AEm2x_property: bpy.props.FloatProperty(name = "AEm2x", description = "Marker 2 X position", default = 100)
+    AEm2y_property: bpy.props.FloatProperty(name = "AEm2y", description = "Marker 2 Y position", default = 0)
+    AEm2z_property: bpy.props.FloatProperty(name = "AEm2z", description = "Marker 2 Z position", default = 0)
+
+# Import whose steps are running, None between them
+importJob = None
+
+# Timing and counts of the last finished import, for the panel
+lastStats = stats.ImportStats()
+
+# Journal of the modal import taking its steps, None outside them
+importJournal = None
+
+# Characters of clipboard text decoded through its index per import step
+INDEX_STEP = 256 * 1024
+
+# AfterEffects channels of each Channels setting
+CHANNEL_NAMES = {
+    'Position': ("Position",),
+    'Scale': ("Scale",),
+    'Rotation': ("Rotation", "Z Rotation"),
+    'XYRotation': ("X Rotation", "Y Rotation"),
+    'Orientation': ("Orientation",),
+    'Zoom': ("Zoom",),
+    'Effects': ("Effects",)}
 
-# SET PROPERTIES
+# Last least-squares scale solve, None before the first
+scaleSolve = None
 
-bpy.types.Scene.AEScale_property = bpy.props.FloatProperty(name = "AEScale", description = "Scale Value (higher scale = smaller values)", default = 100)
-bpy.types.Scene.AEDist_property = bpy.props.FloatProperty(name = "AEDist", description = "Target Distance between positions", default = 1)
-bpy.types.Scene.AERotation_property = bpy.props.EnumProperty(items = [('Orientation', 'Orientation', 'Set Orientation as Delta Rotation'), ('XYZ', 'XYZ', 'Set XYZ as Delta Rotation')], name = 'AERotation', default = 'Orientation')
-bpy.types.Scene.AEPosition_property = bpy.props.EnumProperty(items = [('Match', 'Match', 'Match Position from Source'), ('Cursor', 'Cursor', 'Start Position from Cursor')], name = 'AEPosition', default = 'Match')
-bpy.types.Scene.AEFrame_property = bpy.props.EnumProperty(items = [('Match', 'Match', 'Match Frame from Source'), ('Playhead', 'Playhead', 'Start Frame from Playhead')], name = 'AEFrame', default = 'Match')
+# Empty holding the solved rotation and offset
+ALIGNMENT_NAME = "AE2Blend Alignment"
 
-bpy.types.Scene.AEm1x_property = bpy.props.FloatProperty(name = "AEm1x", description = "Marker 1 X position", default = 0)
-bpy.types.Scene.AEm1y_property = bpy.props.FloatProperty(name = "AEm1y", description = "Marker 1 Y position", default = 0)
-bpy.types.Scene.AEm1z_property = bpy.props.FloatProperty(name = "AEm1z", description = "Marker 1 Z position", default = 0)
-bpy.types.Scene.AEm2x_property = bpy.props.FloatProperty(name = "AEm2x", description = "Marker 2 X position", default = 100)
-bpy.types.Scene.AEm2y_property = bpy.props.FloatProperty(name = "AEm2y", description = "Marker 2 Y position", default = 0)
-bpy.types.Scene.AEm2z_property = bpy.props.FloatProperty(name = "AEm2z", description = "Marker 2 Z position", default = 0)
+# Live Sync listener, None while it is off
+liveServer = None
+
+# Clipboard watcher, None while Watch Clipboard is off
+clipboardWatcher = None
 
 # FUNCTIONS
 
-def checkClipboard(self):
+def loadClipboard(self):
+    # Parse the clipboard once, every operator works from the returned document
+    return runSteps(loadClipboardSteps(self))
+
+def loadClipboardSteps(self):
+    # Take what the clipboard watcher prepared, or decode every block through the
+    # clipboard index, or read the cache when it is on
+    document = preparedClipboard()
+    if document is not None:
+        importJob.stats.channels += len(document.channels)
+        return document
+    if not bpy.context.scene.AE2Blend.AECache_property:
+        return (yield from loadIndexedSteps(self, None))
+    keyIndex = clipboardIndex(self)
+    if keyIndex is None:
+        return None
+    try:
+        document = loadCached(self, cache.textHash(keyIndex.text), keyIndex.document)
+    except keyframes.KeyframeDataError as error:
+        self.report({'ERROR'}, str(error))
+        return None
+    importJob.stats.channels += len(document.channels)
+    return document
+
+def clipboardIndex(self):
+    # Index of the clipboard blocks, nothing is decoded yet
     clipboard = bpy.context.window_manager.clipboard
-    if "Adobe After Effects" in clipboard and "End of Keyframe Data" in clipboard:
-        return True
-    else:
+    if not keyframes.isKeyframeData(clipboard):
         self.report({'ERROR'}, "Must have AfterEffects transform data copied to Clipboard")
+        return None
+    return index.KeyframeIndex(clipboard)
+
+def loadIndexedSteps(self, channels, rows = None, frames = None, bracket = False):
+    # Decode only the named channels of the clipboard, and only their first rows or the keys in frames
+    keyIndex = clipboardIndex(self)
+    if keyIndex is None:
+        return None
+    document = keyframes.KeyframeDocument()
+    total = len(keyIndex.text)
+    done = 0
+    try:
+        steps = keyIndex.documentSteps(document, channels, rows, frames, bracket)
+        while True:
+            # Channel blocks, or chunks of a long one, per step, as many as fit in INDEX_STEP characters
+            finished = True
+            with importJob.stats.stage('parse'):
+                for offset in steps:
+                    if offset - done >= INDEX_STEP:
+                        finished = False
+                        break
+            if finished:
+                break
+            done = offset
+            yield "Parsing", done, total
+    except keyframes.KeyframeDataError as error:
+        self.report({'ERROR'}, str(error))
+        return None
+    importJob.stats.channels += len(document.channels)
+    return document
+
+def loadFirstChannel(self, name, rows = None):
+    # First block of a channel in the clipboard, the text after it is not even scanned
+    keyIndex = clipboardIndex(self)
+    if keyIndex is None:
+        return None
+    try:
+        with importJob.stats.stage('parse'):
+            entry = keyIndex.entry(name)
+            channel = entry.decode(rows) if entry is not None else None
+    except keyframes.KeyframeDataError as error:
+        self.report({'ERROR'}, str(error))
+        return None
+    if channel is None:
+        self.report({'ERROR'}, "No %s in the copied Keyframe Data" % name)
+        return None
+    importJob.stats.channels += 1
+    return channel
+
+def loadFileSteps(self, filepath, channels = None):
+    try:
+        return (yield from loadSteps(self, lambda: cache.fileHash(filepath), lambda: keyframes.iterFileLines(filepath), os.path.getsize(filepath), channels))
+    except (OSError, keyframes.KeyframeDataError) as error:
+        self.report({'ERROR'}, "Could not import %s: %s" % (filepath, error))
+        return None
+
+def loadSteps(self, contentHash, lines, size, channels = None):
+    # Parse one channel per step, or read everything from the cache when it is on.
+    # contentHash and lines are called when needed, size is the length of the text.
+    # With channels only those are decoded, the cache holds whole documents so it is not used
+    if channels is None and bpy.context.scene.AE2Blend.AECache_property:
+        document = loadCached(self, contentHash(), lambda: keyframes.parseLines(lines()))
+    else:
+        document = keyframes.KeyframeDocument()
+        read = [0]
+        steps = keyframes.parseSteps(countLines(lines(), read), document, channels)
+        while True:
+            with importJob.stats.stage('parse'):
+                channel = next(steps, None)
+            if channel is None:
+                break
+            yield "Parsing", read[0], size
+    importJob.stats.channels += len(document.channels)
+    return document
+
+def countLines(lines, read):
+    # Pass lines through, adding up their length in read[0] for the progress bar
+    for line in lines:
+        read[0] += len(line) + 1
+        yield line
+
+# IMPORT STATISTICS
+
+@contextmanager
+def measureImport(self, operation):
+    # Time one operator run of the running job, then report it and append it to the log
+    global lastStats
+    importStats = importJob.stats = stats.ImportStats(operation)
+    try:
+        yield importStats
+    finally:
+        importStats.finish()
+        lastStats = importStats
+    if not importStats.channels:
+        # Nothing was loaded, the error is already reported
+        return
+    self.report({'INFO'}, str(importStats))
+    scene = bpy.context.scene
+    if scene.AE2Blend.AEStatsLog_property and scene.AE2Blend.AEStatsLogPath_property:
+        try:
+            stats.appendLog(bpy.path.abspath(scene.AE2Blend.AEStatsLogPath_property), importStats.asDict())
+        except OSError as error:
+            self.report({'WARNING'}, "Could not write import statistics: %s" % error)
+
+# IMPORT TRANSACTIONS
+#
+# Imports change the scene only through the data API, which tags what it
+# changes instead of evaluating it, so the view layer is updated once when
+# the import ends. Operators that change the scene have the UNDO option:
+# Blender pushes one undo step once the whole import has finished, also
+# after a modal one, and one Ctrl+Z removes all of it.
+
+@contextmanager
+def importTransaction(self, operation):
+    with measureImport(self, operation) as importStats:
+        try:
+            yield importStats
+        finally:
+            if importStats.objects:
+                # Matrices read after the import, by scripts or the next operator, are current
+                with importStats.stage('update'):
+                    bpy.context.view_layer.update()
+
+# KEYFRAME CACHE
+
+def trackCache():
+    scene = bpy.context.scene
+    directory = bpy.path.abspath(scene.AE2Blend.AECacheDir_property)
+    if not directory:
+        import tempfile
+        directory = os.path.join(tempfile.gettempdir(), "ae2blend_cache")
+    return cache.TrackCache(directory, scene.AE2Blend.AECacheSize_property * 1024 * 1024)
+
+def cacheSettings():
+    # Every scene setting the cached tracks depend on, the cursor and playhead are applied when writing
+    scene = bpy.context.scene
+    return cache.cacheSettings(
+        scene.AE2Blend.AEScale_property,
+        scene.AE2Blend.AERotation_property,
+        scene.AE2Blend.AETiming_property,
+        scene.render.fps / scene.render.fps_base,
+        scene.AE2Blend.AEDecimate_property,
+        scene.AE2Blend.AETolerance_property,
+        scene.AE2Blend.AEAngleTolerance_property)
+
+def loadCached(self, contentHash, parse):
+    # Read parsed and converted keyframes from the cache, or parse, convert and store them.
+    # The keys decimation removed are stored with them, so a hit reports them too
+    settings = cacheSettings()
+    key = cache.cacheKey(contentHash, settings)
+    store = trackCache()
+    with importJob.stats.stage('parse'):
+        document = store.load(key)
+        cached = document is not None
+        if not cached:
+            document = parse()
+    if not cached:
+        with importJob.stats.stage('convert'):
+            cache.convertDocument(document, settings, decimate.DecimationReport())
+        try:
+            store.store(key, document)
+        except OSError as error:
+            self.report({'WARNING'}, "Could not write keyframe cache: %s" % error)
+    return document
+
+def aeXYZ(row, default = 0.0):
+    # AfterEffects X, Y, Z values of a row, 2D layers have no Z
+    if len(row) >= 3:
+        return row[0], row[1], row[2]
+    return row[0], row[1], default
+
+# IMPORT JOBS
+#
+# An import is a generator of (status, done, total) steps. Operators run it
+# to the end in execute, or a few steps per timer event when started from
+# the UI, so Blender stays responsive and Esc can cancel it. Each import has
+# an ImportJob for its reports, it is importJob only while its own steps
+# run, so a Live Sync update or a second import taking turns with a modal
+# import keeps its own.
+
+class ImportJob:
+    """Timing and reports of one import"""
+
+    def __init__(self):
+        self.stats = stats.ImportStats()
+        # Keys removed by decimation and keys changed by a sync paste
+        self.decimation = decimate.DecimationReport()
+        self.syncReport = fcurves.SyncReport()
+        # What decimation removed from tracks the cache or the watcher converted, counted once they are used
+        self.preparedDecimation = None
+
+@contextmanager
+def activeJob(job):
+    # Make job the running import for the block, then put back the one it interrupted
+    global importJob
+    previous = importJob
+    importJob = job
+    try:
+        yield job
+    finally:
+        importJob = previous
+
+def jobSteps(steps):
+    # Steps of a new import, with its own job running while each step runs, returns what they return
+    job = ImportJob()
+    while True:
+        with activeJob(job):
+            try:
+                step = next(steps)
+            except StopIteration as stop:
+                return stop.value
+        try:
+            yield step
+        except GeneratorExit:
+            # Cancelled, the import still finishes its reports in its own job
+            with activeJob(job):
+                steps.close()
+            raise
+
+def runSteps(steps):
+    # Run a step generator to the end at once, returns what it returns
+    while True:
+        try:
+            next(steps)
+        except StopIteration as stop:
+            return stop.value
+
+def partSteps(steps, status, part, parts):
+    # Run the steps of one of parts, counted from 0, as progress over all of them, returns what they return
+    try:
+        while True:
+            try:
+                step, done, total = next(steps)
+            except StopIteration as stop:
+                return stop.value
+            yield status, part + (done / total if total else 1.0), parts
+    finally:
+        steps.close()
+
+def importSteps(self, document, importer):
+    # Run one import and report what decimation removed and sync changed
+    job = importJob
+    job.preparedDecimation = document.decimation
+    skipped = convert.unknownSections(document.channels)
+    if skipped:
+        self.report({'WARNING'}, "Skipped sections AE2Blend can't convert: %s" % ", ".join(skipped))
+    yield from importer(document)
+    if job.decimation.total:
+        self.report({'INFO'}, str(job.decimation))
+    if job.syncReport.total:
+        self.report({'INFO'}, str(job.syncReport))
+
+def importSubset():
+    # AfterEffects channel names and (first, last) frames the scene limits imports to, None for all
+    scene = bpy.context.scene
+    channels = None
+    if set(scene.AE2Blend.AEChannels_property) != set(CHANNEL_NAMES):
+        channels = tuple(name for setting in sorted(scene.AE2Blend.AEChannels_property) for name in CHANNEL_NAMES[setting])
+    frames = None
+    if scene.AE2Blend.AERange_property:
+        frames = tuple(sorted((scene.AE2Blend.AERangeStart_property, scene.AE2Blend.AERangeEnd_property)))
+    return channels, frames, scene.AE2Blend.AEBracket_property
+
+def clipboardJob(self, operation, importer, channels = None, rows = None):
+    return jobSteps(clipboardSteps(self, operation, importer, channels, rows))
+
+def clipboardSteps(self, operation, importer, channels = None, rows = None):
+    # With channels, a channel subset or a frame range only the keys needed are decoded,
+    # through the clipboard index instead of the cache
+    with importTransaction(self, operation):
+        subset, frames, bracket = importSubset()
+        if channels is None and subset is None and frames is None:
+            document = yield from loadClipboardSteps(self)
+        else:
+            document = yield from loadIndexedSteps(self, channels or subset, rows, frames, bracket)
+        if document is not None:
+            yield from importSteps(self, document, importer)
+
+def fileJob(self, filepath, target = 'EMPTY'):
+    return jobSteps(fileSteps(self, filepath, target))
+
+def fileSteps(self, filepath, target = 'EMPTY'):
+    with importTransaction(self, "Import %s" % os.path.basename(filepath)):
+        # Channels left out of the subset are never decoded
+        subset, frames, bracket = importSubset()
+        document = yield from loadFileSteps(self, filepath, subset)
+        if document is None:
+            return False
+        if frames is not None:
+            document = keyframes.subsetDocument(document, None, frames, bracket)
+        yield from importSteps(self, document, IMPORT_TARGETS[target])
+    return True
+
+def recordCreated(datablock):
+    # Remember a new datablock so a cancelled import can remove it
+    if importJournal is not None:
+        importJournal.addCreated(datablock)
+    return datablock
+
+def saveTarget(target):
+    # Save an existing object before a cancellable import changes it
+    if importJournal is not None:
+        importJournal.saveTarget(target)
+
+# CREATE OBJECTS THROUGH THE DATA API
+
+def linkObject(name, data = None):
+    # bpy.data instead of bpy.ops, so no scene update or selection change per object
+    with importJob.stats.stage('create'):
+        obj = recordCreated(bpy.data.objects.new(name, data))
+        bpy.context.collection.objects.link(obj)
+    importJob.stats.touch(obj)
+    return obj
+
+def linkTransformEmpty(name):
+    # Empties start at the 3D Cursor like bpy.ops.object.empty_add
+    target = linkObject(name)
+    target.empty_display_type = 'PLAIN_AXES'
+    target.location = bpy.context.scene.cursor.location
+    return target
+
+def parentObject(child, parent):
+    # Both objects are new and sit at the parent's origin, so the parent inverse is
+    # set to identity directly instead of computed from a matrix that isn't evaluated yet
+    with importJob.stats.stage('parent'):
+        child.parent = parent
+        child.matrix_parent_inverse.identity()
+
+def selectObjects(objects):
+    # Select the created objects once at the end instead of after every object
+    for obj in bpy.context.selected_objects:
+        obj.select_set(False)
+    for obj in objects:
+        obj.select_set(True)
+    if objects:
+        bpy.context.view_layer.objects.active = objects[-1]
+
+def layerSources(document):
+    # In batch mode every layer gets its own object, otherwise one object gets everything
+    if bpy.context.scene.AE2Blend.AEBatch_property and document.layers:
+        return document.layers
+    return [document]
+
+def createObjects(document, createRig):
+    # createRig returns the steps of one rig, which return its top object
+    sources = layerSources(document)
+    created = []
+    for source in sources:
+        created.append((yield from partSteps(createRig(source), "Creating", len(created), len(sources))))
+        yield "Creating", len(created), len(sources)
+    selectObjects(created)
 
 # CREATE AN EMPTY OBJECT WITH AE KEYFRAME DATA
 
 def createEmptyAE(self):
-    if checkClipboard(self):
-        bpy.ops.object.empty_add(type='PLAIN_AXES')
-        target = bpy.context.object
-        
-        applyTransformData(target)
+    runSteps(clipboardJob(self, "Create Empty", createEmpty))
+
+def createEmpty(document):
+    yield from createObjects(document, createEmptyRig)
+
+def createEmptyRig(source):
+    target = linkTransformEmpty(source.name or "Empty")
+    
+    yield from applyTransformSteps(target, source)
+    return target
 
 # CREATE A PLANE OBJECT WITH AE KEYFRAME DATA
 
 def createPlaneAE(self):
-    if checkClipboard(self):
-        # Create Transform Object
-        bpy.ops.object.empty_add(type='PLAIN_AXES')
-        target = bpy.context.object
-        target.name = "Plane_Transform"
-        
-        # Create Plane Mesh
-        bpy.ops.mesh.primitive_plane_add()
-        plane = bpy.context.object
-        t_rot = (math.radians(-90), math.radians(180), math.radians(0))
-        plane.rotation_mode = 'XYZ'
-        plane.rotation_euler = (t_rot)
-        width = 1
-        height = 1
-        # Find Width and Hieght from Clipbard
-        clipboard = bpy.context.window_manager.clipboard
-        if clipboard != "":
-            keyFrameData = clipboard.split()
-            wordNum = 0
-            scale = bpy.context.scene.AEScale_property
-            while wordNum < 30:
-                if keyFrameData[wordNum] == "Width":
-                    width = float(keyFrameData[wordNum + 1]) / scale
-                if keyFrameData[wordNum] == "Height":
-                    height = float(keyFrameData[wordNum + 1]) / scale
-                wordNum += 1
-        plane.scale.x = width / 2
-        plane.scale.y = height / 2
-        
-        # Parent Plane to Transform Object
-        target.select_set(True)
-        plane.select_set(True)
-        bpy.context.view_layer.objects.active = target
-        bpy.ops.object.parent_set()
-        plane.select_set(False)
-        
-        applyTransformData(target)
+    runSteps(clipboardJob(self, "Create Plane", createPlane))
+
+def createPlane(document):
+    # All planes share one mesh, the size comes from the object scale
+    mesh = createPlaneMesh()
+    yield from createObjects(document, lambda source: createPlaneRig(source, mesh))
+
+def createPlaneMesh():
+    # Same 2 x 2 plane with UVs as bpy.ops.mesh.primitive_plane_add
+    with importJob.stats.stage('create'):
+        mesh = recordCreated(bpy.data.meshes.new("Plane"))
+        mesh.from_pydata([(-1, -1, 0), (1, -1, 0), (1, 1, 0), (-1, 1, 0)], [], [(0, 1, 2, 3)])
+        uvLayer = mesh.uv_layers.new()
+        uvLayer.data.foreach_set('uv', (0, 0, 1, 0, 1, 1, 0, 1))
+    return mesh
+
+def createPlaneRig(source, mesh):
+    name = source.name or "Plane"
+    
+    # Create Transform Object
+    target = linkTransformEmpty(name + "_Transform")
+    
+    # Create Plane Object
+    plane = linkObject(name, mesh)
+    t_rot = (math.radians(-90), math.radians(180), math.radians(0))
+    plane.rotation_mode = 'XYZ'
+    plane.rotation_euler = (t_rot)
+    width = 1
+    height = 1
+    # Find Width and Height from the Keyframe Data header
+    scale = bpy.context.scene.AE2Blend.AEScale_property
+    if isinstance(source.sourceWidth, float):
+        width = source.sourceWidth / scale
+    if isinstance(source.sourceHeight, float):
+        height = source.sourceHeight / scale
+    plane.scale.x = width / 2
+    plane.scale.y = height / 2
+    
+    # Parent Plane to Transform Object
+    parentObject(plane, target)
+    
+    yield from applyTransformSteps(target, source)
+    return target
 
 # CREATE A CAMERA OBJECT WITH AE KEYFRAME DATA
 
 def createCameraAE(self):
-    if checkClipboard(self):
-        # Create Transform Object
-        bpy.ops.object.empty_add(type='PLAIN_AXES')
-        target = bpy.context.object
-        target.name = "Camera_Transform"
-        
-        # Create Camera Object
-        bpy.ops.object.camera_add()
-        camera = bpy.context.object
-        t_rot = (math.radians(-90), math.radians(180), math.radians(0))
-        camera.rotation_mode = 'XYZ'
-        camera.rotation_euler = (t_rot)
-        
-        # Parent Camera to Transform Object
-        target.select_set(True)
-        camera.select_set(True)
-        bpy.context.view_layer.objects.active = target
-        bpy.ops.object.parent_set()
-        camera.select_set(False)
-        
-        applyTransformData(target)
+    runSteps(clipboardJob(self, "Create Camera", createCamera))
+
+def createCamera(document):
+    yield from createObjects(document, createCameraRig)
+
+def createCameraRig(source):
+    name = source.name or "Camera"
+    
+    # Create Transform Object
+    target = linkTransformEmpty(name + "_Transform")
+    
+    # Create Camera Object
+    with importJob.stats.stage('create'):
+        camera = linkObject(name, recordCreated(bpy.data.cameras.new(name)))
+    t_rot = (math.radians(-90), math.radians(180), math.radians(0))
+    camera.rotation_mode = 'XYZ'
+    camera.rotation_euler = (t_rot)
+    # Zoom converts to a lens for the AfterEffects film size, measured horizontally
+    camera.data.sensor_width = convert.FILM_SIZE
+    camera.data.sensor_fit = 'HORIZONTAL'
+    
+    # Parent Camera to Transform Object
+    parentObject(camera, target)
+    
+    yield from applyTransformSteps(target, source, data = camera)
+    return target
 
 # PASTE AE KEYFRAME DATA TO ALL SELECTED OBJECTS
 
 def pasteKeyframesAE(self):
-    if checkClipboard(self):
-        for target in bpy.context.view_layer.objects:
-            if target.select == 1:
-                applyTransformData(target)
+    runSteps(clipboardJob(self, "Paste Keyframes", pasteKeyframes))
 
-# MAIN FUNCTION FOR PARSING AE KEYFRAME DATA
+def pasteKeyframes(document):
+    targets = bpy.context.selected_objects
+    if bpy.context.scene.AE2Blend.AESharedAction_property and len(targets) > 1:
+        yield from pasteSharedAction(document, targets)
+    else:
+        sync = bpy.context.scene.AE2Blend.AESync_property
+        for done, target in enumerate(targets):
+            yield from partSteps(applyTransformSteps(target, document, sync), "Pasting", done, len(targets))
 
-def applyTransformData(target):
-    # Load string from Clipboard
-    clipboard = bpy.context.window_manager.clipboard
+def pasteSharedAction(document, targets):
+    # Build the keys once into one Action that every target uses
+    settings = conversionSettings(document)
+    cursor = settings.pop('cursor')
+    frameOffset = settings.pop('frameOffset')
+    # Keys start on the AfterEffects frames, the NLA strip and delta location place them
+    tracks = preparedTracks(document)
+    if tracks is None:
+        tracks = convertTracks(document.channels, **settings)
+    
+    with importJob.stats.stage('write'):
+        action = recordCreated(bpy.data.actions.new("AE2BlendAction"))
+    delta = None
+    # Lens and effect point keys don't belong to the object, they are written per target below
+    keyedTracks = [track for track in tracks if not track.isStatic and track.owner is None]
+    total = len(keyedTracks) + len(targets)
+    for done, track in enumerate(keyedTracks, 1):
+        with importJob.stats.stage('write'):
+            fcurves.writeActionKeys(action, track.dataPath, track.frames, track.values.T, track.indices, track.interpolation)
+        importJob.stats.keys += len(track) * len(track.indices)
+        # Cursor mode moves every object by the same delta location instead of moving the keys
+        if track.dataPath == 'location' and cursor is not None:
+            delta = tuple(value - start for value, start in zip(cursor, track.values[0]))
+        yield "Writing", done, total
+    
+    # Not in the shared Action, so the frame offset goes on the keys
+    staticTracks = [convert.placeTrack(track, frameOffset = frameOffset) for track in tracks if track.isStatic or track.owner is not None]
+    rotates = any(track.isRotation for track in tracks)
+    for done, target in enumerate(targets, len(keyedTracks) + 1):
+        saveTarget(target)
+        with importJob.stats.stage('write'):
+            # Values without keyframes and the rotation mode still go on each object
+            applyTracks(target, staticTracks)
+            if rotates:
+                target.rotation_mode = 'YZX'
+            if delta is not None:
+                target.delta_location = delta
+            fcurves.assignAction(target, action, frameOffset)
+        yield "Pasting", done, total
+
+# IMPORT AE KEYFRAME DATA FROM A TEXT FILE
+
+IMPORT_TARGETS = {
+    'EMPTY': createEmpty,
+    'PLANE': createPlane,
+    'CAMERA': createCamera,
+    'SELECTED': pasteKeyframes}
+
+def importKeyframeFileAE(self, filepath, target = 'EMPTY'):
+    return runSteps(fileJob(self, filepath, target))
+
+# MAIN FUNCTION FOR APPLYING AE KEYFRAME DATA
+
+def conversionSettings(source):
+    # Scene settings passed to convert.convertChannels for a document or layer
+    scene = bpy.context.scene
     
     # Check if Keyframes should be offset by Playhead
     frameOffset = 0
-    if bpy.context.scene.AEFrame_property == "Playhead":
-        frameOffset = bpy.context.scene.frame_current
+    if scene.AE2Blend.AEFrame_property == "Playhead":
+        frameOffset = scene.frame_current
     
-    if clipboard != "":
-        # Parse Keyframe Data into new Variable, change capitalize e's for proper float parsing
-        keyFrameData = clipboard.replace('e','E').split()
-        
-        # Set common variables
-        wordNum = 0
-        maxWords = len(keyFrameData)
-        isLoop = 0
-        scale = bpy.context.scene.AEScale_property
-        
-        # Go through each word in keyFrame Data
-        while wordNum < maxWords:
-            
-            if "Transform" in keyFrameData[wordNum]:
-                wordNum += 1
-                
-                # Apply Rotation Keys (AfterEffect's 2D rotaiton/Z Axis)
-                if "Rotation" in keyFrameData[wordNum]:
-                    wordNum += 3
-                    target.rotation_mode = 'YZX'
-                    if keyFrameData[wordNum + 2].replace('.','').replace('-','').isdigit():
-                        isLoop = 1
-                        while isLoop == 1:
-                            if keyFrameData[wordNum].replace('.','',1).isdigit():
-                                t_rot = (target.rotation_euler.x, math.radians(-float(keyFrameData[wordNum + 1])), target.rotation_euler.z)
-                                if bpy.context.scene.AERotation_property == "XYZ":
-                                    target.delta_rotation_euler = (t_rot)
-                                    target.keyframe_insert(data_path='delta_rotation_euler', frame = float(keyFrameData[wordNum]) + frameOffset, index = 1)
-                                else:
-                                    target.rotation_euler = (t_rot)
-                                    target.keyframe_insert(data_path='rotation_euler', frame = float(keyFrameData[wordNum]) + frameOffset, index = 1)
-                                    wordNum += 2
-                            else:
-                                isLoop = 0
-                                wordNum -= 1
-                    else:
-                        t_rot = (target.rotation_euler.x, math.radians(-float(keyFrameData[wordNum])), target.rotation_euler.z)
-                        if bpy.context.scene.AERotation_property == "XYZ":
-                            target.delta_rotation_euler = (t_rot)
-                        else:
-                            target.rotation_euler = (t_rot)
-                
-                # Apply X Axis Rotation Keys
-                if "X" in keyFrameData[wordNum] and "Rotation" in keyFrameData[wordNum + 1]:
-                    wordNum += 4
-                    target.rotation_mode = 'YZX'
-                    if keyFrameData[wordNum + 2].replace('.','').replace('-','').isdigit():
-                        isLoop = 1
-                        while isLoop == 1:
-                            if keyFrameData[wordNum].replace('.','',1).isdigit():
-                                t_rot = (math.radians(-float(keyFrameData[wordNum + 1])), target.rotation_euler.y, target.rotation_euler.z)
-                                if bpy.context.scene.AERotation_property == "XYZ":
-                                    target.delta_rotation_euler = (t_rot)
-                                    target.keyframe_insert(data_path='delta_rotation_euler', frame = float(keyFrameData[wordNum]) + frameOffset, index = 0)
-                                else:
-                                    target.rotation_euler = (t_rot)
-                                    target.keyframe_insert(data_path='rotation_euler', frame = float(keyFrameData[wordNum]) + frameOffset, index = 0)
-                                wordNum += 2
-                            else:
-                                isLoop = 0
-                                wordNum -= 1
-                    else:
-                        t_rot = (math.radians(-float(keyFrameData[wordNum])), target.rotation_euler.y, target.rotation_euler.z)
-                        if bpy.context.scene.AERotation_property == "XYZ":
-                            target.delta_rotation_euler = (t_rot)
-                        else:
-                            target.rotation_euler = (t_rot)
-                
-                # Apply Scale Keys
-                if "ScalE" in keyFrameData[wordNum]:
-                    wordNum += 8
-                    if keyFrameData[wordNum + 4].replace('.','').replace('-','').isdigit():
-                        isLoop = 1
-                        while isLoop == 1:
-                            if keyFrameData[wordNum].replace('.','',1).isdigit():
-                                target.scale.x = float(keyFrameData[wordNum + 1]) / scale
-                                target.scale.y = float(keyFrameData[wordNum + 3]) / scale
-                                target.scale.z = float(keyFrameData[wordNum + 2]) / scale
-                                target.keyframe_insert(data_path='scale', frame = float(keyFrameData[wordNum]) + frameOffset)
-                                wordNum += 4
-                            else:
-                                isLoop = 0
-                                wordNum -= 1
-                    else:
-                        target.scale.x = float(keyFrameData[wordNum]) / scale
-                        target.scale.y = float(keyFrameData[wordNum + 2]) / scale
-                        target.scale.z = float(keyFrameData[wordNum + 1]) / scale
-                        
-                # Apply Position Keys
-                if "Position" in keyFrameData[wordNum]:
-                    wordNum += 8
-                    if keyFrameData[wordNum + 4].replace('.','').replace('-','').isdigit():
-                        isLoop = 1
-                        x_o = 0
-                        y_o = 0
-                        z_o = 0
-                        if bpy.context.scene.AEPosition_property == "Cursor":
-                            x_o = bpy.context.scene.cursor_location.x - -float(keyFrameData[wordNum + 1]) / scale
-                            y_o = bpy.context.scene.cursor_location.y - -float(keyFrameData[wordNum + 3]) / scale
-                            z_o = bpy.context.scene.cursor_location.z - -float(keyFrameData[wordNum + 2]) / scale
-                        while isLoop == 1:
-                            if keyFrameData[wordNum].replace('.','',1).isdigit():
-                                target.location.x = -float(keyFrameData[wordNum + 1]) / scale + x_o
-                                target.location.y = -float(keyFrameData[wordNum + 3]) / scale + y_o
-                                target.location.z = -float(keyFrameData[wordNum + 2]) / scale + z_o
-                                target.keyframe_insert(data_path='location', frame = float(keyFrameData[wordNum]) + frameOffset)
-                                wordNum += 4
-                            else:
-                                isLoop = 0
-                                wordNum -= 1
-                    else:
-                        target.location.x = -float(keyFrameData[wordNum]) / scale
-                        target.location.y = -float(keyFrameData[wordNum + 2]) / scale
-                        target.location.z = -float(keyFrameData[wordNum + 1]) / scale
-                
-                # Apply Orientation Keys
-                if "OriEntation" in keyFrameData[wordNum]:
-                    wordNum += 4
-                    target.rotation_mode = 'YZX'
-                    x_p = 0
-                    y_p = 0
-                    z_p = 0
-                    x_o = 0
-                    y_o = 0
-                    z_o = 0
-                    if keyFrameData[wordNum + 3].replace('.','').replace('-','').isdigit():
-                        isLoop = 1
-                        while isLoop == 1:
-                            if keyFrameData[wordNum].replace('.','',1).isdigit():
-                                print(keyFrameData[wordNum + 1])
-                                x_a = float(keyFrameData[wordNum + 1]) + x_o
-                                y_a = float(keyFrameData[wordNum + 3]) + y_o
-                                z_a = float(keyFrameData[wordNum + 2]) + z_o
-                                if math.fabs(x_a - x_p) > 180:
-                                    if x_a > x_p:
-                                        x_a -= 360
-                                        x_o -= 360
-                                    else:
-                                        x_a += 360
-                                        x_o += 360
-                                if math.fabs(y_a - y_p) > 180:
-                                    if y_a > y_p:
-                                        y_a -= 360
-                                        y_o -= 360
-                                    else:
-                                        y_a += 360
-                                        y_o += 360
-                                if math.fabs(z_a - z_p) > 180:
-                                    if z_a > z_p:
-                                        z_a -= 360
-                                        z_o -= 360
-                                    else:
-                                        z_a += 360
-                                        z_o += 360
-                                x_p = x_a
-                                y_p = y_a
-                                z_p = z_a
-                                t_rot = (math.radians(-x_a), math.radians(-y_a), math.radians(-z_a))
-                                if bpy.context.scene.AERotation_property == "Orientation":
-                                    target.delta_rotation_euler = (t_rot)
-                                    target.keyframe_insert(data_path='delta_rotation_euler', frame = float(keyFrameData[wordNum]) + frameOffset)
-                                else:
-                                    target.rotation_euler = (t_rot)
-                                    target.keyframe_insert(data_path='rotation_euler', frame = float(keyFrameData[wordNum]) + frameOffset)
-                                wordNum += 4
-                            else:
-                                isLoop = 0
-                                wordNum -= 1
-                    else:
-                        t_rot = (math.radians(-float(keyFrameData[wordNum])), math.radians(-float(keyFrameData[wordNum + 2])), math.radians(-float(keyFrameData[wordNum + 1])))
-                        if bpy.context.scene.AERotation_property == "Orientation":
-                            target.delta_rotation_euler = (t_rot)
-                        else:
-                            target.rotation_euler = (t_rot)
-                
-                # Apply Y Rotation Keys
-                if "Y" in keyFrameData[wordNum] and "Rotation" in keyFrameData[wordNum + 1]:
-                    wordNum += 4
-                    target.rotation_mode = 'YZX'
-                    if keyFrameData[wordNum + 2].replace('.','').replace('-','').isdigit():
-                        isLoop = 1
-                        while isLoop == 1:
-                            if keyFrameData[wordNum].replace('.','',1).isdigit():
-                                t_rot = (target.rotation_euler.x, target.rotation_euler.y, math.radians(-float(keyFrameData[wordNum + 1])))
-                                if bpy.context.scene.AERotation_property == "XYZ":
-                                    target.delta_rotation_euler = (t_rot)
-                                    target.keyframe_insert(data_path='delta_rotation_euler', frame = float(keyFrameData[wordNum]) + frameOffset, index = 2)
-                                else:
-                                    target.rotation_euler = (t_rot)
-                                    target.keyframe_insert(data_path='rotation_euler', frame = float(keyFrameData[wordNum]) + frameOffset, index = 2)
-                                wordNum += 2
-                            else:
-                                isLoop = 0
-                                wordNum -= 1
-                    else:
-                        t_rot = (target.rotation_euler.x, target.rotation_euler.y, math.radians(-float(keyFrameData[wordNum])))
-                        if bpy.context.scene.AERotation_property == "XYZ":
-                            target.delta_rotation_euler = (t_rot)
-                        else:
-                            target.rotation_euler = (t_rot)
-                
-            wordNum += 1
+    cursor = None
+    if scene.AE2Blend.AEPosition_property == "Cursor":
+        cursor = tuple(scene.cursor.location)
+    
+    # Convert AfterEffects frames at Units Per Second to frames at the scene frame rate
+    timeScale = convert.timeScaleFor(source.unitsPerSecond, scene.render.fps / scene.render.fps_base, scene.AE2Blend.AETiming_property)
+    
+    return {
+        'scale': scene.AE2Blend.AEScale_property,
+        'rotation': scene.AE2Blend.AERotation_property,
+        'cursor': cursor,
+        'frameOffset': frameOffset,
+        'timeScale': timeScale,
+        'resample': scene.AE2Blend.AETiming_property == 'Resample',
+        'sourceWidth': source.sourceWidth}
+
+def convertTracks(channels, **settings):
+    # Convert channels to Tracks, decimated when the scene asks for it
+    scene = bpy.context.scene
+    with importJob.stats.stage('convert'):
+        tracks = convert.convertChannels(channels, **settings)
+        if scene.AE2Blend.AEDecimate_property:
+            tracks = [decimate.decimateTrack(track, scene.AE2Blend.AETolerance_property, scene.AE2Blend.AEAngleTolerance_property, importJob.decimation) for track in tracks]
+    return tracks
+
+def preparedTracks(source):
+    # Tracks of a document or layer the cache or the clipboard watcher converted, None when there are none.
+    # The first import using them reports what decimation removed from them
+    tracks = source.tracks
+    if tracks is not None and importJob.preparedDecimation is not None:
+        importJob.decimation.merge(importJob.preparedDecimation)
+        importJob.preparedDecimation = None
+    return tracks
+
+def applyTransformData(target, source, sync = False, data = None):
+    runSteps(applyTransformSteps(target, source, sync, data))
+
+def applyTransformSteps(target, source, sync = False, data = None):
+    # source is a KeyframeDocument or one of its layers, tracks are set when it came from the cache
+    settings = conversionSettings(source)
+    tracks = preparedTracks(source)
+    if tracks is None:
+        tracks = convertTracks(source.channels, **settings)
+        yield "Writing", 0, len(tracks)
+    else:
+        # Converted without the cursor and the playhead, placed on them as they are now
+        tracks = [convert.placeTrack(track, settings['cursor'], settings['frameOffset']) for track in tracks]
+    yield from applyTrackSteps(target, tracks, sync, data)
+
+def applyTracks(target, tracks, sync = False, data = None):
+    runSteps(applyTrackSteps(target, tracks, sync, data))
+
+def applyTrackSteps(target, tracks, sync = False, data = None):
+    # One step per track, so a dense layer is written over several timer events.
+    # With sync the existing F-Curves are edited to match instead of having the keys merged in.
+    # data is the object whose data gets tracks like the lens, the target itself by default
+    saveTarget(target)
+    importJob.stats.touch(target)
+    for done, track in enumerate(tracks, 1):
+        owner = trackOwner(target, track, data)
+        if owner is None:
+            continue
+        with importJob.stats.stage('write'):
+            if track.isRotation:
+                owner.rotation_mode = 'YZX'
+            # A property without keyframes is only set, otherwise all keys are written in bulk
+            if track.isStatic:
+                prop = getattr(owner, track.dataPath)
+                if isinstance(prop, float):
+                    # Single value property like the lens
+                    setattr(owner, track.dataPath, track.values[0][0])
+                else:
+                    for index, value in zip(track.indices, track.values[0]):
+                        prop[index] = value
+            elif sync:
+                # A frame range only replaces the keys in its own span
+                span = (track.frames[0], track.frames[-1]) if bpy.context.scene.AE2Blend.AERange_property else None
+                importJob.stats.keys += fcurves.syncKeys(owner, track.dataPath, track.frames, track.values.T, track.indices, track.interpolation, importJob.syncReport, span)
+        if not track.isStatic and not sync:
+            # One F-Curve per step
+            for column, (index, values) in enumerate(zip(track.indices, track.values.T), 1):
+                with importJob.stats.stage('write'):
+                    fcurves.writeKeys(owner, track.dataPath, track.frames, (values,), (index,), track.interpolation)
+                importJob.stats.keys += len(track)
+                yield "Writing", done - 1 + column / len(track.indices), len(tracks)
+        else:
+            yield "Writing", done, len(tracks)
+
+def trackOwner(target, track, data = None):
+    # Datablock a track is written to, None when the target has nothing that takes it
+    if track.owner is None:
+        return target
+    if track.owner == convert.DATA:
+        owner = (data or target).data
+        if owner is None or not hasattr(owner, track.dataPath):
+            return None
+        # The lens and its keys are on the data, a cancelled import puts them back too
+        saveTarget(owner)
+        return owner
+    # Effect point, on an Empty named after the target and the point
+    name = "%s %s" % (target.name, track.owner)
+    point = bpy.data.objects.get(name)
+    if point is None:
+        point = linkTransformEmpty(name)
+    else:
+        saveTarget(point)
+        importJob.stats.touch(point)
+    return point
 
 # SCALE CALCULATOR FUNCTIONS
 
+def setMarkerAE(self, marker):
+    with activeJob(ImportJob()), importTransaction(self, "Marker %d" % marker):
+        channel = loadFirstChannel(self, "Position", 1)
+        if channel is not None and len(channel) > 0:
+            # Markers keep AfterEffects units, Y and Z swapped to Blender axes
+            x, y, z = aeXYZ(channel.row(0))
+            scene = bpy.context.scene
+            with importJob.stats.stage('write'):
+                setattr(scene.AE2Blend, "AEm%dx_property" % marker, x)
+                setattr(scene.AE2Blend, "AEm%dy_property" % marker, z)
+                setattr(scene.AE2Blend, "AEm%dz_property" % marker, y)
+
 def setMarker1AE(self):
-    if checkClipboard(self):
-        # Load string from Clipboard
-        clipboard = bpy.context.window_manager.clipboard
-        
-        if clipboard != "":
-            # Parse Keyframe Data into new Variable, change capitalize e's for proper float parsing
-            keyFrameData = clipboard.replace('e','E').split()
-            
-            # Set common variables
-            wordNum = 0
-            maxWords = len(keyFrameData)
-            isLoop = 0
-            
-            # Go through each word in keyFrame Data
-            while wordNum < maxWords:
-                
-                if "Transform" in keyFrameData[wordNum]:
-                    wordNum += 1
-                    
-                    if "Position" in keyFrameData[wordNum]:
-                        wordNum += 8
-                        if keyFrameData[wordNum + 3].replace('.','',1).isdigit():
-                            bpy.context.scene.AEm1x_property = float(keyFrameData[wordNum + 1])
-                            bpy.context.scene.AEm1y_property = float(keyFrameData[wordNum + 3])
-                            bpy.context.scene.AEm1z_property = float(keyFrameData[wordNum + 2])
-                        else:
-                            bpy.context.scene.AEm1x_property = float(keyFrameData[wordNum])
-                            bpy.context.scene.AEm1y_property = float(keyFrameData[wordNum + 2])
-                            bpy.context.scene.AEm1z_property = float(keyFrameData[wordNum + 1])
-                        
-                wordNum += 1
+    setMarkerAE(self, 1)
 
 def setMarker2AE(self):
-    if checkClipboard(self):
-        # Load string from Clipboard
-        clipboard = bpy.context.window_manager.clipboard
-        
-        if clipboard != "":
-            # Parse Keyframe Data into new Variable, change capitalize e's for proper float parsing
-            keyFrameData = clipboard.replace('e','E').split()
-            
-            # Set common variables
-            wordNum = 0
-            maxWords = len(keyFrameData)
-            isLoop = 0
-            
-            # Go through each word in keyFrame Data
-            while wordNum < maxWords:
-                
-                if "Transform" in keyFrameData[wordNum]:
-                    wordNum += 1
-                    
-                    if "Position" in keyFrameData[wordNum]:
-                        wordNum += 8
-                        if keyFrameData[wordNum + 3].replace('.','',1).isdigit():
-                            bpy.context.scene.AEm2x_property = float(keyFrameData[wordNum + 1])
-                            bpy.context.scene.AEm2y_property = float(keyFrameData[wordNum + 3])
-                            bpy.context.scene.AEm2z_property = float(keyFrameData[wordNum + 2])
-                        else:
-                            bpy.context.scene.AEm2x_property = float(keyFrameData[wordNum])
-                            bpy.context.scene.AEm2y_property = float(keyFrameData[wordNum + 2])
-                            bpy.context.scene.AEm2z_property = float(keyFrameData[wordNum + 1])
-                        
-                wordNum += 1
+    setMarkerAE(self, 2)
 
 def calculateScaleAE(self):
-    m1x = bpy.context.scene.AEm1x_property
-    m1y = bpy.context.scene.AEm1y_property
-    m1z = bpy.context.scene.AEm1z_property
-    m2x = bpy.context.scene.AEm2x_property
-    m2y = bpy.context.scene.AEm2y_property
-    m2z = bpy.context.scene.AEm2z_property
+    m1x = bpy.context.scene.AE2Blend.AEm1x_property
+    m1y = bpy.context.scene.AE2Blend.AEm1y_property
+    m1z = bpy.context.scene.AE2Blend.AEm1z_property
+    m2x = bpy.context.scene.AE2Blend.AEm2x_property
+    m2y = bpy.context.scene.AE2Blend.AEm2y_property
+    m2z = bpy.context.scene.AE2Blend.AEm2z_property
     
     x = 0
     y = 0
@@ -451,67 +844,284 @@ def calculateScaleAE(self):
     w = math.sqrt(x * x + y * y)
     distance = math.sqrt(w * w + z * z)
     
-    bpy.context.scene.AEScale_property = distance / bpy.context.scene.AEDist_property
+    bpy.context.scene.AE2Blend.AEScale_property = distance / bpy.context.scene.AE2Blend.AEDist_property
+
+def solveScaleAE(self):
+    # Fit every layer named like an object in the scene to that object's position
+    global scaleSolve
+    with activeJob(ImportJob()), importTransaction(self, "Solve Scale"):
+        document = runSteps(loadIndexedSteps(self, ("Position",), 1))
+        if document is None:
+            return
+        scene = bpy.context.scene
+        rigid = scene.AE2Blend.AESolveRigid_property
+        targets = {obj.name: tuple(obj.matrix_world.translation) for obj in scene.objects if obj.name != ALIGNMENT_NAME}
+        try:
+            with importJob.stats.stage('convert'):
+                result = solve.solveScale(document.layers, targets, rigid)
+        except ValueError as error:
+            self.report({'ERROR'}, "Could not solve scale: %s" % error)
+            return
+        scaleSolve = result
+        with importJob.stats.stage('write'):
+            scene.AE2Blend.AEScale_property = result.scale
+        if rigid:
+            setAlignment(result)
+    self.report({'INFO'}, str(result))
+
+def setAlignment(result):
+    # Objects imported at the solved scale and parented to this empty land on their references
+    alignment = bpy.data.objects.get(ALIGNMENT_NAME)
+    if alignment is None:
+        alignment = linkObject(ALIGNMENT_NAME)
+        alignment.empty_display_type = 'ARROWS'
+    with importJob.stats.stage('write'):
+        alignment.rotation_mode = 'XYZ'
+        alignment.rotation_euler = result.euler()
+        alignment.location = result.translation.tolist()
 
 def createPointcloudAE(self):
-    # Define the coordinates of the vertices. Each vertex is defined by a tuple of 3 floats.
-    coords=[]
-    # coords.append((2.0, 2.0, 2.0))
-    
-    # Load string from Clipboard
-    clipboard = bpy.context.window_manager.clipboard
-    
-    # Check if Keyframes should be offset by Playhead
-    frameOffset = 0
-    if bpy.context.scene.AEFrame_property == "Playhead":
-        frameOffset = bpy.context.scene.frame_current
-    
-    if clipboard != "":
-        # Parse Keyframe Data into new Variable, change capitalize e's for proper float parsing
-        keyFrameData = clipboard.replace('e','E').split()
-        
-        # Set common variables
-        wordNum = 0
-        maxWords = len(keyFrameData)
-        isLoop = 0
-        scale = bpy.context.scene.AEScale_property
-        
-        # Go through each word in keyFrame Data
-        while wordNum < maxWords:
-            
-            if "Transform" in keyFrameData[wordNum]:
-                wordNum += 1
-                
-                # Apply Position Keys
-                if "Position" in keyFrameData[wordNum]:
-                    wordNum += 8
-                    if keyFrameData[wordNum + 4].replace('.','',1).isdigit():
-                        isLoop = 1
-                        while isLoop == 1:
-                            if keyFrameData[wordNum].replace('.','',1).isdigit():
-                                pX = -float(keyFrameData[wordNum + 1]) / scale
-                                pY = -float(keyFrameData[wordNum + 3]) / scale
-                                pZ = -float(keyFrameData[wordNum + 2]) / scale
-                                coords.append((pX, pY, pZ))
-                                wordNum += 4
-                            else:
-                                isLoop = 0
-                                wordNum -= 1
-                
-                
-            wordNum += 1
+    runSteps(pointcloudJob(self))
+
+def pointcloudJob(self):
+    # Only Position is decoded, only its first row for one point per layer
+    rows = 1 if bpy.context.scene.AE2Blend.AEPointcloud_property == 'Layers' else None
+    return clipboardJob(self, "Create Pointcloud", createPointcloud, ("Position",), rows)
+
+def createPointcloud(document):
+    # Every keyframe of every layer's Position becomes a vertex, or one vertex per layer
+    import numpy as np
+    scene = bpy.context.scene
+    with importJob.stats.stage('convert'):
+        positions, layerIndices, hashes, frames = convert.pointCloud(document.layers, scene.AE2Blend.AEScale_property, scene.AE2Blend.AEPointcloud_property == 'Layers')
+    yield "Converting", 1, 2
     
     # Create Mesh
-    me = bpy.data.meshes.new("PointCloudMesh")
-     
-    ob = bpy.data.objects.new("PointCloud", me)
+    with importJob.stats.stage('create'):
+        me = recordCreated(bpy.data.meshes.new("PointCloudMesh"))
+    ob = linkObject("PointCloud", me)
     ob.location = (0.0, 0.0, 0.0)
-    bpy.context.view_layer.objects.link(ob)
     
-    me.from_pydata(coords,[],[])
+    # Vertices and their attributes are written from flat buffers in one call each
+    with importJob.stats.stage('write'):
+        me.vertices.add(len(positions))
+        me.vertices.foreach_set('co', positions.astype(np.float32).ravel())
+        addPointAttribute(me, "ae_layer", 'INT', layerIndices)
+        addPointAttribute(me, "ae_layer_hash", 'INT', hashes)
+        addPointAttribute(me, "ae_frame", 'FLOAT', frames.astype(np.float32))
+        me.update()
+    importJob.stats.keys += len(positions)
+    yield "Writing", 2, 2
+
+def addPointAttribute(mesh, name, kind, values):
+    # Generic attributes where Blender has them, vertex layers on older versions
+    if hasattr(mesh, 'attributes'):
+        layer = mesh.attributes.new(name, kind, 'POINT')
+    elif kind == 'INT':
+        layer = mesh.vertex_layers_int.new(name = name)
+    else:
+        layer = mesh.vertex_layers_float.new(name = name)
+    layer.data.foreach_set('value', values)
+
+# EXPORT TO AE KEYFRAME DATA
+
+# Transform properties an export reads
+EXPORT_PATHS = ('location', 'rotation_euler', 'scale', 'delta_location', 'delta_rotation_euler', 'delta_scale')
+
+def curveTransforms(target):
+    # Frames keyed on the object's own F-Curves and its transform on each of them,
+    # location, rotation matrices and scale. No keys gives the current transform on frame 0
+    import numpy as np
+    if target.rotation_mode in ('QUATERNION', 'AXIS_ANGLE'):
+        raise ValueError("%s uses %s rotation, export it with Frames" % (target.name, target.rotation_mode.replace('_', ' ').title()))
+    action = target.animation_data.action if target.animation_data is not None else None
+    curves = {}
+    if action is not None:
+        for fcurve in action.fcurves:
+            if fcurve.data_path in EXPORT_PATHS and len(fcurve.keyframe_points):
+                curves[fcurve.data_path, fcurve.array_index] = fcurve
+    frames = fcurves.keyFrames(curves.values())
+    keyed = len(frames) > 0
+    if not keyed:
+        frames = np.zeros(1, dtype = np.float32)
+
+    values = {}
+    for dataPath in EXPORT_PATHS:
+        current = tuple(getattr(target, dataPath))
+        columns = []
+        for index in range(3):
+            fcurve = curves.get((dataPath, index))
+            if fcurve is None:
+                columns.append(np.full(len(frames), current[index]))
+            else:
+                columns.append(fcurves.curveValues(fcurve, frames))
+        values[dataPath] = np.stack(columns, axis = 1)
+
+    # Blender turns by the rotation first and the delta rotation after it
+    mode = target.rotation_mode
+    rotation = convert.eulerMatrices(values['delta_rotation_euler'], mode) @ convert.eulerMatrices(values['rotation_euler'], mode)
+    location = values['location'] + values['delta_location']
+    scale = values['scale'] * values['delta_scale']
+    return frames if keyed else None, location, rotation, scale
+
+def evaluatedTransforms(target, first, last):
+    # World transform on every frame from first to last, the scene is evaluated once per frame
+    import numpy as np
+    scene = bpy.context.scene
+    current = scene.frame_current
+    frames = np.arange(first, last + 1, dtype = np.float64)
+    matrices = np.empty((len(frames), 4, 4))
+    try:
+        for row, frame in enumerate(range(first, last + 1)):
+            scene.frame_set(frame)
+            matrices[row] = target.matrix_world
+    finally:
+        scene.frame_set(current)
+    basis = matrices[:, :3, :3]
+    scale = np.linalg.norm(basis, axis = 1)
+    return frames, matrices[:, :3, 3], basis / scale[:, np.newaxis, :], scale
+
+def exportLayer(target):
+    # KeyframeLayer of the target's animation in AfterEffects units
+    scene = bpy.context.scene
+    with importJob.stats.stage('read'):
+        if scene.AE2Blend.AEExportMode_property == 'Frames':
+            frames, location, rotation, scale = evaluatedTransforms(target, scene.frame_start, scene.frame_end)
+        else:
+            frames, location, rotation, scale = curveTransforms(target)
+    importJob.stats.touch(target)
+
+    layer = keyframes.KeyframeLayer(target.name, {
+        "Units Per Second": scene.render.fps / scene.render.fps_base,
+        "Source Width": float(scene.render.resolution_x),
+        "Source Height": float(scene.render.resolution_y),
+        "Source Pixel Aspect Ratio": 1.0,
+        "Comp Pixel Aspect Ratio": scene.render.pixel_aspect_x / scene.render.pixel_aspect_y})
+    with importJob.stats.stage('convert'):
+        for name, values in convert.exportChannels(location, rotation, scale, scene.AE2Blend.AEScale_property, target.type == 'CAMERA'):
+            layer.channels.append(keyframes.makeChannel(name, frames, values))
+    importJob.stats.channels += len(layer.channels)
+    if frames is not None:
+        importJob.stats.keys += len(frames) * len(layer.channels)
+    return layer
+
+def exportKeyframesAE(self, filepath = None):
+    # Active object to the clipboard, or to filepath, as AfterEffects Keyframe Data
+    target = bpy.context.object
+    with activeJob(ImportJob()), measureImport(self, "Export %s" % os.path.basename(filepath) if filepath else "Copy Keyframe Data"):
+        if target is None:
+            self.report({'ERROR'}, "Select the object to export")
+            return False
+        try:
+            lines = keyframes.iterKeyframeText(exportLayer(target))
+            with importJob.stats.stage('write'):
+                if filepath:
+                    keyframes.writeKeyframeFile(filepath, lines)
+                else:
+                    bpy.context.window_manager.clipboard = "\r\n".join(lines) + "\r\n"
+        except (ValueError, OSError) as error:
+            self.report({'ERROR'}, "Could not export %s: %s" % (target.name, error))
+            return False
+    return True
+
+# LIVE SYNC OVER A LOCAL SOCKET
+#
+# The listener parses in its own threads, a timer on the main thread takes
+# the newest update of each target and syncs it like Paste Keyframes.
+
+# Seconds between checks for updates
+LIVE_STEP = 0.05
+
+def startLive(self):
+    global liveServer
+    scene = bpy.context.scene
+    try:
+        liveServer = live.LiveServer(live.localAddress(scene.AE2Blend.AELivePort_property, bpy.path.abspath(scene.AE2Blend.AELiveSocket_property)), importSubset()[0])
+    except OSError as error:
+        self.report({'ERROR'}, "Could not start Live Sync: %s" % error)
+        return False
+    bpy.app.timers.register(applyLiveUpdates, first_interval = LIVE_STEP, persistent = True)
+    self.report({'INFO'}, str(liveServer))
+    return True
+
+def stopLive():
+    global liveServer
+    if bpy.app.timers.is_registered(applyLiveUpdates):
+        bpy.app.timers.unregister(applyLiveUpdates)
+    if liveServer is not None:
+        liveServer.close()
+        liveServer = None
+
+def applyLiveUpdates():
+    # Timer callback, returns the seconds until the next call or None to stop
+    if liveServer is None:
+        return None
+    # Connection threads decode only the channels of the subset, the scene can't be read from them
+    liveServer.channels = importSubset()[0]
+    for update in liveServer.take():
+        try:
+            applyLiveUpdate(update)
+        except Exception as error:
+            # An exception would unregister the timer and stop every later update
+            liveServer.report({'ERROR'}, "Live update of %s failed: %s" % (update.target, error))
+    return LIVE_STEP
+
+def applyLiveUpdate(update):
+    # Sync the target to the update, an Empty is created for a name no object has
+    with activeJob(ImportJob()), importTransaction(liveServer, "Live %s" % update.target):
+        document = update.document
+        subset, frames, bracket = importSubset()
+        if subset is not None or frames is not None:
+            document = keyframes.subsetDocument(document, subset, frames, bracket)
+        importJob.stats.channels += len(document.channels)
+        runSteps(importSteps(liveServer, document, lambda document: syncLiveTarget(update.target, document)))
+
+def syncLiveTarget(name, document):
+    target = bpy.data.objects.get(name)
+    if target is None:
+        target = linkTransformEmpty(name)
+    yield from applyTransformSteps(target, document, True)
+
+# WATCH THE CLIPBOARD
+#
+# A timer hands the clipboard to the watcher, which parses and converts new
+# Keyframe Data on a worker thread. Imports of the same text with the same
+# settings then only write the prepared tracks.
+
+# Seconds between clipboard checks
+WATCH_STEP = 0.5
+
+def watchClipboard():
+    # Timer callback running while the add-on is registered, idle while Watch Clipboard is off
+    global clipboardWatcher
+    if not bpy.context.scene.AE2Blend.AEWatch_property:
+        clipboardWatcher = None
+        return WATCH_STEP
+    if clipboardWatcher is None:
+        clipboardWatcher = watch.ClipboardWatcher()
+    payload = clipboardWatcher.prepared
+    clipboardWatcher.offer(bpy.context.window_manager.clipboard, cacheSettings())
+    if clipboardWatcher.prepared is not payload or (payload is not None and payload.ready and not payload.shown):
+        redrawPanels()
+    return WATCH_STEP
+
+def preparedClipboard():
+    # Document the watcher prepared for the clipboard and the current settings, or None
+    if clipboardWatcher is None:
+        return None
+    return clipboardWatcher.take(bpy.context.window_manager.clipboard, cacheSettings())
+
+def redrawPanels():
+    for window in bpy.context.window_manager.windows:
+        for area in window.screen.areas:
+            if area.type == 'VIEW_3D':
+                area.tag_redraw()
 
 # PANEL GUI CLASS
 
+# Residuals listed under a scale solve, worst first
+SOLVE_LINES = 8
+
 class AE2BlendPanel(bpy.types.Panel):
     """Copies Transform Keyframes from AfterEffects into Blender"""
     bl_label = "AE2Blend"
@@ -521,90 +1131,277 @@ class AE2BlendPanel(bpy.types.Panel):
 
     def draw(self, context):
         layout = self.layout
+        settings = context.scene.AE2Blend
         
         row = layout.row()
-        row.prop(context.scene, "AEScale_property", text = "Scale")
+        row.prop(settings, "AEScale_property", text = "Scale")
         
         row = layout.column(align=True)
         col = row.split(align=True)
         col.operator("object.ae_marker1_operator", text = "Marker 1")
         col.operator("object.ae_marker2_operator", text = "Marker 2")
-        row.prop(context.scene, "AEDist_property", text = "Distance")
+        row.prop(settings, "AEDist_property", text = "Distance")
         row.operator("object.ae_setscale_operator", text = "Calculate Scale")
         
+        row = layout.column(align=True)
+        row.operator("object.ae_solvescale_operator", text = "Solve Scale from Layers")
+        row.prop(settings, "AESolveRigid_property", text = "Solve Rotation and Offset")
+        if scaleSolve is not None:
+            col = layout.box().column(align=True)
+            col.label(text = "%d points, RMS error %.4g" % (len(scaleSolve.names), scaleSolve.rms))
+            for index in scaleSolve.residuals.argsort()[::-1][:SOLVE_LINES]:
+                col.label(text = "%s: %.4g" % (scaleSolve.names[index], scaleSolve.residuals[index]))
+        
         row = layout.row()
         row.label(text="Delta Rotation:")
         
         row = layout.row()
-        row.prop(context.scene, "AERotation_property", expand=True)
+        row.prop(settings, "AERotation_property", expand=True)
         
         row = layout.row()
         row.label(text="Starting Position:")
         
         row = layout.row()
-        row.prop(context.scene, "AEPosition_property", expand=True)
+        row.prop(settings, "AEPosition_property", expand=True)
         
         row = layout.row()
         row.label(text="Starting Frame:")
         
         row = layout.row()
-        row.prop(context.scene, "AEFrame_property", expand=True)
+        row.prop(settings, "AEFrame_property", expand=True)
+        
+        row = layout.row()
+        row.label(text="Frame Rate:")
+        
+        row = layout.row()
+        row.prop(settings, "AETiming_property", expand=True)
+        
+        row = layout.row()
+        row.label(text="Channels:")
+        
+        row = layout.column(align=True)
+        row.prop(settings, "AEChannels_property", expand=True)
+        
+        row = layout.column(align=True)
+        row.prop(settings, "AERange_property", text = "Frame Range")
+        if settings.AERange_property:
+            col = row.row(align=True)
+            col.prop(settings, "AERangeStart_property", text = "Start")
+            col.prop(settings, "AERangeEnd_property", text = "End")
+            row.prop(settings, "AEBracket_property", text = "Keep Boundary Keys")
         
         row = layout.row()
         row = layout.row()
         row.operator("object.ae_pointcloud_operator", text = "Create Pointcloud", icon = "GROUP_VERTEX")
+        row = layout.row()
+        row.prop(settings, "AEPointcloud_property", expand=True)
+        
+        
+        row = layout.column(align=True)
+        row.prop(settings, "AEDecimate_property", text = "Decimate Keys")
+        if settings.AEDecimate_property:
+            row.prop(settings, "AETolerance_property", text = "Tolerance")
+            row.prop(settings, "AEAngleTolerance_property", text = "Angle Tolerance")
+        
+        row = layout.column(align=True)
+        row.prop(settings, "AECache_property", text = "Keyframe Cache")
+        if settings.AECache_property:
+            row.prop(settings, "AECacheDir_property", text = "")
+            row.prop(settings, "AECacheSize_property", text = "Size (MB)")
         
+        row = layout.row()
+        row.prop(settings, "AEBatch_property", text = "One Object per Layer")
+        
+        row = layout.row()
+        row.prop(settings, "AEWatch_property", text = "Watch Clipboard")
+        if settings.AEWatch_property and clipboardWatcher is not None and clipboardWatcher.prepared is not None:
+            payload = clipboardWatcher.prepared
+            payload.shown = payload.ready
+            col = layout.box().column(align=True)
+            col.label(text = str(payload))
+            if payload.channels:
+                col.label(text = ", ".join(payload.channels))
         
         row = layout.column(align=True)
         row.operator("object.ae_empty_operator", text = "Create Empty", icon = "EMPTY_DATA")
         row.operator("object.ae_plane_operator", text = "Create Plane", icon = "MESH_PLANE")
         row.operator("object.ae_camera_operator", text = "Create Camera", icon = "CAMERA_DATA")
 
-        row = layout.row()
+        row = layout.column(align=True)
         row.operator("object.ae_pastekeys_operator", text = "Paste Keyframes", icon = "PASTEDOWN")
+        row.prop(settings, "AESharedAction_property", text = "Share One Action")
+        row.prop(settings, "AESync_property", text = "Sync Changed Keys")
+        
+        row = layout.row()
+        row.operator("import_anim.ae_keyframes", text = "Import Keyframe File", icon = "FILE_TEXT")
+        
+        row = layout.column(align=True)
+        row.label(text="Live Sync:")
+        col = row.row(align=True)
+        col.prop(settings, "AELivePort_property", text = "Port")
+        col.operator("object.ae_livesync_operator", text = "Stop" if liveServer is not None else "Listen", icon = "PAUSE" if liveServer is not None else "PLAY")
+        row.prop(settings, "AELiveSocket_property", text = "Socket")
+        if liveServer is not None:
+            col = layout.box().column(align=True)
+            col.label(text = str(liveServer))
+            for message in liveServer.messages:
+                col.label(text = message)
+        
+        row = layout.row()
+        row.label(text="Export:")
+        
+        row = layout.row()
+        row.prop(settings, "AEExportMode_property", expand=True)
+        
+        row = layout.column(align=True)
+        row.operator("object.ae_copykeys_operator", text = "Copy Keyframe Data", icon = "COPYDOWN")
+        row.operator("export_anim.ae_keyframes", text = "Export Keyframe File", icon = "FILE_TEXT")
+        
+        row = layout.row()
+        row.prop(settings, "AEShowStats_property", text = "Last Import", icon = 'TRIA_DOWN' if settings.AEShowStats_property else 'TRIA_RIGHT', emboss = False)
+        if settings.AEShowStats_property:
+            col = layout.box().column(align=True)
+            if lastStats.operation:
+                col.label(text = "%s: %.3fs" % (lastStats.operation, lastStats.seconds))
+                for line in lastStats.stageLines():
+                    col.label(text = line)
+                col.label(text = "%d keys, %d channels, %d objects" % (lastStats.keys, lastStats.channels, lastStats.objects))
+            else:
+                col.label(text = "No import yet")
+            col.prop(settings, "AEStatsLog_property", text = "Log to File")
+            if settings.AEStatsLog_property:
+                col.prop(settings, "AEStatsLogPath_property", text = "")
+
+# MODAL IMPORT
+
+# Seconds between timer events and seconds of import work per event
+TIMER_STEP = 0.02
+TIME_SLICE = 0.05
+
+# Progress bar range, parsing fills the first half
+PROGRESS_RANGE = 1000
+
+class ModalImport:
+    """Operator mixin running job() in time slices when started from the UI
+
+    Operators define job(context), returning the steps of their import.
+    Esc cancels the import and its journal puts back everything it changed.
+    execute() runs the whole job at once, for scripts and redo. The undo
+    step Blender pushes once it finishes holds the whole import.
+    """
+
+    def execute(self, context):
+        if runSteps(self.job(context)) is False:
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+    def invoke(self, context, event):
+        return self.startModal(context)
+
+    def startModal(self, context):
+        wm = context.window_manager
+        self.steps = self.job(context)
+        self.journal = journal.ImportJournal()
+        self.timer = wm.event_timer_add(TIMER_STEP, window = context.window)
+        wm.modal_handler_add(self)
+        wm.progress_begin(0, PROGRESS_RANGE)
+        return {'RUNNING_MODAL'}
+
+    def modal(self, context, event):
+        if event.type == 'ESC':
+            self.cancel(context)
+            self.report({'WARNING'}, "Import cancelled")
+            return {'CANCELLED'}
+        if event.type != 'TIMER':
+            return {'PASS_THROUGH'}
+        try:
+            step = self.runSlice()
+        except Exception as error:
+            self.cancel(context)
+            self.report({'ERROR'}, "Import failed: %s" % error)
+            return {'CANCELLED'}
+        if step is None:
+            self.finish(context)
+            return {'FINISHED'}
+        self.showProgress(context, *step)
+        return {'PASS_THROUGH'}
+
+    def runSlice(self):
+        # Take steps until the time slice is used up, None once the job is done
+        global importJournal
+        importJournal = self.journal
+        end = time.perf_counter() + TIME_SLICE
+        try:
+            while True:
+                step = next(self.steps)
+                if time.perf_counter() >= end:
+                    return step
+        except StopIteration:
+            return None
+        finally:
+            importJournal = None
+
+    def showProgress(self, context, status, done, total):
+        fraction = min(done / total, 1.0) if total else 1.0
+        progress = fraction / 2 if status == "Parsing" else 0.5 + fraction / 2
+        context.window_manager.progress_update(int(progress * PROGRESS_RANGE))
+        context.workspace.status_text_set("AE2Blend: %s %d%% (Esc to cancel)" % (status, fraction * 100))
+
+    def finish(self, context):
+        wm = context.window_manager
+        wm.event_timer_remove(self.timer)
+        wm.progress_end()
+        context.workspace.status_text_set(None)
+
+    def cancel(self, context):
+        # Also called by Blender when it ends the operator, for example on file load
+        self.steps.close()
+        self.journal.rollback()
+        self.finish(context)
 
 # OPERATOR CLASSES
 
-class A2BCreateEmptyOperator(bpy.types.Operator):
+class A2BCreateEmptyOperator(ModalImport, bpy.types.Operator):
     """Create Empty with Keyframe Data"""
     bl_idname = "object.ae_empty_operator"
     bl_label = "AE Create Empty Operator"
+    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
-        createEmptyAE(self)
-        return {'FINISHED'}
+    def job(self, context):
+        return clipboardJob(self, "Create Empty", createEmpty)
 
-class A2BCreatePlaneOperator(bpy.types.Operator):
+class A2BCreatePlaneOperator(ModalImport, bpy.types.Operator):
     """Create Plane with Keyframe Data"""
     bl_idname = "object.ae_plane_operator"
     bl_label = "AE Create Plane Operator"
+    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
-        createPlaneAE(self)
-        return {'FINISHED'}
+    def job(self, context):
+        return clipboardJob(self, "Create Plane", createPlane)
 
-class A2BCreateCameraOperator(bpy.types.Operator):
+class A2BCreateCameraOperator(ModalImport, bpy.types.Operator):
     """Create Camera with Keyframe Data"""
     bl_idname = "object.ae_camera_operator"
     bl_label = "AE Create Camera Operator"
+    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
-        createCameraAE(self)
-        return {'FINISHED'}
+    def job(self, context):
+        return clipboardJob(self, "Create Camera", createCamera)
 
-class A2BPasteAEFrameOperator(bpy.types.Operator):
+class A2BPasteAEFrameOperator(ModalImport, bpy.types.Operator):
     """Paste Keyframe Data to Selected Objects"""
     bl_idname = "object.ae_pastekeys_operator"
     bl_label = "AE Paste Keyframes Operator"
+    bl_options = {'REGISTER', 'UNDO'}
 
-    def execute(self, context):
-        pasteKeyframesAE(self)
-        return {'FINISHED'}
+    def job(self, context):
+        return clipboardJob(self, "Paste Keyframes", pasteKeyframes)
 
 class A2BSetMarker1Operator(bpy.types.Operator):
     """Set Values for Marker 1"""
     bl_idname = "object.ae_marker1_operator"
     bl_label = "AE Set Marker 1 Operator"
+    bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
         setMarker1AE(self)
@@ -614,6 +1411,7 @@ class A2BSetMarker2Operator(bpy.types.Operator):
     """Set Values for Marker 2"""
     bl_idname = "object.ae_marker2_operator"
     bl_label = "AE Set Marker 2 Operator"
+    bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
         setMarker2AE(self)
@@ -623,23 +1421,99 @@ class A2BSetScaleOperator(bpy.types.Operator):
     """Set Scale based on distance between Markers"""
     bl_idname = "object.ae_setscale_operator"
     bl_label = "AE Calculate Scale Operator"
+    bl_options = {'REGISTER', 'UNDO'}
 
     def execute(self, context):
         calculateScaleAE(self)
         return {'FINISHED'}
 
-class A2BCreatePointCloudOperator(bpy.types.Operator):
+class A2BSolveScaleOperator(bpy.types.Operator):
+    """Set Scale from a least-squares fit of the copied layers to the objects named like them"""
+    bl_idname = "object.ae_solvescale_operator"
+    bl_label = "AE Solve Scale Operator"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def execute(self, context):
+        solveScaleAE(self)
+        return {'FINISHED'}
+
+class A2BCreatePointCloudOperator(ModalImport, bpy.types.Operator):
     """Create Pointcloud from Keyframe Data"""
     bl_idname = "object.ae_pointcloud_operator"
     bl_label = "AE PointCloud Operator"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    def job(self, context):
+        return pointcloudJob(self)
+
+class A2BImportFileOperator(ImportHelper, ModalImport, bpy.types.Operator):
+    """Import Keyframe Data from an AfterEffects text file"""
+    bl_idname = "import_anim.ae_keyframes"
+    bl_label = "Import AE Keyframe File"
+    bl_options = {'REGISTER', 'UNDO'}
+
+    filename_ext = ".txt"
+    filter_glob: bpy.props.StringProperty(default = "*.txt", options = {'HIDDEN'})
+    target: bpy.props.EnumProperty(items = [('EMPTY', 'Empty', 'Create an Empty with the Keyframe Data'), ('PLANE', 'Plane', 'Create a Plane with the Keyframe Data'), ('CAMERA', 'Camera', 'Create a Camera with the Keyframe Data'), ('SELECTED', 'Selected', 'Paste the Keyframe Data to Selected Objects')], name = 'Target', default = 'EMPTY')
+
+    def job(self, context):
+        return fileJob(self, self.filepath, self.target)
+
+    def execute(self, context):
+        if self.options.is_invoke:
+            # Confirmed in the file browser, import in steps like the panel buttons
+            return self.startModal(context)
+        return ModalImport.execute(self, context)
+
+class A2BCopyKeyframesOperator(bpy.types.Operator):
+    """Copy the animation of the active object to the Clipboard as AfterEffects Keyframe Data"""
+    bl_idname = "object.ae_copykeys_operator"
+    bl_label = "AE Copy Keyframe Data Operator"
+
+    def execute(self, context):
+        if not exportKeyframesAE(self):
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+class A2BExportFileOperator(ExportHelper, bpy.types.Operator):
+    """Export the animation of the active object as an AfterEffects Keyframe Data text file"""
+    bl_idname = "export_anim.ae_keyframes"
+    bl_label = "Export AE Keyframe File"
+
+    filename_ext = ".txt"
+    filter_glob: bpy.props.StringProperty(default = "*.txt", options = {'HIDDEN'})
 
     def execute(self, context):
-        createPointcloudAE(self)
+        if not exportKeyframesAE(self, self.filepath):
+            return {'CANCELLED'}
         return {'FINISHED'}
 
+class A2BLiveSyncOperator(bpy.types.Operator):
+    """Start or stop listening for AfterEffects Keyframe Data on a local socket"""
+    bl_idname = "object.ae_livesync_operator"
+    bl_label = "AE Live Sync Operator"
+    # Stopping pushes one undo step for everything the session synced, no redo of the toggle
+    bl_options = {'UNDO'}
+
+    def execute(self, context):
+        if liveServer is not None:
+            stopLive()
+            self.report({'INFO'}, "Live Sync stopped")
+        elif not startLive(self):
+            return {'CANCELLED'}
+        return {'FINISHED'}
+
+def menuImportAE(self, context):
+    self.layout.operator(A2BImportFileOperator.bl_idname, text = "AfterEffects Keyframe Data (.txt)")
+
+def menuExportAE(self, context):
+    self.layout.operator(A2BExportFileOperator.bl_idname, text = "AfterEffects Keyframe Data (.txt)")
+
 # REGISTRATION
 
 def register():
+    bpy.utils.register_class(AE2BlendSettings)
+    bpy.types.Scene.AE2Blend = bpy.props.PointerProperty(type = AE2BlendSettings)
     bpy.utils.register_class(A2BCreateEmptyOperator)
     bpy.utils.register_class(A2BCreatePlaneOperator)
     bpy.utils.register_class(A2BCreateCameraOperator)
@@ -647,11 +1521,23 @@ def register():
     bpy.utils.register_class(A2BSetMarker1Operator)
     bpy.utils.register_class(A2BSetMarker2Operator)
     bpy.utils.register_class(A2BSetScaleOperator)
+    bpy.utils.register_class(A2BSolveScaleOperator)
     bpy.utils.register_class(A2BCreatePointCloudOperator)
+    bpy.utils.register_class(A2BImportFileOperator)
+    bpy.utils.register_class(A2BCopyKeyframesOperator)
+    bpy.utils.register_class(A2BExportFileOperator)
+    bpy.utils.register_class(A2BLiveSyncOperator)
     bpy.utils.register_class(AE2BlendPanel)
-    
+    bpy.types.TOPBAR_MT_file_import.append(menuImportAE)
+    bpy.types.TOPBAR_MT_file_export.append(menuExportAE)
+    bpy.app.timers.register(watchClipboard, first_interval = WATCH_STEP, persistent = True)
 
 def unregister():
+    global clipboardWatcher
+    stopLive()
+    if bpy.app.timers.is_registered(watchClipboard):
+        bpy.app.timers.unregister(watchClipboard)
+    clipboardWatcher = None
     bpy.utils.unregister_class(A2BCreateEmptyOperator)
     bpy.utils.unregister_class(A2BCreatePlaneOperator)
     bpy.utils.unregister_class(A2BCreateCameraOperator)
@@ -659,8 +1545,17 @@ def unregister():
     bpy.utils.unregister_class(A2BSetMarker1Operator)
     bpy.utils.unregister_class(A2BSetMarker2Operator)
     bpy.utils.unregister_class(A2BSetScaleOperator)
+    bpy.utils.unregister_class(A2BSolveScaleOperator)
     bpy.utils.unregister_class(A2BCreatePointCloudOperator)
+    bpy.utils.unregister_class(A2BImportFileOperator)
+    bpy.utils.unregister_class(A2BCopyKeyframesOperator)
+    bpy.utils.unregister_class(A2BExportFileOperator)
+    bpy.utils.unregister_class(A2BLiveSyncOperator)
     bpy.utils.unregister_class(AE2BlendPanel)
+    bpy.types.TOPBAR_MT_file_import.remove(menuImportAE)
+    bpy.types.TOPBAR_MT_file_export.remove(menuExportAE)
+    del bpy.types.Scene.AE2Blend
+    bpy.utils.unregister_class(AE2BlendSettings)
 
 if __name__ == "__main__":
     register()
@@ -0,0 +1,41 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+bl_info = {
+    "name": "AE2Blend",
+    "author": "Sam Maliszewski",
+    "version": (1, 4),
+    "blender": (2, 80, 0),
+    "location": "View3D",
+    "description": "Copy AfterEffects transform data directly into Blender",
+    "warning": "Version 1.4 - tested with AfterEffects CC 2018 and Blender 2.8",
+    "wiki_url": "",
+    "category": "Animation"}
+
+# The Blender side lives in AE2Blend_2_8 and is only imported on register,
+# so the parser modules can be imported without bpy.
+
+def register():
+    from . import AE2Blend_2_8
+    AE2Blend_2_8.register()
+
+def unregister():
+    from . import AE2Blend_2_8
+    AE2Blend_2_8.unregister()
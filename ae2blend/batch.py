@@ -0,0 +1,198 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Headless batch converter for folders of AfterEffects Keyframe Data files.
+#
+# Parsing and conversion run in a process pool and need no bpy. Inside
+# Blender the results are written as Actions (or Empties with Actions) to a
+# .blend library in one single threaded pass at the end:
+#
+#   python -m ae2blend.batch SHOTS/ --cache CACHE/
+#   blender --background --python ae2blend/batch.py -- SHOTS/ --output tracks.blend
+
+import argparse
+import fnmatch
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+if not __package__:
+    # Started as a script by blender --python, import through the package
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "ae2blend"
+
+from . import cache
+from . import decimate
+from . import keyframes
+
+try:
+    import bpy
+except ImportError:
+    bpy = None
+
+# FUNCTIONS
+
+def findFiles(directory, pattern):
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        for name in sorted(files):
+            if fnmatch.fnmatch(name, pattern):
+                paths.append(os.path.join(root, name))
+    return sorted(paths)
+
+def settingsFor(options):
+    return cache.cacheSettings(options.scale, options.rotation, options.timing, options.fps, options.tolerance is not None, options.tolerance, options.angle_tolerance)
+
+def convertFile(path, options):
+    """Parse and convert one file, runs in a worker process
+
+    Returns (path, content hash, document with tracks on every layer, error).
+    """
+    try:
+        contentHash = cache.fileHash(path)
+        document = keyframes.parseKeyframeFile(path)
+    except (OSError, keyframes.KeyframeDataError) as error:
+        return path, None, None, str(error)
+
+    cache.convertDocument(document, settingsFor(options), decimate.DecimationReport())
+    return path, contentHash, document, None
+
+def convertFiles(paths, options):
+    # Parse in a process pool, results come back in file order
+    if options.workers == 1 or len(paths) < 2:
+        return [convertFile(path, options) for path in paths]
+
+    context = None
+    if bpy is not None:
+        # Workers must be plain Python processes, not more Blender instances
+        context = multiprocessing.get_context('spawn')
+        context.set_executable(getattr(bpy.app, 'binary_path_python', sys.executable))
+    with ProcessPoolExecutor(options.workers, mp_context = context) as pool:
+        return list(pool.map(convertFile, paths, [options] * len(paths), chunksize = 4))
+
+def storeResults(results, options):
+    trackCache = cache.TrackCache(options.cache, options.cache_size * 1024 * 1024)
+    settings = settingsFor(options)
+    for path, contentHash, document, error in results:
+        if document is not None:
+            trackCache.store(cache.cacheKey(contentHash, settings), document)
+
+def writeBlend(results, options):
+    # Single threaded bpy stage, one Action per layer and optionally an Empty using it
+    from . import fcurves
+
+    datablocks = set()
+    for path, contentHash, document, error in results:
+        if document is None:
+            continue
+        stem = os.path.splitext(os.path.basename(path))[0]
+        collection = None
+        if options.objects:
+            collection = bpy.data.collections.new(stem)
+            datablocks.add(collection)
+
+        for layerNum, layer in enumerate(document.layers, 1):
+            name = stem
+            if len(document.layers) > 1:
+                name = "%s_%s" % (stem, layer.name or layerNum)
+            action = bpy.data.actions.new(name)
+            for track in layer.tracks:
+                if track.owner is not None:
+                    # Camera lens and effect points belong to other datablocks than the layer's Action
+                    continue
+                # An Action can't hold a plain value, so values without keyframes become one key
+                if track.isStatic:
+                    frames = [options.frame_offset]
+                else:
+                    frames = track.frames + options.frame_offset
+                fcurves.writeActionKeys(action, track.dataPath, frames, track.values.T, track.indices, track.interpolation)
+            datablocks.add(action)
+
+            if collection is not None:
+                target = bpy.data.objects.new(name, None)
+                target.empty_display_type = 'PLAIN_AXES'
+                if any(track.isRotation for track in layer.tracks):
+                    target.rotation_mode = 'YZX'
+                target.animation_data_create().action = action
+                collection.objects.link(target)
+
+    bpy.data.libraries.write(options.output, datablocks, fake_user = True)
+
+def parseArguments(argv):
+    parser = argparse.ArgumentParser(prog = "ae2blend.batch", description = "Convert a folder of AfterEffects Keyframe Data files")
+    parser.add_argument("directory", help = "folder searched recursively for keyframe files")
+    parser.add_argument("--pattern", default = "*.txt", help = "file name pattern (default *.txt)")
+    parser.add_argument("--cache", help = "write the converted tracks to this keyframe cache folder")
+    parser.add_argument("--cache-size", type = int, default = 512, help = "cache size limit in MB (default 512)")
+    parser.add_argument("--output", help = ".blend library to write, only when run inside Blender")
+    parser.add_argument("--objects", action = "store_true", help = "also create an Empty per layer, grouped in a collection per file")
+    parser.add_argument("--scale", type = float, default = 100, help = "AE2Blend scale value (default 100)")
+    parser.add_argument("--rotation", choices = ('Orientation', 'XYZ'), default = 'Orientation', help = "which rotation goes to delta rotation")
+    parser.add_argument("--frame-offset", type = float, default = 0, help = "frames added to every key")
+    parser.add_argument("--timing", choices = ('Source', 'Retime', 'Resample'), default = 'Source', help = "frame rate handling")
+    parser.add_argument("--fps", type = float, help = "target frame rate, defaults to the scene frame rate in Blender")
+    parser.add_argument("--tolerance", type = float, help = "decimate keys with this tolerance in Blender units")
+    parser.add_argument("--angle-tolerance", type = float, default = 0.1, help = "decimation tolerance for rotations in degrees")
+    parser.add_argument("--workers", type = int, default = os.cpu_count(), help = "parser processes (default one per CPU)")
+    return parser.parse_args(argv)
+
+def main(argv = None):
+    if argv is None:
+        argv = sys.argv[1:]
+        if bpy is not None:
+            # Blender passes the script its own arguments after --
+            argv = sys.argv[sys.argv.index("--") + 1:] if "--" in sys.argv else []
+    options = parseArguments(argv)
+
+    if options.output and bpy is None:
+        print("--output needs Blender: blender --background --python ae2blend/batch.py -- ...", file = sys.stderr)
+        return 2
+    if not options.output and not options.cache:
+        print("Nothing to write, give --cache and/or --output", file = sys.stderr)
+        return 2
+    if options.fps is None and bpy is not None:
+        scene = bpy.context.scene
+        options.fps = scene.render.fps / scene.render.fps_base
+
+    start = time.perf_counter()
+    paths = findFiles(options.directory, options.pattern)
+    results = convertFiles(paths, options)
+    parsed = time.perf_counter()
+
+    failed = 0
+    for path, contentHash, document, error in results:
+        if error is not None:
+            failed += 1
+            print("%s: %s" % (path, error), file = sys.stderr)
+
+    if options.cache:
+        storeResults(results, options)
+    if options.output:
+        writeBlend(results, options)
+
+    print("Converted %d of %d files in %.2fs (parsing %.2fs)" % (len(paths) - failed, len(paths), time.perf_counter() - start, parsed - start))
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    status = main()
+    if bpy is None or bpy.app.background:
+        sys.exit(status)
@@ -0,0 +1,268 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# On-disk cache of parsed and converted keyframe data. No bpy import here.
+#
+# One file per entry: an 8 byte magic, the JSON index length as a little
+# endian uint64, the JSON index padded to 8 bytes, then every array as
+# contiguous little endian float64. The index stores the layers with their
+# channels and converted tracks, each array as [offset, length] in floats.
+# Arrays are read back through a memory map, nothing is parsed again.
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+
+import numpy as np
+
+from . import convert
+from . import decimate
+from . import keyframes
+
+MAGIC = b"AE2BCv03"
+EXTENSION = ".ae2b"
+
+# KEYS
+
+def textHash(text):
+    return hashlib.sha256(text.encode("utf-8", "surrogatepass")).hexdigest()
+
+def fileHash(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size:
+            with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+                digest.update(data)
+    return digest.hexdigest()
+
+def cacheSettings(scale, rotation, timing, fps, decimate, tolerance, angleTolerance):
+    # Everything converted tracks depend on, the add-on and the batch converter build the same dict.
+    # Numbers are floats and settings the tracks don't depend on are None, so both get the same key.
+    # The cursor and the playhead are left out, tracks are placed on them when they are written
+    decimate = bool(decimate)
+    return {
+        'scale': float(scale),
+        'rotation': rotation,
+        'timing': timing,
+        # Source timing keeps AfterEffects frame numbers whatever the frame rate
+        'fps': float(fps) if timing != 'Source' and fps else None,
+        'decimate': decimate,
+        'tolerance': float(tolerance) if decimate else None,
+        'angleTolerance': float(angleTolerance) if decimate else None}
+
+def convertDocument(document, settings, report = None):
+    """Convert every layer of a document into layer.tracks with cacheSettings settings
+
+    Needs no bpy, so the batch converter and background threads use it.
+    report is a DecimationReport for the keys decimation removes, it is
+    kept as document.decimation so it can be cached and reported later.
+    """
+    if settings['decimate'] and report is not None:
+        document.decimation = report
+    for layer in document.layers:
+        timeScale = convert.timeScaleFor(layer.unitsPerSecond, settings['fps'], settings['timing'])
+        tracks = convert.convertChannels(layer.channels, settings['scale'], settings['rotation'], timeScale = timeScale, resample = settings['timing'] == 'Resample', sourceWidth = layer.sourceWidth)
+        if settings['decimate']:
+            tracks = [decimate.decimateTrack(track, settings['tolerance'], settings['angleTolerance'], report) for track in tracks]
+        layer.tracks = tracks
+    return document
+
+def normalize(value):
+    # Blender float properties are single precision, round so the keys match plain Python values
+    if isinstance(value, float):
+        return float("%.6g" % value)
+    if isinstance(value, (list, tuple)):
+        return [normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: normalize(item) for key, item in value.items()}
+    return value
+
+def cacheKey(contentHash, settings):
+    """Key of a source hash plus the settings its tracks were converted with"""
+    digest = hashlib.sha256(contentHash.encode("ascii"))
+    digest.update(json.dumps(normalize(settings), sort_keys = True).encode("utf-8"))
+    return digest.hexdigest()
+
+# CACHE
+
+class TrackCache:
+    """Directory of cache entries, least recently used entries are removed past maxBytes"""
+
+    def __init__(self, directory, maxBytes):
+        self.directory = directory
+        self.maxBytes = maxBytes
+
+    def path(self, key):
+        return os.path.join(self.directory, key + EXTENSION)
+
+    def load(self, key):
+        """The cached KeyframeDocument for key, or None"""
+        path = self.path(key)
+        try:
+            document = readDocument(path)
+            # Mark the entry as recently used
+            os.utime(path)
+        except (OSError, ValueError, KeyError, struct.error):
+            # Missing, from an older version or cut short, parse again
+            return None
+        return document
+
+    def store(self, key, document):
+        os.makedirs(self.directory, exist_ok = True)
+        path = self.path(key)
+        writeDocument(path, document)
+        self.evict(keep = path)
+
+    def entries(self):
+        # (last use, size, path) of every entry, oldest first
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return entries
+        for name in names:
+            if name.endswith(EXTENSION):
+                path = os.path.join(self.directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, path))
+        entries.sort()
+        return entries
+
+    def evict(self, keep = None):
+        entries = self.entries()
+        total = sum(size for mtime, size, path in entries)
+        for mtime, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                # Still mapped by another import, try again next time
+                continue
+            total -= size
+
+    def clear(self):
+        for mtime, size, path in self.entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# FILE FORMAT
+
+def writeDocument(path, document):
+    arrays = []
+    offset = [0]
+
+    def addArray(values):
+        if values is None:
+            return None
+        values = np.ascontiguousarray(values, dtype = "<f8").ravel()
+        arrays.append(values)
+        entry = [offset[0], len(values)]
+        offset[0] += len(values)
+        return entry
+
+    layers = []
+    for layer in document.layers:
+        channels = []
+        for channel in layer.channels:
+            channels.append({
+                "group": channel.group,
+                "name": channel.name,
+                "width": channel.width,
+                "frames": addArray(channel.frames),
+                "values": addArray(channel.values)})
+        tracks = None
+        if layer.tracks is not None:
+            tracks = []
+            for track in layer.tracks:
+                tracks.append({
+                    "dataPath": track.dataPath,
+                    "indices": list(track.indices),
+                    "interpolation": track.interpolation,
+                    "owner": track.owner,
+                    "frames": addArray(track.frames),
+                    "values": addArray(track.values)})
+        layers.append({"name": layer.name, "header": layer.header, "channels": channels, "tracks": tracks})
+
+    decimation = vars(document.decimation) if document.decimation is not None else None
+    index = json.dumps({"layers": layers, "decimation": decimation}).encode("utf-8")
+    index += b" " * (-len(index) % 8)
+
+    # Write next to the entry and rename, a crashed write never leaves a broken entry
+    temp = path + ".tmp%d" % os.getpid()
+    with open(temp, "wb") as file:
+        file.write(MAGIC)
+        file.write(struct.pack("<Q", len(index)))
+        file.write(index)
+        for values in arrays:
+            values.tofile(file)
+    os.replace(temp, path)
+
+def readDocument(path):
+    with open(path, "rb") as file:
+        if file.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not an AE2Blend cache file")
+        indexLength, = struct.unpack("<Q", file.read(8))
+        index = json.loads(file.read(indexLength).decode("utf-8"))
+        dataStart = file.tell()
+        dataSize = os.fstat(file.fileno()).st_size - dataStart
+
+    data = np.zeros(0)
+    if dataSize:
+        data = np.memmap(path, dtype = "<f8", mode = "r", offset = dataStart)
+
+    def getArray(entry):
+        # A view into the memory map, pages are only read when used
+        if entry is None:
+            return None
+        start, length = entry
+        values = data[start:start + length]
+        if len(values) != length:
+            raise ValueError("Cache entry is cut short")
+        return values
+
+    document = keyframes.KeyframeDocument()
+    for layerIndex in index["layers"]:
+        layer = keyframes.KeyframeLayer(layerIndex["name"], layerIndex["header"])
+        for channelIndex in layerIndex["channels"]:
+            channel = keyframes.KeyframeChannel(channelIndex["group"], channelIndex["name"], channelIndex["width"])
+            channel.frames = getArray(channelIndex["frames"])
+            channel.values = getArray(channelIndex["values"])
+            layer.channels.append(channel)
+        if layerIndex["tracks"] is not None:
+            layer.tracks = []
+            for trackIndex in layerIndex["tracks"]:
+                indices = trackIndex["indices"]
+                track = convert.Track(trackIndex["dataPath"], indices, getArray(trackIndex["frames"]), getArray(trackIndex["values"]).reshape(-1, len(indices)), trackIndex["owner"])
+                track.interpolation = trackIndex["interpolation"]
+                layer.tracks.append(track)
+        document.layers.append(layer)
+    if index["decimation"] is not None:
+        document.decimation = decimate.DecimationReport(**index["decimation"])
+    return document
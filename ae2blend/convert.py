@@ -0,0 +1,384 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# AfterEffects to Blender conversions on whole channels at once. Every
+# function takes and returns NumPy arrays with one row per keyframe, the
+# results can go straight into fcurves.writeKeys. No bpy import here.
+
+import math
+import re
+import zlib
+from array import array
+import numpy as np
+
+# FUNCTIONS
+
+def channelFrames(channel, frameOffset = 0):
+    # Frame numbers of a channel as an array, shifted by frameOffset
+    return np.frombuffer(channel.frames, dtype = np.float64) + frameOffset
+
+def channelValues(channel):
+    # Values of a channel as an (keys, width) array, shares memory with the channel
+    return np.frombuffer(channel.values, dtype = np.float64).reshape(-1, channel.width)
+
+def swapAxes(values, default = 0.0):
+    # AfterEffects X, Y, Z columns in Blender order X, Z, Y, 2D layers get default as Z
+    values = np.asarray(values, dtype = np.float64)
+    result = np.full((len(values), 3), default)
+    result[:, 0] = values[:, 0]
+    if values.shape[1] >= 3:
+        result[:, 1] = values[:, 2]
+    result[:, 2] = values[:, 1]
+    return result
+
+def convertPosition(values, scale, cursor = None):
+    # Negate and scale down, with a cursor the first key lands on the cursor
+    location = swapAxes(values) / -scale
+    if cursor is not None and len(location):
+        location += np.asarray(cursor, dtype = np.float64) - location[0]
+    return location
+
+def convertScale(values, scale):
+    return swapAxes(values, 100.0) / scale
+
+def convertRotation(degrees):
+    # Single axis rotation in degrees to Blender radians
+    return np.radians(-np.asarray(degrees, dtype = np.float64))
+
+def unwrapDegrees(degrees):
+    """Add multiples of 360 so no step between keys is more than 180 degrees
+
+    Same result as stepping through the keys with a running offset: every
+    jump above 180 (measured from 0 for the first key) shifts this and all
+    later keys by -360, every jump below -180 by +360.
+    """
+    degrees = np.asarray(degrees, dtype = np.float64)
+    if len(degrees) == 0:
+        return degrees.copy()
+    steps = np.diff(degrees, axis = 0, prepend = np.zeros((1,) + degrees.shape[1:]))
+    corrections = np.where(steps > 180, -360.0, np.where(steps < -180, 360.0, 0.0))
+    return degrees + np.cumsum(corrections, axis = 0)
+
+def convertOrientation(values, unwrap = True):
+    rotation = swapAxes(values)
+    if unwrap:
+        rotation = unwrapDegrees(rotation)
+    return np.radians(-rotation)
+
+# Film size of AfterEffects cameras and sensor width of Blender cameras in mm
+FILM_SIZE = 36.0
+
+def convertZoom(values, sourceWidth):
+    # Camera Zoom in pixels to focal length in mm, for a film size measured horizontally
+    return np.asarray(values, dtype = np.float64) * FILM_SIZE / sourceWidth
+
+# TRACKS
+
+# Blender rotation axis for each single axis AfterEffects rotation (AE Y and Z are swapped)
+ROTATION_INDEX = {"X Rotation": 0, "Rotation": 1, "Z Rotation": 1, "Y Rotation": 2}
+
+# Track owner for properties of the object data, like the lens of a camera
+DATA = 'DATA'
+
+class Track:
+    """Converted keys of one Blender property, ready for the F-Curve writer"""
+
+    def __init__(self, dataPath, indices, frames, values, owner = None):
+        self.dataPath = dataPath
+        self.indices = tuple(indices)
+        # Blender frames, or None when the property value is only set
+        self.frames = frames
+        # One row per key, one column per index
+        self.values = values
+        self.interpolation = 'BEZIER'
+        # None for the object, DATA for its data, or the name of an effect point getting its own Empty
+        self.owner = owner
+
+    @property
+    def isStatic(self):
+        return self.frames is None
+
+    @property
+    def isRotation(self):
+        return self.dataPath in ('rotation_euler', 'delta_rotation_euler')
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return "<Track %s%s: %d keys%s>" % (self.dataPath, list(self.indices), len(self), " static" if self.isStatic else "")
+
+def rotationPath(rotation, deltaMode):
+    # Rotations go to delta rotation when the Delta Rotation setting matches
+    if rotation == deltaMode:
+        return 'delta_rotation_euler'
+    return 'rotation_euler'
+
+def timeScaleFor(unitsPerSecond, fps, timing):
+    # Scene frames per AfterEffects frame, 1 when frame numbers are used as they are
+    if timing == 'Source' or not isinstance(unitsPerSecond, float) or unitsPerSecond <= 0 or not fps:
+        return 1.0
+    return fps / unitsPerSecond
+
+def resampleKeys(frames, values):
+    """Interpolate keys onto every whole frame between the first and last key"""
+    grid = np.arange(math.ceil(frames[0]), math.floor(frames[-1]) + 1, dtype = np.float64)
+    if len(grid) == 0:
+        grid = np.array([round(frames[0])], dtype = np.float64)
+    resampled = np.empty((len(grid), values.shape[1]))
+    for column in range(values.shape[1]):
+        resampled[:, column] = np.interp(grid, frames, values[:, column])
+    return grid, resampled
+
+# SECTIONS
+#
+# Every section AfterEffects writes that converts to a Track, keyed by its
+# header with the "#1" numbers of effects and their properties removed. A
+# decoder gets the channel, its (keys, width) values, its Blender frames and
+# the conversion settings, and returns a Track or None when it can't convert.
+
+class Section:
+    """Decoder and column layout of one kind of section"""
+
+    def __init__(self, decode, columns):
+        self.decode = decode
+        # Values per row AfterEffects writes, fewer are allowed for 2D layers
+        self.columns = columns
+
+def decodePosition(channel, values, frames, settings):
+    # The cursor is applied by placeTrack
+    return Track('location', range(3), frames, convertPosition(values, settings['scale']))
+
+def decodeScale(channel, values, frames, settings):
+    return Track('scale', range(3), frames, convertScale(values, settings['scale']))
+
+def decodeOrientation(channel, values, frames, settings):
+    # Unwrapped so a key never turns more than 180 degrees from the last one
+    return Track(rotationPath(settings['rotation'], "Orientation"), range(3), frames, convertOrientation(values, not channel.isStatic))
+
+def decodeRotation(channel, values, frames, settings):
+    # AfterEffect's 2D rotation/Z Axis and X/Y Axis, only the one axis is keyed
+    return Track(rotationPath(settings['rotation'], "XYZ"), (ROTATION_INDEX[channel.name],), frames, convertRotation(values))
+
+def decodeZoom(channel, values, frames, settings):
+    # Zoom is relative to the comp width, without it there is no focal length
+    if not isinstance(settings['sourceWidth'], float) or settings['sourceWidth'] <= 0:
+        return None
+    return Track('lens', (0,), frames, convertZoom(values[:, :1], settings['sourceWidth']), DATA)
+
+def decodePoint(channel, values, frames, settings):
+    # Effect points are comp positions of their own, named after the effect and point
+    effect = channel.group.split("\t")[-1]
+    name = "%s %s" % (stripNumber(effect), stripNumber(channel.name))
+    return Track('location', range(3), frames, convertPosition(values, settings['scale']), name)
+
+SECTIONS = {
+    ("Transform", "Position"): Section(decodePosition, 3),
+    ("Transform", "Scale"): Section(decodeScale, 3),
+    ("Transform", "Orientation"): Section(decodeOrientation, 3),
+    ("Transform", "X Rotation"): Section(decodeRotation, 1),
+    ("Transform", "Y Rotation"): Section(decodeRotation, 1),
+    ("Transform", "Z Rotation"): Section(decodeRotation, 1),
+    ("Transform", "Rotation"): Section(decodeRotation, 1),
+    ("Camera Options", "Zoom"): Section(decodeZoom, 1),
+    ("Effects", "Corner Pin", "Upper Left"): Section(decodePoint, 2),
+    ("Effects", "Corner Pin", "Upper Right"): Section(decodePoint, 2),
+    ("Effects", "Corner Pin", "Lower Left"): Section(decodePoint, 2),
+    ("Effects", "Corner Pin", "Lower Right"): Section(decodePoint, 2),
+    ("Effects", "Point Control", "Point"): Section(decodePoint, 2)}
+
+# " #2" AfterEffects adds to effect and property names
+NUMBER = re.compile(r"\s+#\d+$")
+
+def stripNumber(name):
+    return NUMBER.sub("", name)
+
+def sectionKey(channel):
+    # Key of a channel in SECTIONS, the group holds the effect name for effect properties
+    return tuple(stripNumber(field) for field in channel.group.split("\t")) + (stripNumber(channel.name),)
+
+def unknownSections(channels):
+    """Names of the sections of channels no decoder converts, in order"""
+    names = []
+    for channel in channels:
+        if sectionKey(channel) not in SECTIONS:
+            name = " ".join(channel.group.split("\t") + [channel.name])
+            if name not in names:
+                names.append(name)
+    return names
+
+def convertChannels(channels, scale, rotation = 'Orientation', cursor = None, frameOffset = 0, timeScale = 1.0, resample = False, sourceWidth = None):
+    """Convert the channels of a document or layer into Tracks
+
+    rotation is the Delta Rotation setting ('Orientation' or 'XYZ') and
+    cursor the start location for Cursor mode, None to match the source.
+    AfterEffects frames are multiplied by timeScale (scene fps over the
+    source Units Per Second), resample puts the keys on whole frames.
+    sourceWidth is the comp width Camera Zoom is relative to. Sections
+    not in SECTIONS are left out, unknownSections names them.
+    """
+    settings = {'scale': scale, 'rotation': rotation, 'sourceWidth': sourceWidth}
+    tracks = []
+    for channel in channels:
+        section = SECTIONS.get(sectionKey(channel))
+        if section is None or len(channel) == 0 or channel.width > section.columns:
+            continue
+        frames = None
+        if not channel.isStatic:
+            frames = channelFrames(channel) * timeScale
+        track = section.decode(channel, channelValues(channel), frames, settings)
+        if track is not None:
+            tracks.append(track)
+
+    if resample:
+        # Resampled after converting, so unwrapped rotations interpolate the short way
+        for track in tracks:
+            if not track.isStatic:
+                track.frames, track.values = resampleKeys(track.frames, track.values)
+    if cursor is not None or frameOffset:
+        tracks = [placeTrack(track, cursor, frameOffset) for track in tracks]
+    return tracks
+
+def placeTrack(track, cursor = None, frameOffset = 0):
+    """Track with its keys moved by frameOffset, and with a cursor its location keys moved to start on it
+
+    Only keyed location of the object itself follows the cursor. Converted
+    tracks don't depend on either, so cached ones are placed when written.
+    The track itself is left as it is, a new one is returned when it moves.
+    """
+    moves = track.dataPath == 'location' and track.owner is None and cursor is not None
+    if track.isStatic or (not moves and not frameOffset):
+        return track
+    values = track.values
+    if moves:
+        values = values + (np.asarray(cursor, dtype = np.float64) - values[0])
+    placed = Track(track.dataPath, track.indices, track.frames + frameOffset, values, track.owner)
+    placed.interpolation = track.interpolation
+    return placed
+
+# POINT CLOUDS
+
+def layerHash(name):
+    # Stable signed 32 bit hash of a layer name, fits a Blender integer attribute
+    value = zlib.crc32((name or "").encode("utf-8"))
+    return value - (1 << 32) if value >= (1 << 31) else value
+
+def pointCloud(layers, scale, perLayer = False):
+    """Points of the Position channels of every layer, with per point attributes
+
+    Every key becomes a point, or with perLayer only the first key (or the
+    value) of each layer. Returns (positions, layer index, layer name hash,
+    frame) arrays, positions with one (x, y, z) row per point.
+    """
+    # Raw values are appended to flat buffers and the per layer attributes expanded
+    # once at the end, a camera tracker export has tens of thousands of single point layers
+    values = array('d')
+    frames = array('d')
+    counts = []
+    layerIndices = []
+    hashes = []
+    for layerIndex, layer in enumerate(layers):
+        for channel in layer.channels:
+            if channel.name != "Position" or channel.group != "Transform" or len(channel.values) == 0:
+                continue
+            count = 1 if perLayer or channel.isStatic else len(channel.frames)
+            rows = channel.values
+            if len(rows) > count * channel.width:
+                rows = rows[:count * channel.width]
+            if channel.width != 3:
+                # 2D layer, Z is 0
+                rows = np.zeros((count, 3))
+                rows[:, :min(channel.width, 3)] = channelValues(channel)[:count, :3]
+            values.frombytes(memoryview(rows).cast('B'))
+            if channel.isStatic:
+                frames.append(0.0)
+            else:
+                frames.frombytes(memoryview(channel.frames[:count] if perLayer else channel.frames).cast('B'))
+            counts.append(count)
+            layerIndices.append(layerIndex)
+            hashes.append(layerHash(layer.name))
+
+    positions = convertPosition(np.frombuffer(values, dtype = np.float64).reshape(-1, 3), scale)
+    return (
+        positions,
+        np.repeat(np.array(layerIndices, dtype = np.int32), counts),
+        np.repeat(np.array(hashes, dtype = np.int32), counts),
+        np.frombuffer(frames, dtype = np.float64))
+
+# EXPORT
+#
+# Blender transforms back to AfterEffects values, the inverse of the
+# conversions above.
+
+# Rotation of the camera under its transform empty in a created camera rig, Blender XYZ order
+CAMERA_ROTATION = (math.radians(-90), math.radians(180), 0.0)
+
+def axisMatrices(axis, angles):
+    # (n, 3, 3) rotations by angles in radians about the X, Y or Z axis (0, 1, 2)
+    angles = np.asarray(angles, dtype = np.float64)
+    cos, sin = np.cos(angles), np.sin(angles)
+    i, j = ((1, 2), (2, 0), (0, 1))[axis]
+    result = np.zeros((len(angles), 3, 3))
+    result[:, axis, axis] = 1.0
+    result[:, i, i] = cos
+    result[:, j, j] = cos
+    result[:, i, j] = -sin
+    result[:, j, i] = sin
+    return result
+
+def eulerMatrices(angles, order = 'XYZ'):
+    """(n, 3, 3) rotation matrices of (n, 3) Euler angles in radians
+
+    order is a Blender rotation mode such as 'XYZ', its first axis turns first.
+    """
+    angles = np.asarray(angles, dtype = np.float64).reshape(-1, 3)
+    result = np.broadcast_to(np.identity(3), (len(angles), 3, 3))
+    for axis in order:
+        index = "XYZ".index(axis)
+        result = axisMatrices(index, angles[:, index]) @ result
+    return result
+
+def matricesToEulerYZX(matrices):
+    # Euler angles in the YZX rotation mode imports set, one row per matrix
+    m = np.asarray(matrices, dtype = np.float64)
+    x = np.arctan2(m[:, 2, 1], m[:, 1, 1])
+    y = np.arctan2(m[:, 0, 2], m[:, 0, 0])
+    z = np.arctan2(-m[:, 0, 1], np.hypot(m[:, 0, 0], m[:, 0, 2]))
+    return np.stack((x, y, z), axis = 1)
+
+def exportChannels(location, rotation, scaleValues, scale, camera = False):
+    """AfterEffects (channel name, values) pairs of Blender transforms
+
+    location and scaleValues are (keys, 3) arrays and rotation (keys, 3, 3)
+    matrices. A camera is turned back into the transform empty of a camera
+    rig, and gets no Scale. Rotations become X, Y and Z Rotation in the
+    order imports read them, unwrapped so no key turns the long way.
+    """
+    rotation = np.asarray(rotation, dtype = np.float64)
+    if camera:
+        rotation = rotation @ eulerMatrices(CAMERA_ROTATION)[0].T
+    degrees = -np.degrees(np.unwrap(matricesToEulerYZX(rotation), axis = 0))
+    channels = [("Position", swapAxes(np.asarray(location) * -scale))]
+    if not camera:
+        channels.append(("Scale", swapAxes(scaleValues) * scale))
+    channels.append(("X Rotation", degrees[:, 0:1]))
+    channels.append(("Y Rotation", degrees[:, 2:3]))
+    channels.append(("Rotation", degrees[:, 1:2]))
+    return channels
@@ -0,0 +1,116 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Keyframe reduction for dense tracking data. Keys are dropped with
+# Ramer-Douglas-Peucker when linear interpolation between the remaining keys
+# rebuilds them within a tolerance. No bpy import here.
+
+import math
+import numpy as np
+
+from . import convert
+
+# REPORT
+
+class DecimationReport:
+    """Keys removed by decimation over one import"""
+
+    def __init__(self, total = 0, removed = 0, maxError = 0.0, maxAngleError = 0.0):
+        self.total = total
+        self.removed = removed
+        # Largest error in Blender units and in degrees for rotations
+        self.maxError = maxError
+        self.maxAngleError = maxAngleError
+
+    def add(self, before, after, error, isRotation):
+        self.total += before
+        self.removed += before - after
+        if isRotation:
+            self.maxAngleError = max(self.maxAngleError, math.degrees(error))
+        else:
+            self.maxError = max(self.maxError, error)
+
+    def merge(self, other):
+        # Add the counts of a report made when the tracks were converted, for example before they were cached
+        self.total += other.total
+        self.removed += other.removed
+        self.maxError = max(self.maxError, other.maxError)
+        self.maxAngleError = max(self.maxAngleError, other.maxAngleError)
+
+    def __str__(self):
+        return "Decimation removed %d of %d keys (max error %.4g units, %.4g degrees)" % (self.removed, self.total, self.maxError, self.maxAngleError)
+
+# FUNCTIONS
+
+def simplifyKeys(frames, values, tolerance):
+    """Mask of the keys to keep so no dropped key is further than tolerance
+
+    values has one row per key, the error of a key is its largest distance
+    on any column from the straight line between the kept keys around it.
+    """
+    frames = np.asarray(frames, dtype = np.float64)
+    values = np.asarray(values, dtype = np.float64).reshape(len(frames), -1)
+    count = len(frames)
+    keep = np.zeros(count, dtype = bool)
+    if count <= 2:
+        keep[:] = True
+        return keep
+
+    keep[0] = keep[-1] = True
+    stack = [(0, count - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        span = max(frames[last] - frames[first], 1e-12)
+        t = (frames[first + 1:last] - frames[first]) / span
+        line = values[first] + np.outer(t, values[last] - values[first])
+        error = np.abs(values[first + 1:last] - line).max(axis = 1)
+        worst = int(np.argmax(error))
+        if error[worst] > tolerance:
+            split = first + 1 + worst
+            keep[split] = True
+            stack.append((first, split))
+            stack.append((split, last))
+    return keep
+
+def linearError(frames, values, keep):
+    # Largest difference between the keys and linear interpolation of the kept keys
+    error = 0.0
+    for column in range(values.shape[1]):
+        rebuilt = np.interp(frames, frames[keep], values[keep, column])
+        error = max(error, float(np.abs(rebuilt - values[:, column]).max()))
+    return error
+
+def decimateTrack(track, tolerance, angleTolerance, report = None):
+    """Return track with the keys linear interpolation can rebuild removed
+
+    tolerance is in Blender units, angleTolerance in degrees for rotations.
+    The result uses linear interpolation so the reported error holds.
+    """
+    if track.isStatic or len(track) <= 2:
+        return track
+    limit = math.radians(angleTolerance) if track.isRotation else tolerance
+    keep = simplifyKeys(track.frames, track.values, limit)
+    result = convert.Track(track.dataPath, track.indices, track.frames[keep], track.values[keep], track.owner)
+    result.interpolation = 'LINEAR'
+    if report is not None:
+        report.add(len(track), len(result), linearError(track.frames, track.values, keep), track.isRotation)
+    return result
@@ -0,0 +1,297 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Bulk F-Curve writer. Keys are allocated with one keyframe_points.add() call
+# and filled with foreach_set, instead of one keyframe_insert() per key.
+
+import bpy
+import numpy as np
+
+# Blender's keyframe interpolation enum values, foreach_set takes them as ints
+INTERPOLATION = {'CONSTANT': 0, 'LINEAR': 1, 'BEZIER': 2}
+
+# Same group keyframe_insert uses for object transforms
+GROUP = "Object Transforms"
+
+# NLA track used to offset a shared Action
+NLA_TRACK = "AE2Blend"
+
+# Keyframe point attributes readKeys saves, with their values per key and type
+KEY_ATTRIBUTES = (
+    ('co', 2, np.float32),
+    ('handle_left', 2, np.float32),
+    ('handle_right', 2, np.float32),
+    ('handle_left_type', 1, np.int32),
+    ('handle_right_type', 1, np.int32),
+    ('interpolation', 1, np.int32))
+
+# FUNCTIONS
+
+def ensureAction(target, name = None):
+    # Reuse the object's Action or create a new one
+    animData = target.animation_data
+    if animData is None:
+        animData = target.animation_data_create()
+    if animData.action is None:
+        animData.action = bpy.data.actions.new(name or target.name + "Action")
+    return animData.action
+
+def findFCurve(action, dataPath, index, group = GROUP):
+    fcurve = action.fcurves.find(dataPath, index = index)
+    if fcurve is None:
+        fcurve = action.fcurves.new(dataPath, index = index, action_group = group)
+    return fcurve
+
+def writeFCurve(action, dataPath, index, frames, values, interpolation = 'BEZIER', group = GROUP):
+    """Write keys to one F-Curve in bulk, returns the number of keys written"""
+    frames = np.asarray(frames, dtype = np.float32)
+    values = np.asarray(values, dtype = np.float32)
+    count = len(frames)
+    if count == 0:
+        return 0
+
+    fcurve = findFCurve(action, dataPath, index, group)
+    points = fcurve.keyframe_points
+    if len(points):
+        mergeKeys(fcurve, frames, values, INTERPOLATION[interpolation])
+    else:
+        points.add(count)
+        co = np.empty(2 * count, dtype = np.float32)
+        co[0::2] = frames
+        co[1::2] = values
+        points.foreach_set('co', co)
+        points.foreach_set('interpolation', np.full(count, INTERPOLATION[interpolation], dtype = np.int32))
+    # Sort and recalculate the automatic handles once for the whole curve
+    fcurve.update()
+    return count
+
+def mergeKeys(fcurve, frames, values, ipo):
+    # Write keys to a curve that has keys, every key keeps its handles and handle types.
+    # A key on a frame the curve has replaces its value and moves its handles along like keyframe_insert
+    points = fcurve.keyframe_points
+    existing = len(points)
+    oldFrames = np.empty(2 * existing, dtype = np.float32)
+    points.foreach_get('co', oldFrames)
+    oldFrames = oldFrames[0::2]
+    slots = np.minimum(np.searchsorted(oldFrames, frames), existing - 1)
+    found = oldFrames[slots] == frames
+    matched = slots[found]
+    added = np.flatnonzero(~found)
+
+    # New keys get the default handle types of added points, read back with the others
+    points.add(len(added))
+    keys = readKeys(fcurve)
+    co = keys['co'].reshape(-1, 2)
+    left = keys['handle_left'].reshape(-1, 2)
+    right = keys['handle_right'].reshape(-1, 2)
+    delta = values[found] - co[matched, 1]
+    co[matched, 1] = values[found]
+    left[matched, 1] += delta
+    right[matched, 1] += delta
+    keys['interpolation'][matched] = ipo
+    co[existing:, 0] = frames[added]
+    co[existing:, 1] = values[added]
+    left[existing:] = co[existing:]
+    right[existing:] = co[existing:]
+    keys['interpolation'][existing:] = ipo
+
+    # Every attribute in frame order, update() then has nothing left to move
+    order = np.argsort(co[:, 0], kind = 'stable')
+    for attr, width, dtype in KEY_ATTRIBUTES:
+        points.foreach_set(attr, keys[attr].reshape(len(co), width)[order].ravel())
+
+def writeActionKeys(action, dataPath, frames, columns, indices = None, interpolation = 'BEZIER'):
+    """Write one value column per array index of a property, returns keys written
+
+    columns can be any sequence of arrays, for example the transposed
+    (keys, 3) arrays returned by the convert module.
+    """
+    if indices is None:
+        indices = range(len(columns))
+    written = 0
+    for index, values in zip(indices, columns):
+        written += writeFCurve(action, dataPath, index, frames, values, interpolation)
+    return written
+
+def writeKeys(target, dataPath, frames, columns, indices = None, interpolation = 'BEZIER'):
+    # Same as writeActionKeys on the target's own Action
+    written = writeActionKeys(ensureAction(target), dataPath, frames, columns, indices, interpolation)
+    target.update_tag(refresh = {'TIME'})
+    return written
+
+def assignAction(target, action, frameOffset = 0):
+    # Share one Action, a frame offset moves an NLA strip instead of copying the keys
+    animData = target.animation_data
+    if animData is None:
+        animData = target.animation_data_create()
+    track = animData.nla_tracks.get(NLA_TRACK)
+    if track is not None:
+        animData.nla_tracks.remove(track)
+    if frameOffset == 0:
+        animData.action = action
+    else:
+        animData.action = None
+        track = animData.nla_tracks.new()
+        track.name = NLA_TRACK
+        track.strips.new(action.name, action.frame_range[0] + frameOffset, action)
+    target.update_tag(refresh = {'TIME'})
+
+def readKeys(fcurve):
+    # Every keyframe point of an F-Curve as arrays, replaceKeys puts them back
+    points = fcurve.keyframe_points
+    keys = {}
+    for attr, width, dtype in KEY_ATTRIBUTES:
+        keys[attr] = np.empty(width * len(points), dtype = dtype)
+        points.foreach_get(attr, keys[attr])
+    return keys
+
+def keyFrames(curves):
+    # Sorted frames holding a key on any of the F-Curves
+    frames = [np.empty(0, dtype = np.float32)]
+    for fcurve in curves:
+        co = np.empty(2 * len(fcurve.keyframe_points), dtype = np.float32)
+        fcurve.keyframe_points.foreach_get('co', co)
+        frames.append(co[0::2])
+    return np.unique(np.concatenate(frames))
+
+def curveValues(fcurve, frames):
+    # Values of an F-Curve on frames, read in bulk when its keys are exactly those frames
+    points = fcurve.keyframe_points
+    co = np.empty(2 * len(points), dtype = np.float32)
+    points.foreach_get('co', co)
+    if len(points) == len(frames) and (co[0::2] == frames).all():
+        return co[1::2].astype(np.float64)
+    return np.array([fcurve.evaluate(frame) for frame in frames.tolist()])
+
+def replaceKeys(action, dataPath, index, keys, group = GROUP):
+    # Replace an F-Curve with keys from readKeys, None only removes it
+    fcurve = action.fcurves.find(dataPath, index = index)
+    if fcurve is not None:
+        action.fcurves.remove(fcurve)
+    if keys is None:
+        return
+    fcurve = action.fcurves.new(dataPath, index = index, action_group = group)
+    points = fcurve.keyframe_points
+    points.add(len(keys['interpolation']))
+    for attr, width, dtype in KEY_ATTRIBUTES:
+        points.foreach_set(attr, keys[attr])
+    fcurve.update()
+
+# SYNC
+
+# Above this share of a curve's keys a sync rewrites the curve in bulk instead of editing single keys
+SYNC_EDIT_LIMIT = 0.1
+
+class SyncReport:
+    """Keys a sync paste changed, added and removed"""
+
+    def __init__(self):
+        self.changed = 0
+        self.added = 0
+        self.removed = 0
+
+    def add(self, edits):
+        changed, added, removed = edits
+        self.changed += changed
+        self.added += added
+        self.removed += removed
+
+    @property
+    def total(self):
+        return self.changed + self.added + self.removed
+
+    def __str__(self):
+        return "Sync changed %d, added %d and removed %d keys" % (self.changed, self.added, self.removed)
+
+def syncFCurve(action, dataPath, index, frames, values, interpolation = 'BEZIER', group = GROUP, span = None):
+    """Make an F-Curve hold exactly the given keys, only editing keys that differ
+
+    Keys are matched by frame: values and interpolation of matching keys are
+    updated, frames missing on the curve are added and frames that are gone
+    are removed. With span (first, last) only keys in it can be removed.
+    Returns (changed, added, removed) key counts.
+    """
+    frames = np.asarray(frames, dtype = np.float32)
+    values = np.asarray(values, dtype = np.float32)
+    fcurve = action.fcurves.find(dataPath, index = index)
+    if fcurve is None or len(fcurve.keyframe_points) == 0:
+        return 0, writeFCurve(action, dataPath, index, frames, values, interpolation, group), 0
+
+    points = fcurve.keyframe_points
+    existing = len(points)
+    co = np.empty(2 * existing, dtype = np.float32)
+    oldIpos = np.empty(existing, dtype = np.int32)
+    points.foreach_get('co', co)
+    points.foreach_get('interpolation', oldIpos)
+    oldFrames, oldValues = co[0::2], co[1::2]
+    ipo = INTERPOLATION[interpolation]
+
+    # Look up every new frame among the sorted old keys
+    slots = np.minimum(np.searchsorted(oldFrames, frames), existing - 1)
+    found = oldFrames[slots] == frames
+    matched = slots[found]
+    differs = (oldValues[matched] != values[found]) | (oldIpos[matched] != ipo)
+    changed = matched[differs]
+    changedValues = values[found][differs]
+    added = np.flatnonzero(~found)
+    kept = np.zeros(existing, dtype = bool)
+    kept[matched] = True
+    if span is not None:
+        kept |= (oldFrames < span[0]) | (oldFrames > span[1])
+    removed = np.flatnonzero(~kept)
+
+    edits = len(changed) + len(added) + len(removed)
+    if edits == 0:
+        return 0, 0, 0
+    if span is None and edits > SYNC_EDIT_LIMIT * max(existing, len(frames)):
+        # Most of the curve differs, one bulk write is faster than single edits
+        if fcurve.group is not None:
+            group = fcurve.group.name
+        action.fcurves.remove(fcurve)
+        writeFCurve(action, dataPath, index, frames, values, interpolation, group)
+        return len(changed), len(added), len(removed)
+
+    for point, value in zip(changed.tolist(), changedValues.tolist()):
+        key = points[point]
+        key.co[1] = value
+        key.interpolation = interpolation
+    # Highest index first, so the indices of the keys still to remove stay valid
+    for point in removed[::-1].tolist():
+        points.remove(points[point], fast = True)
+    for point in added.tolist():
+        key = points.insert(float(frames[point]), float(values[point]), options = {'FAST'})
+        key.interpolation = interpolation
+    fcurve.update()
+    return len(changed), len(added), len(removed)
+
+def syncKeys(target, dataPath, frames, columns, indices = None, interpolation = 'BEZIER', report = None, span = None):
+    # Like writeKeys, but syncs each F-Curve and adds the edits to report
+    if indices is None:
+        indices = range(len(columns))
+    action = ensureAction(target)
+    edits = 0
+    for index, values in zip(indices, columns):
+        counts = syncFCurve(action, dataPath, index, frames, values, interpolation, span = span)
+        if report is not None:
+            report.add(counts)
+        edits += sum(counts)
+    if edits:
+        target.update_tag(refresh = {'TIME'})
+    return edits
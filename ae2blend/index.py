@@ -0,0 +1,346 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Index of where every layer and channel block starts and ends in Keyframe
+# Data text, so a caller can decode only the channels and rows it needs.
+# One regular expression finds the header and section lines and the end of
+# every block, only those lines are read in Python, and the text is only
+# scanned as far as the channels asked for. No bpy import here.
+
+import re
+
+from . import keyframes
+
+# Start of the first line after a channel block: a blank line or a line that is not indented
+BLOCK_END = re.compile(r"\n(?:[ \t\r]*(?:\n|\Z)|[^ \t\r\n])")
+
+# A line outside the blocks that is not blank: a line that is not indented, a layer name line
+# with the name in a group when it is a single field, or a run of other indented lines. Layer
+# names are matches of their own so the header fields around them repeat from layer to layer.
+# The newline before each match makes re search for newlines instead of trying every character
+LINES = re.compile(r"""(?:\n|\A)(?:
+    ([^ \t\r\n][^\n]*)
+    | [ \t\r]+Layer(?:[ ]Name)?[^\S\n]*\t[^\S\n]*(\S(?:[^\t\n]*\S)?)[^\S\n]*(?=\n|\Z)
+    | [ \t\r]+Layer[^\n]*
+    | [ \t\r]+[^ \t\r\n][^\n]*(?:\n(?![ \t\r]*Layer)[ \t\r]+[^ \t\r\n][^\n]*)*)""", re.VERBOSE)
+
+class ChannelEntry:
+    """Position of one channel block, decoded on first use"""
+
+    def __init__(self, text, group, name, start, end, layer = None):
+        self.text = text
+        self.group = group
+        self.name = name
+        # IndexedLayer holding the entry
+        self.layer = layer
+        # Offsets of the section line and of the line after the block
+        self.start = start
+        self.end = end
+        self.channel = None
+
+    def decode(self, rows = None, frames = None, bracket = False):
+        """KeyframeChannel of this block
+
+        rows limits it to its first rows, frames to the keys from frame
+        frames[0] to frames[1], plus the nearest key outside each end with
+        bracket. Rows outside the frames are skipped without reading them.
+        """
+        steps = self.decodeSteps(rows, frames, bracket)
+        while True:
+            try:
+                next(steps)
+            except StopIteration as stop:
+                return stop.value
+
+    def decodeSteps(self, rows = None, frames = None, bracket = False):
+        # Same as decode, yields the offset reached after every chunk of a long block and returns the channel
+        if self.channel is not None:
+            channel = self.channel
+            return channel.window(frames[0], frames[1], bracket) if frames is not None else channel
+        text = self.text
+        channel = keyframes.KeyframeChannel(self.group, self.name, 0)
+        start = self.nextLine(self.start)
+        end = self.end
+        if start < end:
+            # First indented line of a block names its columns
+            channel.width = keyframes.columnCount(text[start:self.lineEnd(start)])
+            start = self.nextLine(start)
+        if frames is not None and start < end and self.isKeyed(start, channel.width):
+            first = self.seekFrame(start, end, frames[0], False)
+            last = self.seekFrame(start, end, frames[1], True)
+            if bracket:
+                if first > start:
+                    first = text.rfind("\n", start, first - 1) + 1 or start
+                if last < end:
+                    last = self.nextLine(last)
+            start, end = first, last
+            # Keyed even when no key falls in the window
+            channel.frames = keyframes.array('d')
+        if rows is None and text.count("\n", start, end) >= keyframes.BLOCK_ROWS:
+            start = yield from self.readChunks(channel, start, end)
+        while start < end and (rows is None or len(channel) < rows):
+            error = keyframes.readRow(channel, text[start:self.lineEnd(start)].strip())
+            if error is not None:
+                raise keyframes.KeyframeDataError("Line %d: %s" % (self.lineNumber(start), error))
+            start = self.nextLine(start)
+        if rows is None and frames is None:
+            self.channel = channel
+        return channel
+
+    def readChunks(self, channel, start, end):
+        # Read rows with NumPy CHUNK_CHARS of text at a time, yields the offset after every chunk.
+        # Returns where it stopped, the start of a chunk that didn't fit
+        while start < end:
+            stop = end if end - start <= keyframes.CHUNK_CHARS else self.nextLine(start + keyframes.CHUNK_CHARS)
+            if not keyframes.readBlock(channel, self.text[start:stop].rstrip()):
+                return start
+            start = stop
+            yield start
+        return start
+
+    def lineEnd(self, start):
+        end = self.text.find("\n", start, self.end)
+        return self.end if end == -1 else end
+
+    def nextLine(self, start):
+        return min(self.lineEnd(start) + 1, self.end)
+
+    def lineNumber(self, offset):
+        return self.text.count("\n", 0, offset) + 1
+
+    def isKeyed(self, start, width):
+        # Rows of keyed channels start with a frame number, a static value has none
+        return len(self.text[start:self.lineEnd(start)].split()) == width + 1
+
+    def seekFrame(self, start, end, frame, after):
+        # Offset of the first row from start with a frame at or (with after) past frame, by bisecting the text
+        text = self.text
+        while start < end:
+            middle = (start + end) // 2
+            lineStart = text.rfind("\n", start, middle) + 1 or start
+            line = text[lineStart:self.lineEnd(lineStart)]
+            try:
+                key = float(line.split(None, 1)[0])
+            except (ValueError, IndexError):
+                raise keyframes.KeyframeDataError("Line %d: could not read numbers from %r" % (self.lineNumber(lineStart), line.strip()))
+            if key < frame or (after and key == frame):
+                start = self.nextLine(lineStart)
+            else:
+                end = lineStart
+        return start
+
+    def __repr__(self):
+        return "<ChannelEntry %s %s: %d-%d>" % (self.group, self.name, self.start, self.end)
+
+class IndexedLayer(keyframes.HeaderFields):
+    """Header fields and channel entries of one layer"""
+
+    def __init__(self, name = None, header = None):
+        self.name = name
+        self.header = dict(header or {})
+        self.entries = []
+
+    @property
+    def end(self):
+        # Offset after the last block of the layer
+        return self.entries[-1].end if self.entries else 0
+
+    def entry(self, name, group = "Transform"):
+        for entry in self.entries:
+            if entry.name == name and entry.group == group:
+                return entry
+        return None
+
+    def decode(self, channels = None, rows = None, frames = None, bracket = False):
+        """KeyframeLayer holding the named channels, or all of them"""
+        layer = keyframes.KeyframeLayer(self.name, self.header)
+        for entry in self.entries:
+            if keyframes.inSubset(entry, channels):
+                layer.channels.append(entry.decode(rows, frames, bracket))
+        return layer
+
+    def __repr__(self):
+        return "<IndexedLayer %s: %d channels>" % (self.name, len(self.entries))
+
+class KeyframeIndex:
+    """Layers and channel blocks of Keyframe Data text, found in one pass"""
+
+    def __init__(self, text):
+        self.text = text
+        # Layers and entries scanned so far
+        self.scanned = []
+        self.found = []
+        self.scanner = self.scan()
+
+    @property
+    def layers(self):
+        for entry in self.scanner:
+            pass
+        return self.scanned
+
+    @property
+    def entries(self):
+        self.layers
+        return self.found
+
+    def iterEntries(self):
+        # Entries already found, then scan on for more
+        yield from list(self.found)
+        # next() instead of yield from, closing this generator must not close the scanner
+        for entry in iter(lambda: next(self.scanner, None), None):
+            yield entry
+
+    def scan(self):
+        # Same layer rules as keyframes.iterChannels without reading the rows, yields every new entry.
+        # LINES finds the lines to look at and BLOCK_END the end of each block, the loop runs a few
+        # times per layer instead of once per line
+        text = self.text
+        length = len(text)
+        layer = IndexedLayer()
+        seenNames = set()
+        seenStart = False
+        seenEnd = False
+        # What section lines and runs of header lines say, most layers repeat the same ones
+        sections = {}
+        runs = {}
+        search = LINES.search
+        match = search(text)
+        while match is not None:
+            line, name = match.group(1, 2)
+            if name is not None:
+                if seenNames:
+                    layer = IndexedLayer(header = layer.header)
+                    seenNames = set()
+                layer.name = name
+                match = search(text, match.end())
+                continue
+
+            if line is not None:
+                key = sections.get(line)
+                if key is None:
+                    meaning = lineMeaning(line)
+                    key = sections[line] = meaning[1:] if meaning[0] == 'section' else ()
+                if key:
+                    # The block runs to the next blank or unindented line
+                    if key in seenNames:
+                        layer = IndexedLayer(header = layer.header)
+                        seenNames = set()
+                    seenNames.add(key)
+                    blockEnd = BLOCK_END.search(text, match.end())
+                    entry = ChannelEntry(text, key[0], key[1], match.start(1), blockEnd.start() + 1 if blockEnd else length, layer)
+                    if not layer.entries:
+                        self.scanned.append(layer)
+                    layer.entries.append(entry)
+                    self.found.append(entry)
+                    yield entry
+                    match = search(text, blockEnd.start()) if blockEnd else None
+                    continue
+
+            # Header lines, indented lines outside a block are header fields
+            run = match.group()
+            meanings = runs.get(run)
+            if meanings is None:
+                meanings = runs[run] = runMeanings(run)
+            for meaning in meanings:
+                kind = meaning[0]
+                if kind == 'fields':
+                    layer.header.update(meaning[1])
+                elif kind == 'name':
+                    if seenNames:
+                        layer = IndexedLayer(header = layer.header)
+                        seenNames = set()
+                    layer.name = meaning[1]
+                elif kind == 'start':
+                    if seenNames or layer.header:
+                        layer = IndexedLayer()
+                        seenNames = set()
+                    seenStart = True
+                else:
+                    seenEnd = True
+            match = search(text, match.end())
+
+        if not seenStart or not seenEnd:
+            raise keyframes.KeyframeDataError("Text is not AfterEffects Keyframe Data")
+
+    def entry(self, name, group = "Transform"):
+        # First block of a channel over all layers, the rest of the text is not scanned
+        for entry in self.iterEntries():
+            if entry.name == name and entry.group == group:
+                return entry
+        return None
+
+    def documentSteps(self, document, channels = None, rows = None, frames = None, bracket = False):
+        # Decode into document one channel block, or chunk of a long block, at a time, yields the
+        # offset in the text decoding has reached after each. A layer is added with its first entry
+        layer = None
+        for entry in self.iterEntries():
+            if entry.layer is not layer:
+                layer = entry.layer
+                part = keyframes.KeyframeLayer(layer.name)
+                # Shared, header fields the scan still finds show up on the decoded layer
+                part.header = layer.header
+                document.layers.append(part)
+            if keyframes.inSubset(entry, channels):
+                part.channels.append((yield from entry.decodeSteps(rows, frames, bracket)))
+            yield entry.end
+
+    def document(self, channels = None, rows = None, frames = None, bracket = False):
+        """KeyframeDocument with only the named channels decoded, and only their first rows or frames"""
+        document = keyframes.KeyframeDocument()
+        for offset in self.documentSteps(document, channels, rows, frames, bracket):
+            pass
+        return document
+
+def lineMeaning(line):
+    # What a line outside the blocks is, the same way keyframes.iterChannels reads it:
+    # ('start',), ('end',), ('section', group, name), ('name', layer name), ('field', key, value) or ('blank',)
+    stripped = line.strip()
+    if stripped == "":
+        return ('blank',)
+    if stripped.startswith(keyframes.HEADER_START):
+        return ('start',)
+    if stripped == keyframes.HEADER_END:
+        return ('end',)
+    if not line[0].isspace():
+        return ('section',) + keyframes.sectionName(line)
+    fields = keyframes.splitFields(line)
+    if len(fields) < 2:
+        return ('blank',)
+    key = " ".join(fields[:-1])
+    if key in keyframes.LAYER_NAME_FIELDS:
+        return ('name', fields[-1])
+    return ('field', key, keyframes.parseHeaderValue(fields[-1]))
+
+def runMeanings(run):
+    # Meanings of the header lines of a LINES match, consecutive fields as one ('fields', {key: value})
+    meanings = []
+    for line in run.split("\n"):
+        meaning = lineMeaning(line)
+        if meaning[0] == 'field':
+            if not meanings or meanings[-1][0] != 'fields':
+                meanings.append(('fields', {}))
+            meanings[-1][1][meaning[1]] = meaning[2]
+        elif meaning[0] != 'blank':
+            meanings.append(meaning)
+    return meanings
+
+def indexKeyframeData(text):
+    """Index AfterEffects Keyframe Data text into a KeyframeIndex"""
+    return KeyframeIndex(text)
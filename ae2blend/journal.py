@@ -0,0 +1,153 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Record of what a running import changed, so a cancelled import can put
+# everything back. New datablocks are removed again, existing objects get
+# their transform values, Action, F-Curve keys and NLA offset track back,
+# and object data like a camera gets its lens and lens keys back.
+
+import bpy
+
+from . import fcurves
+
+# Object properties an import can write
+PROPERTIES = ('location', 'rotation_euler', 'delta_rotation_euler', 'scale', 'delta_location')
+
+# Object data properties an import can write, the camera lens
+DATA_PROPERTIES = ('lens',)
+
+# bpy.data collection of each kind of datablock an import creates
+COLLECTIONS = (
+    (bpy.types.Object, 'objects'),
+    (bpy.types.Mesh, 'meshes'),
+    (bpy.types.Camera, 'cameras'),
+    (bpy.types.Action, 'actions'))
+
+class ImportJournal:
+    """Datablocks created and existing objects changed by one import"""
+
+    def __init__(self):
+        self.created = []
+        self.targets = []
+
+    def addCreated(self, datablock):
+        self.created.append(datablock)
+        return datablock
+
+    def saveTarget(self, target):
+        # Save an existing object, or object data, before the import first writes to it
+        if target in self.created or any(saved == target for saved, state in self.targets):
+            return
+        props = targetProperties(target)
+        state = {}
+        if isinstance(target, bpy.types.Object):
+            state['rotation_mode'] = target.rotation_mode
+        for prop in props:
+            value = getattr(target, prop)
+            state[prop] = value if isinstance(value, float) else tuple(value)
+
+        animData = target.animation_data
+        state['animData'] = animData is not None
+        state['action'] = animData.action if animData is not None else None
+        state['fcurves'] = {}
+        if state['action'] is not None:
+            for fcurve in state['action'].fcurves:
+                if fcurve.data_path in props:
+                    group = fcurve.group.name if fcurve.group is not None else ""
+                    state['fcurves'][fcurve.data_path, fcurve.array_index] = (group, fcurves.readKeys(fcurve))
+        state['nla'] = None
+        if animData is not None:
+            track = animData.nla_tracks.get(fcurves.NLA_TRACK)
+            if track is not None:
+                state['nla'] = [(strip.name, strip.frame_start, strip.action) for strip in track.strips]
+        self.targets.append((target, state))
+
+    def rollback(self):
+        """Undo everything recorded, newest first"""
+        for target, state in reversed(self.targets):
+            restoreTarget(target, state, self.created)
+        for datablock in reversed(self.created):
+            removeDatablock(datablock, self.created)
+        self.targets = []
+        self.created = []
+
+def targetProperties(target):
+    # Properties of an object, or of its data, an import can write
+    if isinstance(target, bpy.types.Object):
+        return PROPERTIES
+    return tuple(prop for prop in DATA_PROPERTIES if hasattr(target, prop))
+
+def restoreTarget(target, state, created):
+    props = targetProperties(target)
+    for prop in props:
+        setattr(target, prop, state[prop])
+    if 'rotation_mode' in state:
+        target.rotation_mode = state['rotation_mode']
+
+    animData = target.animation_data
+    if animData is None:
+        return
+    current = animData.action
+
+    # Offset track of a shared Action
+    track = animData.nla_tracks.get(fcurves.NLA_TRACK)
+    if track is not None:
+        animData.nla_tracks.remove(track)
+    if state['nla'] is not None:
+        track = animData.nla_tracks.new()
+        track.name = fcurves.NLA_TRACK
+        for name, start, action in state['nla']:
+            track.strips.new(name, int(start), action)
+
+    action = state['action']
+    animData.action = action
+    if action is not None:
+        saved = state['fcurves']
+        for fcurve in list(action.fcurves):
+            if fcurve.data_path in props and (fcurve.data_path, fcurve.array_index) not in saved:
+                action.fcurves.remove(fcurve)
+        for (dataPath, index), (group, keys) in saved.items():
+            fcurve = action.fcurves.find(dataPath, index = index)
+            if fcurve is not None and sameKeys(fcurves.readKeys(fcurve), keys):
+                continue
+            fcurves.replaceKeys(action, dataPath, index, keys, group)
+
+    if current is not None and current != action and current not in created and current.users == 0:
+        # Action the import made for an object, or data, without one
+        bpy.data.actions.remove(current)
+    if not state['animData']:
+        target.animation_data_clear()
+    target.update_tag(refresh = {'TIME'})
+
+def sameKeys(keys, saved):
+    return all(keys[attr].shape == values.shape and (keys[attr] == values).all() for attr, values in saved.items())
+
+def removeDatablock(datablock, created):
+    # Objects and cameras get an Action for their keys that isn't in created
+    action = None
+    animData = getattr(datablock, 'animation_data', None)
+    if animData is not None:
+        action = animData.action
+    for kind, collection in COLLECTIONS:
+        if isinstance(datablock, kind):
+            getattr(bpy.data, collection).remove(datablock)
+            break
+    if action is not None and action not in created and action.users == 0:
+        bpy.data.actions.remove(action)
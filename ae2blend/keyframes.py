@@ -0,0 +1,529 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Parser for AfterEffects "Keyframe Data" text. This module must not import
+# bpy so it can be used and tested outside of Blender.
+
+import codecs
+import mmap
+import os
+import warnings
+from array import array
+from bisect import bisect_left, bisect_right
+
+import numpy as np
+
+HEADER_START = "Adobe After Effects"
+HEADER_END = "End of Keyframe Data"
+
+# Blocks with fewer rows are read row by row, NumPy costs more than it saves on them
+BLOCK_ROWS = 8
+
+# Longer blocks are read a chunk of rows, or of text, at a time, so only the
+# decoded arrays grow with the size of a block and never a copy of its text
+CHUNK_ROWS = 4096
+CHUNK_CHARS = 256 * 1024
+
+# Column names AfterEffects writes under each channel
+COLUMNS = {
+    "Position": ("X pixels", "Y pixels", "Z pixels"),
+    "Scale": ("X percent", "Y percent", "Z percent"),
+    "Orientation": ("X degrees", "Y degrees", "Z degrees"),
+    "X Rotation": ("degrees",),
+    "Y Rotation": ("degrees",),
+    "Z Rotation": ("degrees",),
+    "Rotation": ("degrees",)}
+
+# Header fields written before the channels, in AfterEffects order
+HEADER_FIELDS = ("Units Per Second", "Source Width", "Source Height", "Source Pixel Aspect Ratio", "Comp Pixel Aspect Ratio")
+
+# Header fields that name the layer the following channels belong to
+LAYER_NAME_FIELDS = ("Layer Name", "Layer")
+
+# ERRORS
+
+class KeyframeDataError(ValueError):
+    """Raised when text is not valid AfterEffects Keyframe Data"""
+
+# DOCUMENT CLASSES
+
+class KeyframeChannel:
+    """Keyframes of a single AfterEffects property such as Transform Position"""
+
+    def __init__(self, group, name, width):
+        self.group = group
+        self.name = name
+        self.width = width
+        # Frame numbers, or None when the property has no keyframes
+        self.frames = None
+        # Row major values, width values per frame
+        self.values = array('d')
+
+    @property
+    def isStatic(self):
+        return self.frames is None
+
+    def __len__(self):
+        if self.width == 0:
+            return 0
+        return len(self.values) // self.width
+
+    def row(self, index):
+        start = index * self.width
+        return tuple(self.values[start:start + self.width])
+
+    def rows(self):
+        for index in range(len(self)):
+            yield self.row(index)
+
+    def window(self, first, last, bracket = False):
+        """Channel with only the keys from frame first to last
+
+        The frames are sorted, so the ends are found by binary search. With
+        bracket the nearest key outside each end is kept as well, so the
+        curve still interpolates into the window the same way.
+        """
+        if self.isStatic:
+            return self
+        start = bisect_left(self.frames, first)
+        end = bisect_right(self.frames, last)
+        if bracket:
+            start = max(start - 1, 0)
+            end = min(end + 1, len(self.frames))
+        channel = KeyframeChannel(self.group, self.name, self.width)
+        channel.frames = self.frames[start:end]
+        channel.values = self.values[start * self.width:end * self.width]
+        return channel
+
+    def __repr__(self):
+        return "<KeyframeChannel %s %s: %d x %d%s>" % (self.group, self.name, len(self), self.width, " static" if self.isStatic else "")
+
+class HeaderFields:
+    """Named access to the AfterEffects header fields"""
+
+    @property
+    def unitsPerSecond(self):
+        return self.header.get("Units Per Second")
+
+    @property
+    def sourceWidth(self):
+        return self.header.get("Source Width")
+
+    @property
+    def sourceHeight(self):
+        return self.header.get("Source Height")
+
+    @property
+    def pixelAspectRatio(self):
+        return self.header.get("Source Pixel Aspect Ratio", self.header.get("Comp Pixel Aspect Ratio"))
+
+class KeyframeLayer(HeaderFields):
+    """Header fields and channels of one AfterEffects layer"""
+
+    def __init__(self, name = None, header = None):
+        self.name = name
+        self.header = dict(header or {})
+        self.channels = []
+        # Converted tracks when the layer was loaded from the cache
+        self.tracks = None
+
+    def channel(self, name, group="Transform"):
+        for channel in self.channels:
+            if channel.name == name and channel.group == group:
+                return channel
+        return None
+
+    def channelsNamed(self, name, group="Transform"):
+        return [channel for channel in self.channels if channel.name == name and channel.group == group]
+
+    @property
+    def keyCount(self):
+        return sum(len(channel) for channel in self.channels if not channel.isStatic)
+
+    def __repr__(self):
+        return "<KeyframeLayer %s: %d channels>" % (self.name, len(self.channels))
+
+class KeyframeDocument(KeyframeLayer):
+    """Parsed AfterEffects Keyframe Data: one or more layers of channels
+
+    The document itself behaves like a single layer holding the channels of
+    every layer, which is how everything but the batch operators use it.
+    """
+
+    def __init__(self):
+        self.name = None
+        self.layers = []
+        # DecimationReport of the converted tracks, None unless they were decimated
+        self.decimation = None
+
+    @property
+    def header(self):
+        if self.layers:
+            return self.layers[0].header
+        return {}
+
+    @property
+    def channels(self):
+        return [channel for layer in self.layers for channel in layer.channels]
+
+    @property
+    def tracks(self):
+        if not self.layers or any(layer.tracks is None for layer in self.layers):
+            return None
+        return [track for layer in self.layers for track in layer.tracks]
+
+# FUNCTIONS
+
+def isKeyframeData(text):
+    return HEADER_START in text and HEADER_END in text
+
+def splitFields(line):
+    # AfterEffects separates fields with tabs, fall back to spaces when they were lost
+    if "\t" in line:
+        return [field.strip() for field in line.split("\t") if field.strip()]
+    return line.split()
+
+def columnCount(line):
+    if "\t" not in line:
+        # Without tabs "Frame X pixels Y pixels" can only be counted in pairs
+        return max(1, (len(line.split()) - 1) // 2)
+    # Tab separated columns after the indent, a property without units has an
+    # empty column like "<tab>Frame<tab><tab>", the last tab ends the line
+    fields = [field.strip() for field in line.rstrip("\r\n").split("\t")[1:]]
+    if fields and fields[-1] == "":
+        fields.pop()
+    if fields and fields[0] == "Frame":
+        return len(fields) - 1
+    return len(fields)
+
+def sectionName(line):
+    # (group, name) of a section line like "Transform<tab>Position". Effect
+    # properties keep the effect in the group, "Effects<tab>Corner Pin #1"
+    fields = splitFields(line)
+    if "\t" in line:
+        return "\t".join(fields[:-1]), fields[-1]
+    return fields[0], " ".join(fields[1:])
+
+def inSubset(channel, channels):
+    # Channel is one of the named channels, a group name like "Effects" selects every channel of the group
+    return channels is None or channel.name in channels or channel.group.split("\t", 1)[0] in channels
+
+def parseHeaderValue(value):
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+def iterTextLines(text, start = 0, length = None):
+    # Lines of a string one at a time, without building a list of every line.
+    # start and length limit them to a part of the string
+    if length is None:
+        length = len(text)
+    while start < length:
+        end = text.find("\n", start, length)
+        if end == -1:
+            end = length
+        yield text[start:end]
+        start = end + 1
+
+def iterFileLines(path):
+    # Lines of a text file read through a memory map, decoded one at a time
+    with open(path, "rb") as file:
+        if os.fstat(file.fileno()).st_size == 0:
+            return
+        with mmap.mmap(file.fileno(), 0, access = mmap.ACCESS_READ) as data:
+            if data[:2] in (codecs.BOM_UTF16_LE, codecs.BOM_UTF16_BE):
+                # UTF-16 text can't be split on newline bytes, decode it whole
+                yield from iterTextLines(data[:].decode("utf-16"))
+                return
+            for line in iter(data.readline, b""):
+                yield line.decode("utf-8-sig", "replace")
+
+def iterChannels(lines, channels = None):
+    """Yield (layer, channel) for each channel as soon as its block is complete
+
+    lines can be any iterable of text lines. A new layer starts with every
+    "Adobe After Effects ... Keyframe Data" header, with a "Layer Name" header
+    field, or when a channel shows up a second time. Header fields are
+    stored on the layer as they are read. With channels, the rows of other
+    channels are never read, their blocks yield (layer, None).
+    """
+    layer = KeyframeLayer()
+    channel = None
+    # Rows of the current block and the line number of the first one, read when the block ends or CHUNK_ROWS are waiting
+    rows = []
+    # The current block is not in channels, its rows are passed over
+    skip = False
+    rowsLine = 0
+    seenNames = set()
+    seenStart = False
+    seenEnd = False
+
+    for lineNum, line in enumerate(lines, 1):
+        stripped = line.strip()
+
+        if stripped == "" or stripped.startswith(HEADER_START) or stripped == HEADER_END:
+            # A blank line or the start/end of the data closes the current block
+            if channel is not None:
+                yield layer, closeBlock(channel, rows, rowsLine, skip)
+                channel = None
+            if stripped.startswith(HEADER_START):
+                if seenNames or layer.header:
+                    layer = KeyframeLayer()
+                    seenNames = set()
+                seenStart = True
+            elif stripped == HEADER_END:
+                seenEnd = True
+            continue
+
+        if not line[0].isspace():
+            # Section line like "Transform<tab>Position"
+            if channel is not None:
+                yield layer, closeBlock(channel, rows, rowsLine, skip)
+            group, name = sectionName(line)
+            if (group, name) in seenNames:
+                # Same property again, this is the next layer
+                layer = nextLayer(layer)
+                seenNames = set()
+            seenNames.add((group, name))
+            channel = KeyframeChannel(group, name, 0)
+            skip = not inSubset(channel, channels)
+            rows = []
+            continue
+
+        if channel is None:
+            # Indented line outside a block is a header field
+            fields = splitFields(line)
+            if len(fields) >= 2:
+                key = " ".join(fields[:-1])
+                if key in LAYER_NAME_FIELDS:
+                    if seenNames:
+                        layer = nextLayer(layer)
+                        seenNames = set()
+                    layer.name = fields[-1]
+                else:
+                    layer.header[key] = parseHeaderValue(fields[-1])
+            continue
+
+        if channel.width == 0:
+            # First indented line of a block names its columns
+            channel.width = columnCount(line)
+            rowsLine = lineNum + 1
+            continue
+
+        if skip:
+            continue
+        rows.append(stripped)
+        if len(rows) == CHUNK_ROWS:
+            readRows(channel, rows, rowsLine)
+            rowsLine += len(rows)
+            rows = []
+
+    if channel is not None:
+        yield layer, closeBlock(channel, rows, rowsLine, skip)
+    if not seenStart or not seenEnd:
+        raise KeyframeDataError("Text is not AfterEffects Keyframe Data")
+
+def closeBlock(channel, rows, lineNum, skip):
+    # The finished channel with its last rows read, None for a skipped one
+    if skip:
+        return None
+    readRows(channel, rows, lineNum)
+    return channel
+
+def readRows(channel, rows, lineNum):
+    # Add the rows of a block, or of a chunk of one, all at once, row by row when one of them doesn't fit to find which
+    if not rows or (len(rows) >= BLOCK_ROWS and readBlock(channel, "\n".join(rows))):
+        return
+    for offset, row in enumerate(rows):
+        error = readRow(channel, row)
+        if error is not None:
+            raise KeyframeDataError("Line %d: %s" % (lineNum + offset, error))
+
+def rowWidths(text):
+    # Number of words on every line of text, counted by NumPy on the raw characters
+    chars = np.frombuffer(text.encode("latin-1", "replace"), dtype = np.uint8)
+    space = chars <= 32
+    wordStarts = np.flatnonzero(~space & np.concatenate(([True], space[:-1])))
+    newlines = np.flatnonzero(chars == 10)
+    return np.bincount(np.searchsorted(newlines, wordStarts), minlength = len(newlines) + 1)
+
+def readBlock(channel, text):
+    """Add every row of a block to channel with one NumPy conversion
+
+    text holds the rows of the block, one per line. Every row needs the
+    channel width of values after its frame number, a channel without
+    keyframes has a single row of values only. Returns False without
+    changing the channel when a row doesn't fit or holds something that
+    is not a number, readRow can then tell which one.
+    """
+    widths = rowWidths(text)
+    width = channel.width
+    static = len(widths) == 1 and widths[0] == width and channel.frames is None and len(channel.values) == 0
+    if width == 0 or (widths != (width if static else width + 1)).any():
+        return False
+    with warnings.catch_warnings():
+        # Older NumPy only warns when it stops at something that is not a number
+        warnings.simplefilter("error", DeprecationWarning)
+        try:
+            numbers = np.fromstring(text, sep = " ")
+        except (ValueError, DeprecationWarning):
+            return False
+    if len(numbers) != widths.sum():
+        return False
+
+    if static:
+        channel.values.frombytes(numbers.tobytes())
+        return True
+    numbers = numbers.reshape(-1, width + 1)
+    if channel.frames is None:
+        channel.frames = array('d')
+    channel.frames.frombytes(numbers[:, 0].tobytes())
+    channel.values.frombytes(numbers[:, 1:].tobytes())
+    return True
+
+def readRow(channel, stripped):
+    # Add a line of numbers to channel, returns what is wrong with it when it doesn't fit
+    try:
+        numbers = [float(word) for word in stripped.split()]
+    except ValueError:
+        return "could not read numbers from %r" % stripped
+
+    if len(numbers) == channel.width + 1:
+        if channel.frames is None:
+            channel.frames = array('d')
+        channel.frames.append(numbers[0])
+        channel.values.extend(numbers[1:])
+    elif len(numbers) == channel.width and channel.frames is None and len(channel.values) == 0:
+        channel.values.extend(numbers)
+    else:
+        return "expected %d values in %s %s" % (channel.width, channel.group, channel.name)
+    return None
+
+def nextLayer(layer):
+    # Layers without their own Keyframe Data header share the previous header
+    return KeyframeLayer(header = layer.header)
+
+def parseSteps(lines, document, channels = None):
+    # Parse into document one channel at a time, yields every channel once it is added.
+    # A layer whose channels are all skipped is still added, like subsetDocument keeps it
+    for layer, channel in iterChannels(lines, channels):
+        if not document.layers or document.layers[-1] is not layer:
+            document.layers.append(layer)
+        if channel is not None:
+            layer.channels.append(channel)
+            yield channel
+
+def parseLines(lines, channels = None):
+    document = KeyframeDocument()
+    for channel in parseSteps(lines, document, channels):
+        pass
+    return document
+
+def subsetDocument(document, channels = None, frames = None, bracket = False):
+    """Copy of a document with only the named channels, cut to the (first, last) frames
+
+    Converted tracks are left out, they have to be converted again.
+    """
+    subset = KeyframeDocument()
+    for layer in document.layers:
+        part = KeyframeLayer(layer.name, layer.header)
+        for channel in layer.channels:
+            if not inSubset(channel, channels):
+                continue
+            if frames is not None:
+                channel = channel.window(frames[0], frames[1], bracket)
+            part.channels.append(channel)
+        subset.layers.append(part)
+    return subset
+
+def parseKeyframeData(text, channels = None):
+    """Parse AfterEffects Keyframe Data text into a KeyframeDocument
+
+    With channels, only the named channels (see inSubset) are decoded.
+    """
+    return parseLines(iterTextLines(text), channels)
+
+def parseKeyframeFile(path, channels = None):
+    """Parse an AfterEffects Keyframe Data text file into a KeyframeDocument
+
+    With channels, only the named channels (see inSubset) are decoded.
+    """
+    return parseLines(iterFileLines(path), channels)
+
+# WRITER
+
+def makeChannel(name, frames, values, group = "Transform"):
+    # KeyframeChannel of a (keys, width) array, frames None for a value without keyframes
+    values = np.ascontiguousarray(values, dtype = np.float64)
+    channel = KeyframeChannel(group, name, values.shape[1])
+    channel.values.frombytes(values.tobytes())
+    if frames is not None:
+        channel.frames = array('d')
+        channel.frames.frombytes(np.ascontiguousarray(frames, dtype = np.float64).tobytes())
+    return channel
+
+def formatNumber(value):
+    # Whole numbers without decimals, never exponents
+    if isinstance(value, float) and value.is_integer():
+        return "%d" % value
+    if isinstance(value, float):
+        return "%.6f" % value
+    return str(value)
+
+def iterKeyframeText(layer):
+    """Lines of AfterEffects Keyframe Data for one layer, what the parser reads back
+
+    Values get six decimals and never an exponent, which AfterEffects
+    would not read. Join the lines with CRLF for the clipboard.
+    """
+    yield HEADER_START + " 8.0 Keyframe Data"
+    yield ""
+    if layer.name:
+        # Names the object a multi-layer paste creates, or the Live Sync target
+        yield "\t%s\t%s" % (LAYER_NAME_FIELDS[0], layer.name)
+    for key in HEADER_FIELDS:
+        if key in layer.header:
+            yield "\t%s\t%s" % (key, formatNumber(layer.header[key]))
+    yield ""
+    for channel in layer.channels:
+        columns = COLUMNS.get(channel.name, ("value",) * channel.width)
+        yield "%s\t%s" % (channel.group, channel.name)
+        yield "\tFrame\t" + "\t".join(columns) + "\t"
+        values = np.frombuffer(channel.values, dtype = np.float64).reshape(-1, channel.width)
+        rowFormat = "\t%.6f" * channel.width + "\t"
+        if channel.isStatic:
+            yield "\t" + rowFormat % tuple(values[0].tolist())
+        else:
+            frames = np.frombuffer(channel.frames, dtype = np.float64)
+            frameFormat = "\t%d" if (frames == np.round(frames)).all() else "\t%.6f"
+            rowFormat = frameFormat + rowFormat
+            for frame, row in zip(frames.tolist(), values.tolist()):
+                yield rowFormat % ((frame,) + tuple(row))
+        yield ""
+    yield ""
+    yield HEADER_END
+
+def writeKeyframeFile(path, lines):
+    # Stream lines to a text file with the CRLF line endings AfterEffects uses
+    with open(path, "w", encoding = "utf-8", newline = "\r\n") as file:
+        for line in lines:
+            file.write(line)
+            file.write("\n")
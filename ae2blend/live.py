@@ -0,0 +1,270 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Live sync over a local socket. A listener thread reads Keyframe Data
+# messages and parses them, and keeps only the newest update per target
+# until Blender takes them on its main thread. No bpy import here.
+#
+# A message is one header line and the payload, any number of them can be
+# sent over one connection and each is answered with one line:
+#
+#   AE2BLEND <tab> payload bytes <tab> target object name <newline>
+#   UTF-8 Keyframe Data
+#
+#   OK <tab> targets      or      ERROR <tab> message
+#
+# An empty target name sends every layer to the object named after it.
+# Stream a file from a script, standing in for AfterEffects:
+#
+#   python -m ae2blend.live track.txt --target Empty --repeat 100 --interval 0.04
+
+import argparse
+import errno
+import os
+import socket
+import socketserver
+import stat
+import sys
+import threading
+import time
+
+if not __package__:
+    # Started as a script, import through the package
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    __package__ = "ae2blend"
+
+from . import keyframes
+
+MAGIC = "AE2BLEND"
+DEFAULT_PORT = 9123
+
+# Largest payload a message may announce, in bytes
+MAX_PAYLOAD = 512 * 1024 * 1024
+
+# Reports kept for the panel
+MESSAGE_LINES = 4
+
+class LiveUpdate:
+    """Newest parsed Keyframe Data for one target object"""
+
+    def __init__(self, target, document):
+        self.target = target
+        self.document = document
+        self.received = time.time()
+        # Updates this one replaced before Blender took it
+        self.merged = 0
+
+class LiveServer:
+    """Listener on a localhost port, or on a Unix socket path, parsing in its own threads"""
+
+    def __init__(self, address, channels = None):
+        self.address = address
+        # Channel subset (see keyframes.inSubset) the connection threads decode, None for all
+        self.channels = channels
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.received = 0
+        self.merged = 0
+        self.applied = 0
+        self.errors = 0
+        self.messages = []
+        self.server = makeServer(address, self)
+        # Bound address, the port the system picked for port 0
+        self.address = self.server.server_address
+        # The socket file this listener made, close only removes that one
+        self.socketFile = socketFile(self.address) if isinstance(self.address, str) else None
+        self.thread = threading.Thread(target = self.server.serve_forever, kwargs = {'poll_interval': 0.1}, name = "AE2Blend live sync", daemon = True)
+        self.thread.start()
+
+    def put(self, target, document):
+        # Called from the connection threads, an update waiting for the same target is replaced
+        with self.lock:
+            update = LiveUpdate(target, document)
+            previous = self.pending.get(target)
+            if previous is not None:
+                update.merged = previous.merged + 1
+                self.merged += 1
+            self.pending[target] = update
+            self.received += 1
+
+    def take(self):
+        # Updates waiting since the last call, oldest first
+        with self.lock:
+            updates = sorted(self.pending.values(), key = lambda update: update.received)
+            self.pending = {}
+        self.applied += len(updates)
+        return updates
+
+    def report(self, kind, message):
+        # Same signature as Operator.report, so imports can report to the listener
+        # Connection threads report rejected messages too
+        with self.lock:
+            if 'ERROR' in kind:
+                self.errors += 1
+            self.messages = (self.messages + [message])[-MESSAGE_LINES:]
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+        if self.socketFile is not None and socketFile(self.address) == self.socketFile:
+            os.remove(self.address)
+
+    def __str__(self):
+        where = self.address if isinstance(self.address, str) else "%s:%d" % self.address
+        return "Listening on %s: %d updates, %d merged, %d errors" % (where, self.received, self.merged, self.errors)
+
+class LiveHandler(socketserver.StreamRequestHandler):
+    """Reads messages from one connection until it closes"""
+
+    def handle(self):
+        while True:
+            header = self.rfile.readline()
+            if not header:
+                return
+            try:
+                reply = "OK\t%d" % self.receive(header)
+            except (ValueError, UnicodeDecodeError, keyframes.KeyframeDataError) as error:
+                reply = "ERROR\t%s" % error
+                self.server.live.report({'ERROR'}, "Rejected a message: %s" % error)
+            self.wfile.write((reply + "\n").encode("utf-8"))
+
+    def receive(self, header):
+        # Parse one message, returns how many targets it updated
+        fields = header.decode("utf-8").rstrip("\r\n").split("\t", 2)
+        if len(fields) != 3 or fields[0] != MAGIC:
+            raise ValueError("Expected an %s header line" % MAGIC)
+        length = int(fields[1])
+        if not 0 <= length <= MAX_PAYLOAD:
+            raise ValueError("Payload of %d bytes is too large" % length)
+        payload = self.rfile.read(length)
+        if len(payload) != length:
+            raise ValueError("Connection closed after %d of %d bytes" % (len(payload), length))
+        document = keyframes.parseKeyframeData(payload.decode("utf-8"), self.server.live.channels)
+        updates = splitTargets(fields[2], document)
+        for target, part in updates:
+            self.server.live.put(target, part)
+        return len(updates)
+
+# FUNCTIONS
+
+def makeServer(address, live):
+    # Threaded TCP server bound to localhost, or a Unix socket server for a path
+    if isinstance(address, str):
+        removeStaleSocket(address)
+        base = socketserver.ThreadingUnixStreamServer
+    else:
+        base = socketserver.ThreadingTCPServer
+    server = type("LiveSocketServer", (base,), {'daemon_threads': True, 'allow_reuse_address': True})(address, LiveHandler)
+    server.live = live
+    return server
+
+def socketFile(path):
+    # (device, inode) of the Unix socket at path, None when there is none
+    try:
+        status = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (status.st_dev, status.st_ino) if stat.S_ISSOCK(status.st_mode) else None
+
+def removeStaleSocket(path):
+    # A socket file left behind by an earlier listener is replaced, any other file is not ours to remove
+    if socketFile(path) is not None:
+        os.remove(path)
+    elif os.path.lexists(path):
+        raise OSError(errno.EADDRINUSE, "Path is in use by something that is not a socket", path)
+
+def splitTargets(target, document):
+    # (target name, document) pairs, without a target name every layer goes to the object named after it
+    if target:
+        return [(target, document)]
+    updates = []
+    for layer in document.layers:
+        part = keyframes.KeyframeDocument()
+        part.layers.append(layer)
+        updates.append((layer.name or "Empty", part))
+    return updates
+
+def localAddress(port = DEFAULT_PORT, path = ""):
+    # Unix socket path when given, otherwise the port on the loopback interface only
+    return path if path else ("127.0.0.1", port)
+
+class LiveClient:
+    """Sends Keyframe Data to a listener over one connection"""
+
+    def __init__(self, address):
+        family = socket.AF_UNIX if isinstance(address, str) else socket.AF_INET
+        self.socket = socket.socket(family, socket.SOCK_STREAM)
+        self.socket.connect(address)
+        self.replies = self.socket.makefile("rb")
+
+    def send(self, target, text):
+        """Send one payload and wait for its reply, returns the number of targets updated"""
+        payload = text.encode("utf-8")
+        header = "%s\t%d\t%s\n" % (MAGIC, len(payload), target)
+        self.socket.sendall(header.encode("utf-8") + payload)
+        reply = self.replies.readline().decode("utf-8").rstrip("\n").split("\t", 1)
+        if reply[0] != "OK":
+            raise ValueError(reply[-1] if reply[0] else "Connection closed")
+        return int(reply[1])
+
+    def close(self):
+        self.replies.close()
+        self.socket.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+def sendKeyframes(address, target, text):
+    """Send Keyframe Data text to a listener on one new connection"""
+    with LiveClient(address) as client:
+        return client.send(target, text)
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Stream AfterEffects Keyframe Data files to AE2Blend Live Sync")
+    parser.add_argument("files", nargs = "+", help = "Keyframe Data text files, sent in turn")
+    parser.add_argument("--target", default = "", help = "object to update, empty sends every layer to the object named after it")
+    parser.add_argument("--port", type = int, default = DEFAULT_PORT)
+    parser.add_argument("--socket", default = "", help = "Unix socket path instead of the port")
+    parser.add_argument("--repeat", type = int, default = 1, help = "times to send the files")
+    parser.add_argument("--interval", type = float, default = 0.0, help = "seconds between sends")
+    options = parser.parse_args(argv)
+
+    texts = []
+    for path in options.files:
+        with open(path, encoding = "utf-8-sig") as file:
+            texts.append(file.read())
+    start = time.perf_counter()
+    sent = 0
+    with LiveClient(localAddress(options.port, options.socket)) as client:
+        for repeat in range(options.repeat):
+            for text in texts:
+                client.send(options.target, text)
+                sent += 1
+                if options.interval:
+                    time.sleep(options.interval)
+    seconds = time.perf_counter() - start
+    print("Sent %d updates in %.3fs" % (sent, seconds))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Scale calibration from any number of reference points. AfterEffects
+# positions of named layers are fitted to known Blender positions in one
+# least-squares solve (Umeyama), giving the scale and optionally the
+# rotation and offset, with the error left at every point. No bpy import here.
+
+import math
+import numpy as np
+
+from . import convert
+
+class ScaleSolve:
+    """Result of a fit, Blender position = rotation @ (position at scale 1) / scale + translation"""
+
+    def __init__(self, names, scale, rotation, translation, residuals):
+        self.names = list(names)
+        self.scale = scale
+        self.rotation = rotation
+        self.translation = translation
+        self.residuals = residuals
+
+    @property
+    def rms(self):
+        return float(np.sqrt(np.mean(self.residuals ** 2))) if len(self.residuals) else 0.0
+
+    @property
+    def worst(self):
+        # Name and residual of the point fitting worst
+        index = int(np.argmax(self.residuals))
+        return self.names[index], float(self.residuals[index])
+
+    def euler(self):
+        return matrixToEuler(self.rotation)
+
+    def __str__(self):
+        name, residual = self.worst
+        return "Scale %.6g from %d points, RMS error %.4g, worst %s %.4g" % (self.scale, len(self.names), self.rms, name, residual)
+
+# FUNCTIONS
+
+def fitSimilarity(source, target, rigid = True):
+    """Least-squares scale s, rotation R and translation t with target ~ s R source + t
+
+    source and target are (points, 3) arrays of matching rows. Without rigid
+    the rotation stays the identity and only scale and translation are fitted.
+    Returns (s, R, t, residuals), residuals is the distance left at each point.
+    """
+    source = np.asarray(source, dtype = np.float64)
+    target = np.asarray(target, dtype = np.float64)
+    count = len(source)
+    if count != len(target):
+        raise ValueError("Source and target need the same number of points")
+    if count < (3 if rigid else 2):
+        raise ValueError("Need at least %d reference points, got %d" % (3 if rigid else 2, count))
+
+    sourceMean = source.mean(axis = 0)
+    targetMean = target.mean(axis = 0)
+    a = source - sourceMean
+    b = target - targetMean
+    variance = (a * a).sum() / count
+    if variance == 0.0:
+        raise ValueError("Reference points all lie on the same spot")
+
+    if rigid:
+        # Umeyama: SVD of the cross covariance, the sign fix keeps R a rotation instead of a reflection
+        covariance = b.T @ a / count
+        u, d, vt = np.linalg.svd(covariance)
+        sign = np.ones(3)
+        if np.linalg.det(u) * np.linalg.det(vt) < 0:
+            sign[2] = -1.0
+        rotation = u @ np.diag(sign) @ vt
+        s = (d * sign).sum() / variance
+    else:
+        rotation = np.identity(3)
+        s = (a * b).sum() / count / variance
+    if s <= 0.0:
+        raise ValueError("Reference points give no positive scale")
+
+    translation = targetMean - s * rotation @ sourceMean
+    fitted = s * source @ rotation.T + translation
+    residuals = np.sqrt(((fitted - target) ** 2).sum(axis = 1))
+    return s, rotation, translation, residuals
+
+def layerPoints(layers, targets):
+    """First Position key of every layer whose name is in targets
+
+    targets maps names to Blender positions. Returns (names, AfterEffects
+    positions converted at scale 1, Blender positions).
+    """
+    names = []
+    source = []
+    target = []
+    for layer in layers:
+        if layer.name not in targets:
+            continue
+        channel = layer.channel("Position")
+        if channel is None or len(channel) == 0:
+            continue
+        names.append(layer.name)
+        source.append(convert.convertPosition(convert.channelValues(channel)[:1], 1.0))
+        target.append(targets[layer.name])
+    if not names:
+        return names, np.zeros((0, 3)), np.zeros((0, 3))
+    return names, np.concatenate(source), np.array(target, dtype = np.float64)
+
+def solveScale(layers, targets, rigid = True):
+    """Fit the layers to the named Blender positions, a ScaleSolve with the AEScale value"""
+    names, source, target = layerPoints(layers, targets)
+    s, rotation, translation, residuals = fitSimilarity(source, target, rigid)
+    return ScaleSolve(names, 1.0 / s, rotation, translation, residuals)
+
+def matrixToEuler(rotation):
+    # XYZ Euler angles in radians of a rotation matrix, the order Blender objects default to
+    rotation = np.asarray(rotation, dtype = np.float64)
+    cy = math.hypot(rotation[0, 0], rotation[1, 0])
+    if cy > 1e-9:
+        return (
+            math.atan2(rotation[2, 1], rotation[2, 2]),
+            math.atan2(-rotation[2, 0], cy),
+            math.atan2(rotation[1, 0], rotation[0, 0]))
+    # Gimbal lock, put all of the Z turn into X
+    return (math.atan2(-rotation[1, 2], rotation[1, 1]), math.atan2(-rotation[2, 0], cy), 0.0)
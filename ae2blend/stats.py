@@ -0,0 +1,90 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Wall time per import stage and what the import did, for the panel, the
+# operator report and an optional JSON lines log. No bpy import here.
+
+import json
+import time
+from contextlib import contextmanager
+
+# Stages in pipeline order
+STAGES = ("read", "parse", "convert", "create", "parent", "write", "update")
+
+class ImportStats:
+    """Timing and counts of one operator run"""
+
+    def __init__(self, operation = ""):
+        self.operation = operation
+        self.started = time.time()
+        self.seconds = 0.0
+        self.stages = dict.fromkeys(STAGES, 0.0)
+        self.keys = 0
+        self.channels = 0
+        self.touched = set()
+        self.current = None
+        self.start = time.perf_counter()
+
+    @contextmanager
+    def stage(self, name):
+        # Time spent in nested stages is only counted for the outer one
+        if self.current is not None:
+            yield
+            return
+        self.current = name
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages[name] = self.stages.get(name, 0.0) + time.perf_counter() - start
+            self.current = None
+
+    def touch(self, obj):
+        # Blender hands out new Python wrappers for the same object, the address of its data stays
+        self.touched.add(obj.as_pointer())
+
+    @property
+    def objects(self):
+        return len(self.touched)
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.start
+
+    def asDict(self):
+        return {
+            'time': time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self.started)),
+            'operation': self.operation,
+            'seconds': round(self.seconds, 6),
+            'stages': {name: round(seconds, 6) for name, seconds in self.stages.items()},
+            'keys': self.keys,
+            'channels': self.channels,
+            'objects': self.objects}
+
+    def stageLines(self):
+        return ["%s: %.3fs" % (name.capitalize(), seconds) for name, seconds in self.stages.items() if seconds]
+
+    def __str__(self):
+        stages = ", ".join("%s %.3fs" % (name, seconds) for name, seconds in self.stages.items() if seconds)
+        return "%s took %.3fs (%s): %d keys, %d channels, %d objects" % (self.operation, self.seconds, stages or "no stages", self.keys, self.channels, self.objects)
+
+def appendLog(path, record):
+    # One JSON object per line, so a show's log can be read back line by line
+    with open(path, "a", encoding = "utf-8") as file:
+        file.write(json.dumps(record, sort_keys = True) + "\n")
@@ -0,0 +1,116 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Clipboard watcher. Blender hands it the clipboard text on a timer, new
+# Keyframe Data is parsed and converted on a worker thread, and an import
+# of the same text with the same settings takes the ready document and
+# only writes it. No bpy import here.
+
+import threading
+import time
+
+from . import cache
+from . import decimate
+from . import keyframes
+
+class PreparedPayload:
+    """Parsed and converted clipboard text, with a summary for the panel"""
+
+    def __init__(self, key, settings):
+        self.key = key
+        self.settings = settings
+        self.document = None
+        self.error = None
+        self.seconds = 0.0
+        self.layers = 0
+        self.channels = []
+        # First and last AfterEffects frame over every keyed channel, None without keys
+        self.frames = None
+        # Drawn in the panel since it became ready
+        self.shown = False
+
+    @property
+    def ready(self):
+        return self.document is not None or self.error is not None
+
+    def prepare(self, text):
+        start = time.perf_counter()
+        try:
+            # The import reports what decimation removed from the counts kept on the document
+            document = cache.convertDocument(keyframes.parseKeyframeData(text), self.settings, decimate.DecimationReport())
+        except (ValueError, keyframes.KeyframeDataError) as error:
+            self.error = str(error)
+            return
+        finally:
+            self.seconds = time.perf_counter() - start
+        self.layers = len(document.layers)
+        for channel in document.channels:
+            if channel.name not in self.channels:
+                self.channels.append(channel.name)
+            if not channel.isStatic and len(channel.frames):
+                first, last = channel.frames[0], channel.frames[-1]
+                if self.frames is not None:
+                    first, last = min(first, self.frames[0]), max(last, self.frames[1])
+                self.frames = (first, last)
+        self.document = document
+
+    def __str__(self):
+        if self.error is not None:
+            return "Clipboard: %s" % self.error
+        if self.document is None:
+            return "Clipboard: parsing..."
+        frames = "frames %g-%g" % self.frames if self.frames is not None else "no keys"
+        return "Clipboard: %d layers, %s (%.2fs)" % (self.layers, frames, self.seconds)
+
+class ClipboardWatcher:
+    """Newest Keyframe Data seen on the clipboard, prepared in the background"""
+
+    def __init__(self):
+        self.seen = None
+        self.prepared = None
+
+    def offer(self, text, settings):
+        """Prepare text unless it and settings are the same as last time, returns True when it started
+
+        Called on the main thread on every poll, the text is hashed instead
+        of searched, only new text is checked for Keyframe Data.
+        """
+        key = textKey(text)
+        if (key, settings) == self.seen:
+            return False
+        self.seen = (key, settings)
+        if not keyframes.isKeyframeData(text):
+            self.prepared = None
+            return False
+        payload = PreparedPayload(key, settings)
+        self.prepared = payload
+        threading.Thread(target = payload.prepare, args = (text,), name = "AE2Blend clipboard", daemon = True).start()
+        return True
+
+    def take(self, text, settings):
+        # Ready document of exactly this text and these settings, or None
+        payload = self.prepared
+        if payload is None or payload.document is None or payload.key != textKey(text) or payload.settings != settings:
+            return None
+        return payload.document
+
+def textKey(text):
+    # Cheap identity of a clipboard string, its length and Python's string hash
+    return len(text), hash(text)
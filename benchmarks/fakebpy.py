@@ -0,0 +1,686 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Lightweight in-process stand-in for the parts of bpy AE2Blend uses, so the
+# add-on can be benchmarked without Blender. Install it before importing the
+# add-on:
+#
+#   fakebpy.install()
+#   from ae2blend import AE2Blend_2_8
+#
+# Property writes, keyframes and bulk buffer calls are counted in counters.
+
+import sys
+import types
+from collections import Counter
+
+import numpy as np
+
+counters = Counter()
+
+# PROPERTIES
+
+class Property:
+    """Result of bpy.props.*Property, stores its value per instance like RNA"""
+
+    def __init__(self, kind, **options):
+        self.kind = kind
+        self.options = options
+        self.default = options.get('default')
+
+    def __get__(self, instance, owner):
+        if instance is None:
+            return self
+        props = instance.__dict__.setdefault('_props', {})
+        if self.kind == 'Pointer' and id(self) not in props:
+            # Property groups are created with the struct holding them
+            props[id(self)] = self.options['type']()
+        return props.get(id(self), self.default)
+
+    def __set__(self, instance, value):
+        # Counted by Struct.__setattr__
+        instance.__dict__.setdefault('_props', {})[id(self)] = value
+
+def propertyType(kind, default):
+    def makeProperty(**options):
+        options.setdefault('default', default)
+        return Property(kind, **options)
+    return makeProperty
+
+class Vector(list):
+    """Float array property, item writes are counted"""
+
+    def __setitem__(self, index, value):
+        counters['property writes'] += 1
+        list.__setitem__(self, index, value)
+
+    x = property(lambda self: self[0], lambda self, value: self.__setitem__(0, value))
+    y = property(lambda self: self[1], lambda self, value: self.__setitem__(1, value))
+    z = property(lambda self: self[2], lambda self, value: self.__setitem__(2, value))
+
+class Struct:
+    """Base of the fake RNA structs, attribute writes are counted"""
+
+    VECTORS = ()
+
+    def __setattr__(self, name, value):
+        counters['property writes'] += 1
+        if name in self.VECTORS:
+            value = Vector(value)
+        object.__setattr__(self, name, value)
+
+    def init(self, **values):
+        # Set initial values without counting them
+        for name, value in values.items():
+            if name in self.VECTORS:
+                value = Vector(value)
+            object.__setattr__(self, name, value)
+
+    def as_pointer(self):
+        # Address of the Blender data, the same whichever Python wrapper asks
+        return id(self)
+
+# COLLECTIONS
+
+class DataCollection(list):
+    """bpy.data collection such as bpy.data.objects"""
+
+    def __init__(self, factory):
+        list.__init__(self)
+        self.factory = factory
+
+    def new(self, name, *args):
+        item = self.factory(name, *args)
+        self.append(item)
+        counters['datablocks created'] += 1
+        return item
+
+    def get(self, name, default = None):
+        for item in self:
+            if item.name == name:
+                return item
+        return default
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            item = self.get(key)
+            if item is None:
+                raise KeyError(key)
+            return item
+        return list.__getitem__(self, key)
+
+    def remove(self, item, do_unlink = True):
+        counters['datablocks removed'] += 1
+        list.remove(self, item)
+        if isinstance(item, Object):
+            for collection in [sys.modules['bpy'].context.scene.collection] + list(sys.modules['bpy'].data.collections):
+                if item in collection.objects:
+                    collection.objects.unlink(item)
+
+# ANIMATION
+
+class KeyframePoints:
+    # Attribute, values per key, type and default of new keys
+    ATTRIBUTES = (
+        ('co', 2, np.float32, 0),
+        ('handle_left', 2, np.float32, 0),
+        ('handle_right', 2, np.float32, 0),
+        ('handle_left_type', 1, np.int32, 3),
+        ('handle_right_type', 1, np.int32, 3),
+        ('interpolation', 1, np.int32, 2))
+
+    def __init__(self):
+        for attr, width, dtype, default in self.ATTRIBUTES:
+            setattr(self, attr, np.zeros((0, width) if width > 1 else 0, dtype = dtype))
+
+    def __len__(self):
+        return len(self.co)
+
+    def add(self, count):
+        counters['keyframes added'] += count
+        for attr, width, dtype, default in self.ATTRIBUTES:
+            added = np.full((count, width) if width > 1 else count, default, dtype = dtype)
+            setattr(self, attr, np.concatenate((getattr(self, attr), added)))
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return Keyframe(self, index)
+
+    def remove(self, keyframe, fast = False):
+        counters['keyframes removed'] += 1
+        for attr, width, dtype, default in self.ATTRIBUTES:
+            setattr(self, attr, np.delete(getattr(self, attr), keyframe.index, axis = 0))
+
+    def insert(self, frame, value, options = set()):
+        counters['keyframe inserts'] += 1
+        self.add(1)
+        counters['keyframes added'] -= 1
+        self.co[-1] = (frame, value)
+        return Keyframe(self, len(self) - 1)
+
+    def foreach_set(self, attr, values):
+        counters['foreach_set calls'] += 1
+        values = np.asarray(values)
+        target = getattr(self, attr)
+        if values.size != target.size:
+            raise ValueError("foreach_set: %s needs %d values, got %d" % (attr, target.size, values.size))
+        target.flat[:] = values.ravel()
+
+    def foreach_get(self, attr, values):
+        counters['foreach_get calls'] += 1
+        target = getattr(self, attr)
+        if len(values) != target.size:
+            raise ValueError("foreach_get: %s needs a buffer of %d" % (attr, target.size))
+        values[:] = target.ravel()
+
+INTERPOLATION_NAMES = ('CONSTANT', 'LINEAR', 'BEZIER')
+
+class KeyframeCo:
+    # co of one keyframe, writes go to the KeyframePoints arrays
+    def __init__(self, points, index):
+        self.points = points
+        self.index = index
+
+    def __getitem__(self, axis):
+        return float(self.points.co[self.index, axis])
+
+    def __setitem__(self, axis, value):
+        counters['property writes'] += 1
+        self.points.co[self.index, axis] = value
+
+class Keyframe:
+    def __init__(self, points, index):
+        self.points = points
+        self.index = index
+
+    @property
+    def co(self):
+        return KeyframeCo(self.points, self.index)
+
+    @property
+    def interpolation(self):
+        return INTERPOLATION_NAMES[self.points.interpolation[self.index]]
+
+    @interpolation.setter
+    def interpolation(self, value):
+        counters['property writes'] += 1
+        self.points.interpolation[self.index] = INTERPOLATION_NAMES.index(value)
+
+class FCurve:
+    def __init__(self, dataPath, index, group):
+        self.data_path = dataPath
+        self.array_index = index
+        self.group = types.SimpleNamespace(name = group) if group else None
+        self.keyframe_points = KeyframePoints()
+
+    def evaluate(self, frame):
+        # Linear between keys, constant past the ends
+        co = self.keyframe_points.co
+        return float(np.interp(frame, co[:, 0], co[:, 1])) if len(co) else 0.0
+
+    def update(self):
+        counters['fcurve updates'] += 1
+        points = self.keyframe_points
+        order = np.argsort(points.co[:, 0], kind = 'stable')
+        for attr, width, dtype, default in points.ATTRIBUTES:
+            setattr(points, attr, getattr(points, attr)[order])
+
+class FCurves(list):
+    def find(self, dataPath, index = 0):
+        for fcurve in self:
+            if fcurve.data_path == dataPath and fcurve.array_index == index:
+                return fcurve
+        return None
+
+    def new(self, dataPath, index = 0, action_group = ""):
+        if self.find(dataPath, index) is not None:
+            raise RuntimeError("F-Curve '%s[%d]' already exists" % (dataPath, index))
+        counters['fcurves created'] += 1
+        fcurve = FCurve(dataPath, index, action_group)
+        self.append(fcurve)
+        return fcurve
+
+    def remove(self, fcurve):
+        list.remove(self, fcurve)
+
+class Action(Struct):
+    def __init__(self, name):
+        self.init(name = name, fcurves = FCurves(), use_fake_user = False)
+
+    @property
+    def users(self):
+        users = 0
+        for obj in sys.modules['bpy'].data.objects:
+            if obj.animation_data is not None:
+                users += obj.animation_data.action is self
+                users += sum(strip.action is self for track in obj.animation_data.nla_tracks for strip in track.strips)
+        return users
+
+    @property
+    def frame_range(self):
+        frames = [fcurve.keyframe_points.co[:, 0] for fcurve in self.fcurves if len(fcurve.keyframe_points)]
+        if not frames:
+            return (0.0, 0.0)
+        frames = np.concatenate(frames)
+        return (float(frames.min()), float(frames.max()))
+
+class NlaStrips(list):
+    def new(self, name, start, action):
+        strip = types.SimpleNamespace(name = name, frame_start = float(start), action = action)
+        self.append(strip)
+        return strip
+
+class NlaTracks(list):
+    def new(self):
+        track = types.SimpleNamespace(name = "NlaTrack", strips = NlaStrips())
+        self.append(track)
+        return track
+
+    def get(self, name, default = None):
+        for track in self:
+            if track.name == name:
+                return track
+        return default
+
+class AnimData(Struct):
+    def __init__(self):
+        self.init(action = None, nla_tracks = NlaTracks())
+
+# OBJECTS AND DATA
+
+class Animatable(Struct):
+    """IDs with animation data"""
+
+    def animation_data_create(self):
+        if self.animation_data is None:
+            object.__setattr__(self, 'animation_data', AnimData())
+        return self.animation_data
+
+    def animation_data_clear(self):
+        object.__setattr__(self, 'animation_data', None)
+
+    def update_tag(self, refresh = None):
+        counters['update tags'] += 1
+
+class Object(Animatable):
+    VECTORS = ('location', 'scale', 'rotation_euler', 'delta_location', 'delta_rotation_euler', 'delta_scale')
+
+    def __init__(self, name, data = None):
+        self.init(
+            name = name,
+            data = data,
+            type = objectType(data),
+            location = (0, 0, 0),
+            scale = (1, 1, 1),
+            rotation_euler = (0, 0, 0),
+            delta_location = (0, 0, 0),
+            delta_rotation_euler = (0, 0, 0),
+            delta_scale = (1, 1, 1),
+            rotation_mode = 'XYZ',
+            parent = None,
+            matrix_parent_inverse = np.identity(4).view(Matrix),
+            animation_data = None,
+            empty_display_type = 'PLAIN_AXES',
+            selected = False)
+
+    @property
+    def matrix_world(self):
+        # Constraints are not evaluated
+        rotation = eulerMatrix(self.delta_rotation_euler, self.rotation_mode) @ eulerMatrix(self.rotation_euler, self.rotation_mode)
+        matrix = np.identity(4).view(Matrix)
+        matrix[:3, :3] = rotation * (np.array(self.scale) * np.array(self.delta_scale))
+        matrix[:3, 3] = np.array(self.location) + np.array(self.delta_location)
+        if self.parent is not None:
+            matrix = self.parent.matrix_world @ self.matrix_parent_inverse @ matrix
+        return matrix
+
+    def select_set(self, state):
+        counters['selection changes'] += 1
+        object.__setattr__(self, 'selected', state)
+
+    def select_get(self):
+        return self.selected
+
+
+    def keyframe_insert(self, data_path, index = -1, frame = 0, group = ""):
+        counters['keyframe inserts'] += 1
+        return True
+
+
+class Matrix(np.ndarray):
+    @property
+    def translation(self):
+        return Vector(np.asarray(self)[:3, 3].tolist())
+
+    def identity(self):
+        self[...] = np.identity(len(self))
+
+def eulerMatrix(angles, mode = 'XYZ'):
+    # The first axis of the order turns first
+    matrix = np.identity(3)
+    for axis in mode:
+        index = 'XYZ'.index(axis)
+        c, s = np.cos(angles[index]), np.sin(angles[index])
+        a, b = [i for i in range(3) if i != index]
+        turn = np.identity(3)
+        turn[a, a], turn[a, b], turn[b, a], turn[b, b] = c, -s, s, c
+        if index == 1:
+            turn[a, b], turn[b, a] = s, -s
+        matrix = turn @ matrix
+    return matrix
+
+def objectType(data):
+    if data is None:
+        return 'EMPTY'
+    return getattr(data, 'objectType', 'MESH')
+
+class MeshVertices:
+    def __init__(self):
+        self.co = np.zeros((0, 3), dtype = np.float32)
+
+    def __len__(self):
+        return len(self.co)
+
+    def add(self, count):
+        self.co = np.concatenate((self.co, np.zeros((count, 3), dtype = np.float32)))
+
+    foreach_set = KeyframePoints.foreach_set
+    foreach_get = KeyframePoints.foreach_get
+
+class Attribute:
+    def __init__(self, name, kind, size):
+        self.name = name
+        self.data_type = kind
+        self.value = np.zeros(size, dtype = np.int32 if kind == 'INT' else np.float32)
+        self.data = self
+
+    foreach_set = KeyframePoints.foreach_set
+    foreach_get = KeyframePoints.foreach_get
+
+class Attributes(list):
+    def __init__(self, mesh):
+        list.__init__(self)
+        self.mesh = mesh
+
+    def new(self, name, kind, domain):
+        attribute = Attribute(name, kind, len(self.mesh.vertices))
+        self.append(attribute)
+        return attribute
+
+    def get(self, name, default = None):
+        for attribute in self:
+            if attribute.name == name:
+                return attribute
+        return default
+
+class UVLayer:
+    def __init__(self, loops):
+        self.data = types.SimpleNamespace(foreach_set = lambda attr, values: counters.update(['foreach_set calls']))
+
+class UVLayers(list):
+    def new(self, name = "UVMap"):
+        layer = UVLayer(0)
+        self.append(layer)
+        return layer
+
+class Mesh(Struct):
+    objectType = 'MESH'
+
+    def __init__(self, name):
+        self.init(name = name, vertices = MeshVertices(), uv_layers = UVLayers(), polygons = [])
+        self.init(attributes = Attributes(self))
+
+    def from_pydata(self, vertices, edges, faces):
+        counters['from_pydata vertices'] += len(vertices)
+        self.vertices.co = np.asarray(vertices, dtype = np.float32).reshape(-1, 3)
+        object.__setattr__(self, 'polygons', list(faces))
+
+    def update(self):
+        counters['mesh updates'] += 1
+
+class Camera(Animatable):
+    objectType = 'CAMERA'
+
+    def __init__(self, name):
+        self.init(name = name, lens = 50.0, sensor_width = 36.0, sensor_fit = 'AUTO', animation_data = None)
+
+class CollectionObjects(list):
+    def link(self, obj):
+        counters['objects linked'] += 1
+        self.append(obj)
+
+    def unlink(self, obj):
+        self.remove(obj)
+
+class Collection(Struct):
+    def __init__(self, name):
+        self.init(name = name, objects = CollectionObjects(), children = [])
+
+# CONTEXT
+
+class Scene(Struct):
+    def __init__(self):
+        self.init(
+            name = "Scene",
+            frame_current = 1,
+            frame_start = 1,
+            frame_end = 250,
+            cursor = types.SimpleNamespace(location = Vector((0, 0, 0))),
+            render = types.SimpleNamespace(fps = 24, fps_base = 1.0, resolution_x = 1920, resolution_y = 1080, pixel_aspect_x = 1.0, pixel_aspect_y = 1.0),
+            collection = Collection("Scene Collection"))
+
+    def frame_set(self, frame):
+        # Evaluates the actions of every object, drivers and constraints are not
+        counters['frame changes'] += 1
+        self.frame_current = frame
+        for obj in self.collection.objects:
+            if obj.animation_data is None or obj.animation_data.action is None:
+                continue
+            for fcurve in obj.animation_data.action.fcurves:
+                getattr(obj, fcurve.data_path)[fcurve.array_index] = fcurve.evaluate(frame)
+
+    @property
+    def objects(self):
+        return list(self.collection.objects)
+
+class ViewLayerObjects(Struct):
+    def __init__(self, scene):
+        self.init(scene = scene, active = None)
+
+    def __iter__(self):
+        return iter(self.scene.collection.objects)
+
+class WindowManager:
+    def __init__(self):
+        self.clipboard = ""
+        self.windows = []
+        self.progress = None
+        self.timers = []
+        self.handlers = []
+
+    def progress_begin(self, start, end):
+        self.progress = start
+
+    def progress_update(self, value):
+        self.progress = value
+
+    def progress_end(self):
+        self.progress = None
+
+    def event_timer_add(self, step, window = None):
+        timer = types.SimpleNamespace(time_step = step)
+        self.timers.append(timer)
+        return timer
+
+    def event_timer_remove(self, timer):
+        self.timers.remove(timer)
+
+    def modal_handler_add(self, operator):
+        self.handlers.append(operator)
+        return True
+
+class WorkSpace:
+    def __init__(self):
+        self.status = None
+
+    def status_text_set(self, text):
+        self.status = text
+
+class Context:
+    def __init__(self):
+        self.scene = Scene()
+        self.window_manager = WindowManager()
+        self.window = types.SimpleNamespace()
+        self.workspace = WorkSpace()
+        self.view_layer = types.SimpleNamespace(objects = ViewLayerObjects(self.scene), update = lambda: counters.update(['view layer updates']))
+        self.collection = self.scene.collection
+
+    @property
+    def selected_objects(self):
+        return [obj for obj in self.scene.collection.objects if obj.selected]
+
+    @property
+    def object(self):
+        return self.view_layer.objects.active
+
+    active_object = object
+
+# TYPES
+
+class Operator:
+    bl_options = set()
+    options = types.SimpleNamespace(is_invoke = False)
+
+    def report(self, kind, message):
+        self.__dict__.setdefault('reports', []).append((set(kind), message))
+
+class Menu:
+    draw_funcs = []
+
+    @classmethod
+    def append(cls, func):
+        cls.draw_funcs.append(func)
+
+    @classmethod
+    def remove(cls, func):
+        cls.draw_funcs.remove(func)
+
+class Timers:
+    """bpy.app.timers, run() stands in for Blender's event loop"""
+
+    def __init__(self):
+        self.functions = {}
+
+    def register(self, function, first_interval = 0.0, persistent = False):
+        self.functions[function] = first_interval
+
+    def unregister(self, function):
+        del self.functions[function]
+
+    def is_registered(self, function):
+        return function in self.functions
+
+    def run(self):
+        # Call every timer once, dropping those that return None
+        for function in list(self.functions):
+            counters['timer calls'] += 1
+            interval = function()
+            if interval is None:
+                self.functions.pop(function, None)
+            else:
+                self.functions[function] = interval
+
+# MODULE
+
+def makeData():
+    return types.SimpleNamespace(
+        objects = DataCollection(Object),
+        meshes = DataCollection(Mesh),
+        cameras = DataCollection(Camera),
+        actions = DataCollection(Action),
+        collections = DataCollection(Collection))
+
+def reset():
+    """Start from an empty scene with no counts"""
+    bpy = sys.modules['bpy']
+    bpy.context = Context()
+    bpy.data = makeData()
+    counters.clear()
+    return bpy
+
+def registerClass(cls):
+    # Annotated properties become descriptors, like RNA does on registration
+    for name, value in cls.__dict__.get('__annotations__', {}).items():
+        if isinstance(value, Property):
+            setattr(cls, name, value)
+
+def install():
+    """Put the fake bpy modules in sys.modules and return bpy"""
+    if 'bpy' in sys.modules:
+        return sys.modules['bpy']
+
+    bpy = types.ModuleType('bpy')
+    bpy.types = types.ModuleType('bpy.types')
+    bpy.types.Scene = Scene
+    bpy.types.Object = Object
+    bpy.types.Mesh = Mesh
+    bpy.types.Camera = Camera
+    bpy.types.Action = Action
+    bpy.types.Panel = type('Panel', (), {})
+    bpy.types.Operator = Operator
+    bpy.types.PropertyGroup = type('PropertyGroup', (), {})
+    bpy.types.TOPBAR_MT_file_import = type('TOPBAR_MT_file_import', (Menu,), {'draw_funcs': []})
+    bpy.types.TOPBAR_MT_file_export = type('TOPBAR_MT_file_export', (Menu,), {'draw_funcs': []})
+
+    bpy.props = types.ModuleType('bpy.props')
+    for kind, default in (('Float', 0.0), ('Int', 0), ('Bool', False), ('String', ""), ('Enum', None), ('FloatVector', (0.0, 0.0, 0.0)), ('Pointer', None), ('Collection', None)):
+        setattr(bpy.props, kind + 'Property', propertyType(kind, default))
+
+    bpy.utils = types.ModuleType('bpy.utils')
+    bpy.utils.register_class = registerClass
+    bpy.utils.unregister_class = lambda cls: None
+
+    bpy.path = types.ModuleType('bpy.path')
+    bpy.path.abspath = lambda path: path
+
+    bpy.app = types.ModuleType('bpy.app')
+    bpy.app.version = (2, 80, 0)
+    bpy.app.background = True
+    bpy.app.timers = Timers()
+
+    bpy_extras = types.ModuleType('bpy_extras')
+    bpy_extras.io_utils = types.ModuleType('bpy_extras.io_utils')
+    bpy_extras.io_utils.ImportHelper = type('ImportHelper', (), {})
+    bpy_extras.io_utils.ExportHelper = type('ExportHelper', (), {})
+
+    sys.modules.update({
+        'bpy': bpy,
+        'bpy.types': bpy.types,
+        'bpy.props': bpy.props,
+        'bpy.utils': bpy.utils,
+        'bpy.path': bpy.path,
+        'bpy.app': bpy.app,
+        'bpy_extras': bpy_extras,
+        'bpy_extras.io_utils': bpy_extras.io_utils})
+    reset()
+    return bpy
@@ -0,0 +1,98 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Synthetic AfterEffects Keyframe Data the way AE puts it on the clipboard:
+# CRLF line endings, tab separated fields, one block per layer. Values are
+# random walks, rotations wrap around 360 like tracker output does.
+#
+#   python benchmarks/generate.py --frames 1000 --layers 20 > payload.txt
+
+import argparse
+import sys
+
+import numpy as np
+
+# Columns of every channel, first value is the start of its random walk
+CHANNELS = {
+    "Position": (("X pixels", 960.0), ("Y pixels", 540.0), ("Z pixels", 0.0)),
+    "Scale": (("X percent", 100.0), ("Y percent", 100.0), ("Z percent", 100.0)),
+    "Orientation": (("X degrees", 0.0), ("Y degrees", 0.0), ("Z degrees", 0.0)),
+    "X Rotation": (("degrees", 0.0),),
+    "Y Rotation": (("degrees", 0.0),),
+    "Rotation": (("degrees", 0.0),)}
+
+DEFAULT_CHANNELS = ("Position", "Scale", "Orientation", "Rotation")
+
+# Random walk step per frame
+STEPS = {"Position": 4.0, "Scale": 0.5, "Orientation": 3.0, "X Rotation": 3.0, "Y Rotation": 3.0, "Rotation": 3.0}
+
+def channelBlock(name, frames, rng, keyed = True):
+    columns = CHANNELS[name]
+    lines = ["Transform\t" + name, "\tFrame\t" + "\t".join(column for column, start in columns) + "\t"]
+    starts = np.array([start for column, start in columns])
+    if not keyed:
+        lines.append("\t\t" + "\t".join("%.11g" % value for value in starts) + "\t")
+        return lines
+
+    values = starts + np.cumsum(rng.normal(0.0, STEPS[name], (frames, len(columns))), axis = 0)
+    if name.endswith("Rotation") or name == "Orientation":
+        values %= 360.0
+    rowFormat = "\t%d" + "\t%.11g" * len(columns) + "\t"
+    for frame, row in enumerate(values.tolist()):
+        lines.append(rowFormat % ((frame,) + tuple(row)))
+    return lines
+
+def layerBlock(layerNum, frames, channels, rng, keyed = True, unitsPerSecond = 24):
+    lines = [
+        "Adobe After Effects 8.0 Keyframe Data",
+        "",
+        "\tLayer Name\tTrack Point %d" % layerNum,
+        "\tUnits Per Second\t%g" % unitsPerSecond,
+        "\tSource Width\t1920",
+        "\tSource Height\t1080",
+        "\tSource Pixel Aspect Ratio\t1",
+        "\tComp Pixel Aspect Ratio\t1",
+        ""]
+    for name in channels:
+        lines.extend(channelBlock(name, frames, rng, keyed))
+        lines.append("")
+    lines.extend(["", "End of Keyframe Data"])
+    return lines
+
+def generatePayload(frames = 100, layers = 1, channels = DEFAULT_CHANNELS, keyed = True, seed = 0, unitsPerSecond = 24):
+    """Keyframe Data text with the given number of keyed frames per channel and layers"""
+    rng = np.random.default_rng(seed)
+    lines = []
+    for layerNum in range(1, layers + 1):
+        lines.extend(layerBlock(layerNum, frames, channels, rng, keyed, unitsPerSecond))
+    return "\r\n".join(lines) + "\r\n"
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Write synthetic AfterEffects Keyframe Data to stdout")
+    parser.add_argument("--frames", type = int, default = 100)
+    parser.add_argument("--layers", type = int, default = 1)
+    parser.add_argument("--channels", default = ",".join(DEFAULT_CHANNELS), help = "comma separated, from " + ", ".join(CHANNELS))
+    parser.add_argument("--static", action = "store_true", help = "values without keyframes")
+    parser.add_argument("--seed", type = int, default = 0)
+    options = parser.parse_args(argv)
+    sys.stdout.write(generatePayload(options.frames, options.layers, options.channels.split(","), not options.static, options.seed))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+# Benchmarks of the add-on against synthetic payloads and the fake bpy in
+# fakebpy.py, no Blender needed. Every case reports the best time over the
+# repeats, keys per second, peak Python memory and what it did to bpy:
+#
+#   python benchmarks/run.py --frames 100 1000 10000 --layers 1 20
+#   python benchmarks/run.py --frames 100000 --layers 1 --cases index pointcloud
+#   python benchmarks/run.py --frames 1 --layers 100000 --cases index pointcloud
+#   python benchmarks/run.py --cases parse apply --json results.json
+#   python benchmarks/run.py --import-time
+#
+# The fake bpy costs far less than Blender's RNA, so the numbers show the
+# add-on's own overhead, use the counts to compare what bpy has to do.
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import tracemalloc
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import fakebpy
+import generate
+
+bpy = fakebpy.install()
+
+from ae2blend import AE2Blend_2_8 as addon
+from ae2blend import convert
+from ae2blend import index
+from ae2blend import keyframes
+from ae2blend import stats
+
+addon.register()
+
+# CASES
+#
+# Each case is (setup, run): setup gets the payload and returns the state
+# run needs, only run is timed.
+
+def clipboardSetup(payload):
+    fakebpy.reset()
+    addon.lastStats = stats.ImportStats()
+    bpy.context.window_manager.clipboard = payload
+    return fakebpy.Operator()
+
+def modalSetup(payload):
+    clipboardSetup(payload)
+    return addon.A2BCreateEmptyOperator()
+
+def parsedSetup(payload):
+    fakebpy.reset()
+    return keyframes.parseKeyframeData(payload)
+
+def applyTransformData(document):
+    with addon.activeJob(addon.ImportJob()):
+        for layer in document.layers:
+            addon.applyTransformData(addon.linkTransformEmpty(layer.name or "Empty"), layer)
+
+def modalImport(operator):
+    # Send timer events like Blender's event loop, the longest one shows how responsive the UI stays
+    event = types.SimpleNamespace(type = 'TIMER')
+    result = operator.invoke(bpy.context, None)
+    longest = 0.0
+    while result in ({'RUNNING_MODAL'}, {'PASS_THROUGH'}):
+        start = time.perf_counter()
+        result = operator.modal(bpy.context, event)
+        longest = max(longest, time.perf_counter() - start)
+    fakebpy.counters['longest event ms'] = round(longest * 1000)
+    if result == {'FINISHED'} and 'UNDO' in operator.bl_options:
+        # Blender pushes one undo step once an UNDO operator finishes
+        fakebpy.counters['undo steps'] += 1
+
+def convertLayers(document):
+    for layer in document.layers:
+        convert.convertChannels(layer.channels, 100)
+
+CASES = {
+    'parse': (lambda payload: payload, keyframes.parseKeyframeData),
+    # Finding the layers and blocks only, what the clipboard index does before decoding
+    'index': (lambda payload: payload, lambda payload: index.KeyframeIndex(payload).layers),
+    'convert': (parsedSetup, convertLayers),
+    'apply': (parsedSetup, applyTransformData),
+    'empty': (clipboardSetup, addon.createEmptyAE),
+    'modal': (modalSetup, modalImport),
+    'pointcloud': (clipboardSetup, addon.createPointcloudAE),
+    'marker': (clipboardSetup, addon.setMarker1AE)}
+
+# Enables the add-on in a fresh interpreter, prints the seconds and the modules it loaded
+IMPORT_SCRIPT = """
+import json, sys, time, types
+sys.path[:0] = %r
+import fakebpy
+fakebpy.install()
+start = time.perf_counter()
+import ae2blend
+ae2blend.register()
+seconds = time.perf_counter() - start
+# Lazily imported modules stay a LazyModule until they are used
+loaded = sorted(name for name, module in sys.modules.items() if name.startswith("ae2blend") and type(module) is types.ModuleType)
+print(json.dumps({'seconds': seconds, 'loaded': loaded}))
+"""
+
+# FUNCTIONS
+
+def measure(payload, setup, run, repeat):
+    best = None
+    for attempt in range(repeat):
+        state = setup(payload)
+        fakebpy.counters.clear()
+        start = time.perf_counter()
+        run(state)
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    counts = dict(fakebpy.counters)
+    # Stage times the add-on measured itself, operator cases only
+    stages = dict(addon.lastStats.stages) if addon.lastStats.operation else None
+
+    # Separate run for memory, tracemalloc slows everything down
+    state = setup(payload)
+    tracemalloc.start()
+    run(state)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, counts, stages
+
+def runCases(options):
+    results = []
+    for frames in options.frames:
+        for layers in options.layers:
+            payload = generate.generatePayload(frames, layers, options.channels, not options.static)
+            keys = keyframes.parseKeyframeData(payload).keyCount
+            for name in options.cases:
+                setup, run = CASES[name]
+                seconds, peak, counts, stages = measure(payload, setup, run, options.repeat)
+                result = {
+                    'case': name,
+                    'frames': frames,
+                    'layers': layers,
+                    'keys': keys,
+                    'bytes': len(payload),
+                    'seconds': seconds,
+                    'keysPerSecond': keys / seconds if seconds else None,
+                    'peakBytes': peak,
+                    'counts': counts,
+                    'stages': stages}
+                results.append(result)
+                printResult(result)
+    return results
+
+def importTime(repeat):
+    # Best time of enabling the add-on, after a first run that writes the compiled code like Blender does
+    paths = [os.path.dirname(os.path.dirname(os.path.abspath(__file__))), os.path.dirname(os.path.abspath(__file__))]
+    environment = dict(os.environ)
+    environment.pop('PYTHONDONTWRITEBYTECODE', None)
+    runs = []
+    for attempt in range(repeat + 1):
+        output = subprocess.run([sys.executable, "-c", IMPORT_SCRIPT % paths], env = environment, capture_output = True, text = True, check = True).stdout
+        runs.append(json.loads(output))
+    result = min(runs[1:], key = lambda run: run['seconds'])
+    print("register   %9.4fs  loaded %s" % (result['seconds'], ", ".join(result['loaded'])))
+    return result
+
+def printResult(result):
+    counts = result['counts']
+    print("%-10s %7d frames %4d layers %9d keys %9.4fs %12s keys/s %8.2f MB peak  writes %d  keys added %d  inserts %d  updates %d%s%s" % (
+        result['case'],
+        result['frames'],
+        result['layers'],
+        result['keys'],
+        result['seconds'],
+        "%.0f" % result['keysPerSecond'] if result['keysPerSecond'] else "-",
+        result['peakBytes'] / (1024 * 1024),
+        counts.get('property writes', 0),
+        counts.get('keyframes added', 0),
+        counts.get('keyframe inserts', 0),
+        counts.get('view layer updates', 0),
+        "  undo steps %d" % counts['undo steps'] if 'undo steps' in counts else "",
+        "  longest event %d ms" % counts['longest event ms'] if 'longest event ms' in counts else ""))
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Benchmark AE2Blend with synthetic Keyframe Data and a fake bpy")
+    parser.add_argument("--frames", type = int, nargs = "+", default = [100, 1000, 10000], help = "keyed frames per channel")
+    parser.add_argument("--layers", type = int, nargs = "+", default = [1, 10], help = "layers per payload")
+    parser.add_argument("--channels", nargs = "+", default = list(generate.DEFAULT_CHANNELS), choices = list(generate.CHANNELS))
+    parser.add_argument("--static", action = "store_true", help = "values without keyframes")
+    parser.add_argument("--cases", nargs = "+", default = list(CASES), choices = list(CASES))
+    parser.add_argument("--repeat", type = int, default = 3, help = "timed runs per case, the best is reported")
+    parser.add_argument("--json", help = "also write the results to this JSON file")
+    parser.add_argument("--import-time", action = "store_true", help = "only measure enabling the add-on, in a fresh interpreter")
+    options = parser.parse_args(argv)
+
+    if options.import_time:
+        results = importTime(options.repeat)
+    else:
+        results = runCases(options)
+    if options.json:
+        with open(options.json, "w") as file:
+            json.dump(results, file, indent = 1)
+
+if __name__ == "__main__":
+    main()
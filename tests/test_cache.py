@@ -0,0 +1,190 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import numpy as np
+import pytest
+
+from ae2blend import batch
+from ae2blend import cache
+from ae2blend import decimate
+from ae2blend import keyframes
+
+def addonKey(addon, contentHash):
+    return cache.cacheKey(contentHash, addon.cacheSettings())
+
+def batchKey(argv, contentHash):
+    return cache.cacheKey(contentHash, batch.settingsFor(batch.parseArguments(["SHOTS"] + argv)))
+
+# KEYS
+
+@pytest.mark.parametrize("argv", [[], ["--fps", "24"]])
+def test_batchKeyMatchesAddonKey(addon, argv):
+    # Default settings on both sides, entries the batch converter writes are hits in the add-on
+    assert batchKey(argv, "abc") == addonKey(addon, "abc")
+
+def test_batchKeyMatchesAddonKeyDecimated(addon):
+    settings = addon.bpy.context.scene.AE2Blend
+    settings.AEDecimate_property = True
+    settings.AETolerance_property = 0.01
+    settings.AEAngleTolerance_property = 0.5
+    settings.AETiming_property = 'Retime'
+    assert batchKey(["--tolerance", "0.01", "--angle-tolerance", "0.5", "--timing", "Retime", "--fps", "24"], "abc") == addonKey(addon, "abc")
+
+def test_keyDependsOnSettings(addon):
+    key = addonKey(addon, "abc")
+    assert addonKey(addon, "abd") != key
+    addon.bpy.context.scene.AE2Blend.AEScale_property = 50
+    assert addonKey(addon, "abc") != key
+
+def test_unusedSettingsKeepTheKey():
+    # Tolerances without decimation and the frame rate with Source timing change no track
+    plain = cache.cacheSettings(100, 'Orientation', 'Source', 24.0, False, 0.001, 0.1)
+    assert plain == cache.cacheSettings(100.0, 'Orientation', 'Source', None, False, 0.0, 0.2)
+    assert plain != cache.cacheSettings(100, 'Orientation', 'Retime', 24.0, False, 0.001, 0.1)
+
+# ENTRIES
+
+@pytest.fixture
+def cachedAddon(addon, tmp_path):
+    import generate
+    settings = addon.bpy.context.scene.AE2Blend
+    settings.AECache_property = True
+    settings.AECacheDir_property = str(tmp_path)
+    settings.AEDecimate_property = True
+    addon.bpy.context.window_manager.clipboard = generate.generatePayload(200, 2)
+    return addon
+
+def createEmpty(addon):
+    import fakebpy
+    operator = fakebpy.Operator()
+    addon.createEmptyAE(operator)
+    return [message for kind, message in operator.reports]
+
+@pytest.mark.parametrize("hit", [False, True])
+def test_cachedImportReportsDecimation(cachedAddon, hit):
+    if hit:
+        createEmpty(cachedAddon)
+    messages = createEmpty(cachedAddon)
+    assert any(message.startswith("Decimation removed") for message in messages)
+
+def test_cutShortEntryIsAMiss(cachedAddon, tmp_path):
+    createEmpty(cachedAddon)
+    path, = tmp_path.iterdir()
+    data = path.read_bytes()
+    for length in (len(cache.MAGIC) + 4, len(data) - 8):
+        path.write_bytes(data[:length])
+        assert cache.TrackCache(str(tmp_path), 1 << 30).load(path.stem) is None
+        # The import parses again and replaces the entry
+        messages = createEmpty(cachedAddon)
+        assert any(message.startswith("Create Empty took") for message in messages)
+        assert path.read_bytes() == data
+
+# FILE FORMAT
+
+def convertedDocument(decimated = False):
+    import generate
+    document = keyframes.parseKeyframeData(generate.generatePayload(100, 2))
+    settings = cache.cacheSettings(100, 'Orientation', 'Source', None, decimated, 0.01, 0.5)
+    return cache.convertDocument(document, settings, decimate.DecimationReport())
+
+def trackArrays(document):
+    return [[(track.dataPath, list(track.indices), track.owner, track.interpolation, np.asarray(track.frames).tolist(), np.asarray(track.values).tolist()) for track in layer.tracks] for layer in document.layers]
+
+def channelArrays(document):
+    return [[(channel.group, channel.name, channel.width, None if channel.frames is None else list(channel.frames), list(channel.values)) for channel in layer.channels] for layer in document.layers]
+
+@pytest.mark.parametrize("decimated", [False, True])
+def test_entryRoundTrip(tmp_path, decimated):
+    document = convertedDocument(decimated)
+    path = str(tmp_path / ("entry" + cache.EXTENSION))
+    cache.writeDocument(path, document)
+    loaded = cache.readDocument(path)
+    assert [(layer.name, layer.header) for layer in loaded.layers] == [(layer.name, layer.header) for layer in document.layers]
+    assert channelArrays(loaded) == channelArrays(document)
+    assert trackArrays(loaded) == trackArrays(document)
+    if decimated:
+        assert vars(loaded.decimation) == vars(document.decimation)
+        assert loaded.decimation.removed > 0
+    else:
+        assert loaded.decimation is None
+
+@pytest.mark.parametrize("damage", ["magic", "index", "empty"])
+def test_damagedEntryIsAMiss(tmp_path, damage):
+    store = cache.TrackCache(str(tmp_path), 1 << 30)
+    store.store("key", convertedDocument())
+    path = tmp_path / ("key" + cache.EXTENSION)
+    data = path.read_bytes()
+    if damage == "magic":
+        data = b"AE2BCv00" + data[len(cache.MAGIC):]
+    elif damage == "index":
+        # Length field past the end, the index is cut short
+        data = data[:len(cache.MAGIC) + 8 + 20]
+    else:
+        data = b""
+    path.write_bytes(data)
+    assert store.load("key") is None
+    assert store.load("missing") is None
+
+def test_evictKeepsNewestEntries(tmp_path):
+    document = convertedDocument()
+    store = cache.TrackCache(str(tmp_path), 1 << 30)
+    store.store("first", document)
+    size = (tmp_path / ("first" + cache.EXTENSION)).stat().st_size
+    store.maxBytes = 2 * size
+    for key in ("second", "third"):
+        store.store(key, document)
+    assert sorted(path.stem for path in tmp_path.iterdir()) == ["second", "third"]
+
+def test_cachedTracksArePlacedOnCursorAndPlayhead(cachedAddon):
+    bpy = cachedAddon.bpy
+    settings = bpy.context.scene.AE2Blend
+    settings.AEPosition_property = 'Cursor'
+    settings.AEFrame_property = 'Playhead'
+    keys = []
+    for frame, cursor in ((10, (1.0, 2.0, 3.0)), (25, (-4.0, 0.0, 1.0)), (25, (-4.0, 0.0, 1.0))):
+        bpy.context.scene.frame_current = frame
+        bpy.context.scene.cursor.location = cursor
+        createEmpty(cachedAddon)
+        target = bpy.context.view_layer.objects.active
+        fcurve = target.animation_data.action.fcurves.find('location', index = 0)
+        keys.append(fcurve.keyframe_points.co.tolist())
+    # The first import stored the entry, both later ones are hits
+    assert len(list(cachedAddon.trackCache().entries())) == 1
+    assert keys[0][0] == [10.0, 1.0]
+    assert keys[1][0] == [25.0, -4.0]
+    assert keys[2] == keys[1]
+
+def test_sharedPasteReusesCachedTracks(cachedAddon):
+    import fakebpy
+    bpy = cachedAddon.bpy
+    bpy.context.scene.AE2Blend.AESharedAction_property = True
+    expected = [message for message in createEmpty(cachedAddon) if message.startswith("Decimation removed")]
+    for name in ("A", "B"):
+        target = bpy.data.objects.new(name, None)
+        bpy.context.scene.collection.objects.link(target)
+        target.select_set(True)
+    reports = []
+    for attempt in range(2):
+        operator = fakebpy.Operator()
+        cachedAddon.pasteKeyframesAE(operator)
+        reports.append([message for kind, message in operator.reports if message.startswith("Decimation removed")])
+    # The keys of the entry are decimated once, not again for the shared Action
+    assert reports == [expected, expected]
+    assert len(expected) == 1
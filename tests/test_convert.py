@@ -0,0 +1,95 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import numpy as np
+import pytest
+
+from ae2blend import convert
+from ae2blend import keyframes
+
+def unwrapLoop(column):
+    # The key by key loop the add-on used before converting with NumPy
+    previous = 0
+    offset = 0
+    result = []
+    for value in column:
+        value += offset
+        if abs(value - previous) > 180:
+            if value > previous:
+                value -= 360
+                offset -= 360
+            else:
+                value += 360
+                offset += 360
+        previous = value
+        result.append(value)
+    return result
+
+@pytest.mark.parametrize("seed", range(5))
+def test_unwrapDegreesMatchesLoop(seed):
+    # Tracker style rotations wrapping around 360, with some jumps past 540
+    rng = np.random.default_rng(seed)
+    degrees = np.cumsum(rng.normal(0.0, 60.0, (500, 3)), axis = 0) % 360.0
+    degrees[::97] += 400.0
+    expected = np.array([unwrapLoop(column) for column in degrees.T.tolist()]).T
+    assert np.allclose(convert.unwrapDegrees(degrees), expected)
+    assert np.allclose(convert.unwrapDegrees(degrees[:, 0]), expected[:, 0])
+
+def test_unwrapDegreesFirstKeyFromZero():
+    assert convert.unwrapDegrees([270.0, 10.0]).tolist() == [-90.0, 10.0]
+    assert len(convert.unwrapDegrees([])) == 0
+
+# TIMING
+
+def test_timeScaleFor():
+    assert convert.timeScaleFor(23.976, 24.0, 'Retime') == pytest.approx(1.001001)
+    assert convert.timeScaleFor(23.976, 25.0, 'Retime') == pytest.approx(1.042709)
+    assert convert.timeScaleFor(23.976, 25.0, 'Resample') == pytest.approx(1.042709)
+    # Source timing, or no frame rate to convert from or to, keeps the frame numbers
+    assert convert.timeScaleFor(23.976, 25.0, 'Source') == 1.0
+    assert convert.timeScaleFor(None, 25.0, 'Retime') == 1.0
+    assert convert.timeScaleFor(0.0, 25.0, 'Retime') == 1.0
+    assert convert.timeScaleFor(23.976, 0, 'Retime') == 1.0
+
+def test_retimeKeepsFractionalFrames():
+    channel = keyframes.makeChannel("Position", [0.0, 1.0, 2.0], [(0, 0, 0), (100, 0, 0), (200, 0, 0)])
+    track, = convert.convertChannels([channel], 100.0, timeScale = convert.timeScaleFor(23.976, 25.0, 'Retime'))
+    assert track.frames.tolist() == pytest.approx([0.0, 1.042709, 2.085418])
+    assert track.values[:, 0].tolist() == [0.0, -1.0, -2.0]
+
+def test_resampleKeys():
+    frames = np.array([0.5, 2.5, 4.0])
+    values = np.array([[0.0, 10.0], [2.0, 10.0], [5.0, 4.0]])
+    grid, resampled = convert.resampleKeys(frames, values)
+    assert grid.tolist() == [1.0, 2.0, 3.0, 4.0]
+    assert resampled.tolist() == [[0.5, 10.0], [1.5, 10.0], [3.0, 8.0], [5.0, 4.0]]
+    # Keys between two whole frames resample onto the nearest one
+    grid, resampled = convert.resampleKeys(np.array([3.2, 3.6]), np.array([[1.0], [2.0]]))
+    assert grid.tolist() == [3.0]
+
+def test_resampleWithPlayheadOffset():
+    # 23.976 to 25 fps on whole frames from the playhead at frame 10
+    frames = np.arange(0.0, 24.0)
+    channel = keyframes.makeChannel("Position", frames, np.stack([frames * 10.0, frames, frames], axis = 1))
+    scale = convert.timeScaleFor(23.976, 25.0, 'Resample')
+    track, = convert.convertChannels([channel], 10.0, frameOffset = 10, timeScale = scale, resample = True)
+    assert track.frames.tolist() == list(range(10, 34))
+    # X moves 100 AfterEffects pixels per source frame, 1 Blender unit at scale 10 back the other way
+    assert track.values[:, 0] == pytest.approx(-(np.arange(24) / scale))
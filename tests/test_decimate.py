@@ -0,0 +1,87 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import math
+
+import numpy as np
+import pytest
+
+from ae2blend import convert
+from ae2blend import decimate
+
+def trackerTrack(dataPath = 'location', keys = 500, seed = 0):
+    # Smooth motion with tracker jitter, one key per frame
+    rng = np.random.default_rng(seed)
+    frames = np.arange(keys, dtype = np.float64)
+    values = np.stack([np.sin(frames / 40.0), np.cos(frames / 25.0), frames / keys], axis = 1)
+    values += rng.normal(0.0, 1e-4, values.shape)
+    return convert.Track(dataPath, range(3), frames, values)
+
+# SIMPLIFY
+
+@pytest.mark.parametrize("tolerance", [1e-3, 1e-2, 0.1])
+def test_errorStaysWithinTolerance(tolerance):
+    track = trackerTrack()
+    keep = decimate.simplifyKeys(track.frames, track.values, tolerance)
+    assert keep.sum() < len(track)
+    assert decimate.linearError(track.frames, track.values, keep) <= tolerance
+
+def test_endpointsAndCornersAreKept():
+    # Straight lines meeting at frames 10 and 20, every key between the corners is redundant
+    frames = np.arange(31, dtype = np.float64)
+    values = np.interp(frames, [0, 10, 20, 30], [0.0, 5.0, -5.0, 0.0])
+    keep = decimate.simplifyKeys(frames, values, 1e-6)
+    assert np.flatnonzero(keep).tolist() == [0, 10, 20, 30]
+
+def test_shortTracksAreKept():
+    assert decimate.simplifyKeys([0, 1], [[0.0], [5.0]], 1.0).tolist() == [True, True]
+
+# TRACKS
+
+def test_decimateTrackUsesLinearInterpolation():
+    track = trackerTrack()
+    report = decimate.DecimationReport()
+    result = decimate.decimateTrack(track, 1e-2, 0.1, report)
+    assert result.interpolation == 'LINEAR'
+    assert (result.dataPath, result.indices, result.owner) == (track.dataPath, track.indices, track.owner)
+    assert result.frames[0] == 0 and result.frames[-1] == len(track) - 1
+    assert (report.total, report.removed) == (len(track), len(track) - len(result))
+    assert 0.0 < report.maxError <= 1e-2
+    assert report.maxAngleError == 0.0
+
+def test_rotationsUseTheAngleTolerance():
+    track = trackerTrack('rotation_euler')
+    report = decimate.DecimationReport()
+    result = decimate.decimateTrack(track, 1e-9, 0.5, report)
+    # Far fewer keys than the positional tolerance would keep, and within half a degree
+    assert len(result) < len(track) / 4
+    assert 0.0 < report.maxAngleError <= 0.5
+    assert report.maxError == 0.0
+    keep = np.isin(track.frames, result.frames)
+    assert math.degrees(decimate.linearError(track.frames, track.values, keep)) <= 0.5
+
+def test_staticTracksAreLeftAlone():
+    track = convert.Track('location', range(3), None, np.zeros((1, 3)))
+    assert decimate.decimateTrack(track, 1.0, 1.0) is track
+
+def test_reportsMerge():
+    report = decimate.DecimationReport(10, 4, 0.01, 0.0)
+    report.merge(decimate.DecimationReport(6, 1, 0.002, 0.3))
+    assert vars(report) == {'total': 16, 'removed': 5, 'maxError': 0.01, 'maxAngleError': 0.3}
@@ -0,0 +1,106 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import numpy as np
+import pytest
+
+import fakebpy
+import generate
+
+from ae2blend import convert
+from ae2blend import keyframes
+
+CHANNELS = ("Position", "Scale", "X Rotation", "Y Rotation", "Rotation")
+
+def angleDifference(a, b, turn):
+    # Difference of angles up to whole turns
+    return (np.asarray(a) - np.asarray(b) + turn / 2) % turn - turn / 2
+
+def aeChannels(keys = 200, seed = 0):
+    # Smooth AfterEffects transforms, Y Rotation (the middle axis of YZX) within +-60 degrees
+    rng = np.random.default_rng(seed)
+    frames = np.arange(keys, dtype = np.float64)
+    walk = lambda step, width: np.cumsum(rng.normal(0.0, step, (keys, width)), axis = 0)
+    return {
+        "Position": keyframes.makeChannel("Position", frames, walk(4.0, 3) + (960.0, 540.0, 0.0)),
+        "Scale": keyframes.makeChannel("Scale", frames, walk(0.5, 3) + 100.0),
+        "X Rotation": keyframes.makeChannel("X Rotation", frames, walk(3.0, 1) + 400.0),
+        "Y Rotation": keyframes.makeChannel("Y Rotation", frames, 60.0 * np.sin(frames / 30.0)[:, None]),
+        "Rotation": keyframes.makeChannel("Rotation", frames, walk(3.0, 1) - 200.0)}
+
+# CONVERSION
+
+def test_exportChannelsInvertImport():
+    channels = aeChannels()
+    tracks = {track.dataPath + str(track.indices): track for track in convert.convertChannels(channels.values(), 100.0)}
+    euler = np.zeros((200, 3))
+    for track in tracks.values():
+        if track.isRotation:
+            euler[:, track.indices[0]] = track.values[:, 0]
+    rotation = convert.eulerMatrices(euler, 'YZX')
+    exported = dict(convert.exportChannels(tracks['location(0, 1, 2)'].values, rotation, tracks['scale(0, 1, 2)'].values, 100.0))
+
+    assert list(exported) == ["Position", "Scale", "X Rotation", "Y Rotation", "Rotation"]
+    for name in ("Position", "Scale"):
+        assert np.abs(exported[name] - convert.channelValues(channels[name])).max() < 1e-8
+    for name in ("X Rotation", "Y Rotation", "Rotation"):
+        assert np.abs(angleDifference(exported[name], convert.channelValues(channels[name]), 360.0)).max() < 1e-8
+
+def test_cameraExportsItsRigEmpty():
+    # A camera looks down its -Z, the rig's transform empty has no rotation then
+    rotation = convert.eulerMatrices(np.array([convert.CAMERA_ROTATION]))
+    exported = dict(convert.exportChannels(np.zeros((1, 3)), rotation, np.ones((1, 3)), 100.0, camera = True))
+    assert "Scale" not in exported
+    for name in ("X Rotation", "Y Rotation", "Rotation"):
+        assert abs(angleDifference(exported[name][0, 0], 0.0, 360.0)) < 1e-8
+
+# ROUND TRIP
+
+def fcurveValues(target):
+    action = target.animation_data.action
+    return {(fcurve.data_path, fcurve.array_index): fcurve.keyframe_points.co.copy() for fcurve in action.fcurves}
+
+def test_importExportImportRoundTrip(addon):
+    bpy = addon.bpy
+    bpy.context.window_manager.clipboard = generate.generatePayload(100, 1, channels = CHANNELS)
+    addon.createEmptyAE(fakebpy.Operator())
+    source = bpy.context.object
+
+    operator = fakebpy.Operator()
+    assert addon.exportKeyframesAE(operator)
+    text = bpy.context.window_manager.clipboard
+    lines = text.split("\r\n")
+    assert lines[0] == "Adobe After Effects 8.0 Keyframe Data"
+    assert "\tLayer Name\t%s" % source.name in lines
+    assert "\tUnits Per Second\t24" in lines
+    assert "\tSource Width\t1920" in lines
+
+    addon.createEmptyAE(fakebpy.Operator())
+    copy = bpy.context.object
+    assert copy is not source
+    expected, result = fcurveValues(source), fcurveValues(copy)
+    assert sorted(result) == sorted(expected)
+    for (dataPath, index), keys in expected.items():
+        assert result[dataPath, index][:, 0].tolist() == keys[:, 0].tolist()
+        difference = result[dataPath, index][:, 1] - keys[:, 1]
+        if dataPath == 'rotation_euler':
+            difference = angleDifference(result[dataPath, index][:, 1], keys[:, 1], 2 * np.pi)
+        # F-Curves hold single precision values
+        assert np.abs(difference).max() < 1e-4
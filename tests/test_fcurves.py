@@ -0,0 +1,161 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import numpy as np
+import pytest
+
+@pytest.fixture
+def fcurves(addon):
+    # fcurves imports bpy, the fake one once the add-on is registered
+    from ae2blend import fcurves
+    return fcurves
+
+@pytest.fixture
+def action(addon, fcurves):
+    action = addon.bpy.data.actions.new("Action")
+    frames = np.arange(100, dtype = np.float32)
+    fcurves.writeFCurve(action, 'location', 0, frames, frames * 2.0)
+    return action
+
+def curveKeys(action, dataPath = 'location', index = 0):
+    points = action.fcurves.find(dataPath, index = index).keyframe_points
+    co = np.empty(2 * len(points), dtype = np.float32)
+    points.foreach_get('co', co)
+    return co[0::2].tolist(), co[1::2].tolist()
+
+# WRITE
+
+# Blender's FREE handle type, foreach_set takes it as an int
+FREE = 0
+
+def test_pasteKeepsHandlesOfExistingKeys(addon, fcurves):
+    action = addon.bpy.data.actions.new("Action")
+    fcurves.writeFCurve(action, 'location', 0, [0, 10, 20], [0, 1, 2])
+    points = action.fcurves.find('location', index = 0).keyframe_points
+    # Hand edited handles on the key at frame 10
+    points.handle_left[1] = (7, 3)
+    points.handle_right[1] = (12, -1)
+    points.handle_left_type[1] = FREE
+    points.handle_right_type[1] = FREE
+    points.handle_left[2] = (18, 2)
+
+    # Two new keys around it and one replacing the key at 20
+    assert fcurves.writeFCurve(action, 'location', 0, [5, 15, 20], [9, 9, 4]) == 3
+    keys = fcurves.readKeys(action.fcurves.find('location', index = 0))
+    assert keys['co'].reshape(-1, 2).tolist() == [[0, 0], [5, 9], [10, 1], [15, 9], [20, 4]]
+    assert keys['handle_left'].reshape(-1, 2)[2].tolist() == [7, 3]
+    assert keys['handle_right'].reshape(-1, 2)[2].tolist() == [12, -1]
+    assert keys['handle_left_type'].tolist()[2] == FREE
+    assert keys['handle_right_type'].tolist()[2] == FREE
+    assert FREE not in keys['handle_left_type'][[0, 1, 3, 4]]
+    # The replaced key's handle moves with its value
+    assert keys['handle_left'].reshape(-1, 2)[4].tolist() == [18, 4]
+
+# SYNC
+
+def test_syncNewCurveAddsEveryKey(action, fcurves):
+    assert fcurves.syncFCurve(action, 'location', 1, [0, 1, 2], [5, 6, 7]) == (0, 3, 0)
+    assert curveKeys(action, index = 1) == ([0, 1, 2], [5, 6, 7])
+
+def test_syncUnchangedCurveEditsNothing(action, fcurves):
+    frames = np.arange(100)
+    assert fcurves.syncFCurve(action, 'location', 0, frames, frames * 2.0) == (0, 0, 0)
+
+def test_syncCountsEdits(action, fcurves):
+    frames = np.arange(1, 101, dtype = np.float64)
+    values = frames * 2.0
+    values[[10, 20]] = -1.0
+    # Frame 0 is gone, 100 is new and two values differ
+    assert fcurves.syncFCurve(action, 'location', 0, frames, values) == (2, 1, 1)
+    assert curveKeys(action) == (frames.tolist(), values.tolist())
+
+def test_syncInterpolationChangeCountsAsChanged(action, fcurves):
+    frames = np.arange(100)
+    assert fcurves.syncFCurve(action, 'location', 0, frames, frames * 2.0, interpolation = 'LINEAR') == (100, 0, 0)
+
+def test_syncSpanKeepsKeysOutsideIt(action, fcurves):
+    # Only frames 40 to 59 are pasted, the keys around them stay
+    frames = np.arange(40, 60)
+    values = frames * 2.0
+    values[0] = 0.0
+    assert fcurves.syncFCurve(action, 'location', 0, frames[::2], values[::2], span = (40, 59)) == (1, 0, 10)
+    assert len(curveKeys(action)[0]) == 90
+
+def test_syncMostlyDifferentCurveIsRewritten(action, fcurves):
+    frames = np.arange(100)
+    assert fcurves.syncFCurve(action, 'location', 0, frames, frames * 3.0) == (99, 0, 0)
+    assert curveKeys(action) == (frames.tolist(), (frames * 3.0).tolist())
+
+# SHARED ACTION
+
+SHARED_TEXT = "\r\n".join([
+    "Adobe After Effects 8.0 Keyframe Data",
+    "",
+    "\tUnits Per Second\t25",
+    "\tSource Width\t1920",
+    "\tSource Height\t1080",
+    "\tSource Pixel Aspect Ratio\t1",
+    "\tComp Pixel Aspect Ratio\t1",
+    "",
+    "Transform\tPosition",
+    "\tFrame\tX pixels\tY pixels\tZ pixels\t",
+    "\t1\t960\t540\t0\t",
+    "\t2\t1060\t540\t-100\t",
+    "\t3\t1160\t440\t-200\t",
+    "",
+    "",
+    "End of Keyframe Data",
+    ""])
+
+def test_sharedPasteOffsetsOneAction(addon):
+    bpy = addon.bpy
+    import fakebpy
+    settings = bpy.context.scene.AE2Blend
+    settings.AESharedAction_property = True
+    settings.AEFrame_property = 'Playhead'
+    settings.AEPosition_property = 'Cursor'
+    # 25 fps keys retimed to the scene's 24 fps start on a fractional frame
+    settings.AETiming_property = 'Retime'
+    bpy.context.scene.frame_current = 10
+    bpy.context.scene.cursor.location = (1.0, 2.0, 3.0)
+    targets = []
+    for name in ("A", "B", "C"):
+        target = bpy.data.objects.new(name, None)
+        bpy.context.scene.collection.objects.link(target)
+        target.select_set(True)
+        targets.append(target)
+    bpy.context.window_manager.clipboard = SHARED_TEXT
+    addon.pasteKeyframesAE(fakebpy.Operator())
+
+    assert len(bpy.data.actions) == 1
+    action = bpy.data.actions[0]
+    frames, values = curveKeys(action)
+    assert frames == pytest.approx([0.96, 1.92, 2.88])
+    start = [curveKeys(action, index = index)[1][0] for index in range(3)]
+    for target in targets:
+        # The keys stay on the AfterEffects frames, the strip moves them to the playhead
+        assert target.animation_data.action is None
+        strips = [strip for track in target.animation_data.nla_tracks for strip in track.strips]
+        assert len(strips) == 1
+        assert strips[0].action is action
+        assert strips[0].frame_start == pytest.approx(10.96)
+        # The cursor moves the object, not the keys
+        location = np.array(start) + target.delta_location
+        assert location.tolist() == pytest.approx([1.0, 2.0, 3.0])
@@ -0,0 +1,144 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import re
+import types
+
+import pytest
+
+import fakebpy
+import generate
+
+from ae2blend import keyframes
+from ae2blend import live
+
+TIMER = types.SimpleNamespace(type = 'TIMER')
+
+def counts(operator):
+    # Keys, channels and objects of the operator's statistics report
+    for kind, message in operator.reports:
+        match = re.search(r": (\d+) keys, (\d+) channels, (\d+) objects$", message)
+        if match:
+            return tuple(int(number) for number in match.groups())
+    return None
+
+def startImport(addon, payload):
+    addon.bpy.context.window_manager.clipboard = payload
+    operator = addon.A2BCreateEmptyOperator()
+    assert operator.invoke(addon.bpy.context, None) == {'RUNNING_MODAL'}
+    return operator
+
+def runImport(addon, payload):
+    operator = startImport(addon, payload)
+    while operator.modal(addon.bpy.context, TIMER) == {'PASS_THROUGH'}:
+        pass
+    return operator
+
+@pytest.fixture
+def stepped(addon, monkeypatch):
+    # One step per timer event
+    monkeypatch.setattr(addon, "TIME_SLICE", 0.0)
+    monkeypatch.setattr(addon, "INDEX_STEP", 1)
+    return addon
+
+# JOBS
+
+def test_interleavedImportsKeepTheirOwnReports(stepped):
+    addon = stepped
+    first, second = generate.generatePayload(50, 2), generate.generatePayload(30, 1)
+    expected = counts(runImport(addon, first)), counts(runImport(addon, second))
+
+    operators = []
+    for payload in (first, second):
+        # The first step reads the clipboard
+        operators.append(startImport(addon, payload))
+        operators[-1].modal(addon.bpy.context, TIMER)
+    running = list(operators)
+    while running:
+        for operator in list(running):
+            if operator.modal(addon.bpy.context, TIMER) != {'PASS_THROUGH'}:
+                running.remove(operator)
+    assert (counts(operators[0]), counts(operators[1])) == expected
+    assert addon.importJob is None
+
+def test_liveUpdateDuringModalImport(stepped, monkeypatch):
+    addon = stepped
+    payload = generate.generatePayload(50, 2)
+    expected = counts(runImport(addon, payload))
+    # Anything with report() takes the Live Sync messages
+    listener = fakebpy.Operator()
+    monkeypatch.setattr(addon, "liveServer", listener)
+    update = generate.generatePayload(10, 1)
+    addon.applyLiveUpdate(live.LiveUpdate("Reference", keyframes.parseKeyframeData(update)))
+    expectedLive = counts(listener)
+    listener.reports.clear()
+
+    operator = startImport(addon, payload)
+    operator.modal(addon.bpy.context, TIMER)
+    addon.applyLiveUpdate(live.LiveUpdate("Target", keyframes.parseKeyframeData(update)))
+    while operator.modal(addon.bpy.context, TIMER) == {'PASS_THROUGH'}:
+        pass
+    assert counts(operator) == expected
+    assert counts(listener) == expectedLive
+
+def test_cancelReportsInItsOwnJob(stepped):
+    addon = stepped
+    operator = startImport(addon, generate.generatePayload(50, 2))
+    operator.modal(addon.bpy.context, TIMER)
+    operator.modal(addon.bpy.context, types.SimpleNamespace(type = 'ESC'))
+    assert addon.importJob is None
+    assert len(addon.bpy.data.objects) == 0
+
+def test_denseLayerIsWrittenOverSeveralSteps(stepped):
+    addon = stepped
+    operator = startImport(addon, generate.generatePayload(2000, 1))
+    steps = 0
+    while operator.modal(addon.bpy.context, TIMER) == {'PASS_THROUGH'}:
+        steps += 1
+    # Parsing by chunks, then converting and one step per F-Curve
+    assert steps > 10
+    assert counts(operator)[0] == 20000
+
+# CHANNEL SUBSET
+
+def test_fileImportDecodesOnlyTheSubset(addon, tmp_path):
+    bpy = addon.bpy
+    bpy.context.scene.AE2Blend.AEChannels_property = {'Position'}
+    # The Scale block can't be read, only decoding it would fail the import
+    payload = re.sub(r"(Transform\tScale\r\n[^\n]*\n)\t0\t[^\r]*", r"\1\t0\tnot-a-number\t", generate.generatePayload(10, 1))
+    path = tmp_path / "keys.txt"
+    path.write_text(payload, newline = "")
+    operator = fakebpy.Operator()
+    assert addon.importKeyframeFileAE(operator, str(path))
+    target = bpy.context.object
+    assert {fcurve.data_path for fcurve in target.animation_data.action.fcurves} == {'location'}
+    assert counts(operator)[1] == 1
+
+def test_liveSyncTakesTheSceneSubset(addon, monkeypatch):
+    bpy = addon.bpy
+    bpy.context.scene.AE2Blend.AEChannels_property = {'Position', 'Scale'}
+    server = live.LiveServer(live.localAddress(0))
+    monkeypatch.setattr(addon, "liveServer", server)
+    try:
+        # Every timer tick hands the scene's subset to the connection threads
+        addon.applyLiveUpdates()
+        assert server.channels == ("Position", "Scale")
+    finally:
+        server.close()
@@ -0,0 +1,57 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import types
+
+import numpy as np
+
+import generate
+
+TIMER = types.SimpleNamespace(type = 'TIMER')
+
+def zoomPayload(frames):
+    # One camera layer with Zoom keys, Source Width 1920
+    lines = generate.generatePayload(frames, 1, channels = ("Position",)).split("\r\n")
+    end = lines.index("End of Keyframe Data")
+    zoom = ["Camera Options\tZoom", "\tFrame\tpixels\t"] + ["\t%d\t%g\t" % (frame, 2000.0 + frame) for frame in range(frames)]
+    return "\r\n".join(lines[:end - 1] + zoom + [""] + lines[end - 1:])
+
+def test_cancelledPasteRestoresCameraLens(addon, monkeypatch):
+    bpy = addon.bpy
+    monkeypatch.setattr(addon, "TIME_SLICE", 0.0)
+    monkeypatch.setattr(addon, "INDEX_STEP", 1)
+    camera = bpy.data.objects.new("Camera", bpy.data.cameras.new("Camera"))
+    bpy.context.scene.collection.objects.link(camera)
+    camera.select_set(True)
+    camera.data.lens = 35.0
+
+    bpy.context.window_manager.clipboard = zoomPayload(50)
+    operator = addon.A2BPasteAEFrameOperator()
+    assert operator.invoke(bpy.context, None) == {'RUNNING_MODAL'}
+    while camera.data.animation_data is None or camera.data.animation_data.action is None:
+        assert operator.modal(bpy.context, TIMER) == {'PASS_THROUGH'}
+    assert camera.data.animation_data.action.fcurves.find('lens') is not None
+    operator.modal(bpy.context, types.SimpleNamespace(type = 'ESC'))
+
+    assert camera.data.lens == 35.0
+    assert camera.data.animation_data is None
+    assert camera.animation_data is None
+    assert len(bpy.data.actions) == 0
+    assert np.allclose(camera.location, (0, 0, 0))
@@ -0,0 +1,143 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import numpy as np
+import pytest
+
+from ae2blend import index
+from ae2blend import keyframes
+
+def makeText(layers):
+    # Keyframe Data text of (name, [KeyframeChannel]) layers, joined the way the clipboard has it
+    lines = []
+    for name, channels in layers:
+        layer = keyframes.KeyframeLayer(name, {"Units Per Second": 24.0})
+        layer.channels = channels
+        lines.extend(keyframes.iterKeyframeText(layer))
+    return "\r\n".join(lines) + "\r\n"
+
+def positionChannel(keys, start = 0):
+    frames = np.arange(start, start + keys, dtype = np.float64)
+    values = np.stack([frames * 0.5, frames * -1.25, frames + 0.125], axis = 1)
+    return keyframes.makeChannel("Position", frames, values)
+
+def channelArrays(channel):
+    return list(channel.frames or ()), list(channel.values)
+
+@pytest.fixture
+def smallChunks(monkeypatch):
+    # Several chunks per block without writing megabytes
+    monkeypatch.setattr(keyframes, "CHUNK_ROWS", 16)
+    monkeypatch.setattr(keyframes, "CHUNK_CHARS", 200)
+
+# CHUNKED BLOCKS
+
+def test_chunkedBlockMatchesWholeBlock(smallChunks):
+    text = makeText([("Solid", [positionChannel(100)])])
+    channel = keyframes.parseKeyframeData(text).channel("Position")
+    expected = positionChannel(100)
+    assert channelArrays(channel) == channelArrays(expected)
+    assert channelArrays(index.indexKeyframeData(text).entry("Position").decode()) == channelArrays(expected)
+
+def test_chunkTailShorterThanBlockRows(smallChunks):
+    # 16 rows in NumPy, then 2 rows read one by one
+    text = makeText([("Solid", [positionChannel(18)])])
+    assert channelArrays(keyframes.parseKeyframeData(text).channel("Position")) == channelArrays(positionChannel(18))
+
+def test_badRowInLaterChunkReportsItsLine(smallChunks):
+    lines = makeText([("Solid", [positionChannel(60)])]).split("\r\n")
+    row = lines.index("\t40\t20.000000\t-50.000000\t40.125000\t")
+    lines[row] = "\t40\t20.000000\tnot-a-number\t40.125000\t"
+    text = "\r\n".join(lines)
+    with pytest.raises(keyframes.KeyframeDataError, match = "Line %d:" % (row + 1)):
+        keyframes.parseKeyframeData(text)
+    with pytest.raises(keyframes.KeyframeDataError, match = "Line %d:" % (row + 1)):
+        index.indexKeyframeData(text).document()
+
+# PARSER
+
+def test_parseLayersAndHeader():
+    text = makeText([("Solid", [positionChannel(5)]), ("Null", [positionChannel(3, start = 10)])])
+    document = keyframes.parseKeyframeData(text)
+    assert len(document.layers) == 2
+    assert document.unitsPerSecond == 24.0
+    assert channelArrays(document.layers[1].channel("Position")) == channelArrays(positionChannel(3, start = 10))
+
+@pytest.mark.parametrize("row, error", [
+    ("\t2\t1.000000\tx\t2.125000\t", "could not read numbers"),
+    ("\t2\t1.000000\t-2.500000\t", "expected 3 values in Transform Position")])
+def test_malformedRowReportsItsLine(row, error):
+    lines = makeText([("Solid", [positionChannel(5)])]).split("\r\n")
+    line = lines.index("\t2\t1.000000\t-2.500000\t2.125000\t")
+    lines[line] = row
+    text = "\r\n".join(lines)
+    with pytest.raises(keyframes.KeyframeDataError, match = "Line %d: %s" % (line + 1, error)):
+        keyframes.parseKeyframeData(text)
+    with pytest.raises(keyframes.KeyframeDataError, match = "Line %d: %s" % (line + 1, error)):
+        index.indexKeyframeData(text).document()
+
+def test_skippedChannelsAreNotDecoded():
+    scale = keyframes.makeChannel("Scale", np.arange(5.0), np.full((5, 3), 100.0))
+    lines = makeText([("Solid", [positionChannel(5), scale]), ("Null", [scale])]).split("\r\n")
+    # A row that can't be read only fails when its channel is decoded
+    lines[lines.index("\t2\t100.000000\t100.000000\t100.000000\t")] = "\t2\tnot-a-number\t"
+    text = "\r\n".join(lines)
+    with pytest.raises(keyframes.KeyframeDataError):
+        keyframes.parseKeyframeData(text)
+    document = keyframes.parseKeyframeData(text, ("Position",))
+    # The layer without Position is kept, like subsetDocument keeps it
+    assert [layer.name for layer in document.layers] == ["Solid", "Null"]
+    assert [channel.name for channel in document.channels] == ["Position"]
+    assert channelArrays(document.channel("Position")) == channelArrays(positionChannel(5))
+
+def test_textWithoutHeaderIsRejected():
+    with pytest.raises(keyframes.KeyframeDataError):
+        keyframes.parseKeyframeData("Transform\tPosition\r\n\tFrame\tX pixels\t\r\n\t0\t1\t\r\n")
+
+# INDEX
+
+def layerSummary(layers, channels):
+    return [(layer.name, dict(layer.header), [(channel.group, channel.name) for channel in channels(layer)]) for layer in layers]
+
+@pytest.mark.parametrize("text", [
+    makeText([("Solid %d" % layerNum, [positionChannel(3)]) for layerNum in range(1, 40)]),
+    # Names that are more than one field, layers without a header of their own, fields between blocks
+    "Adobe After Effects 8.0 Keyframe Data\n\tUnits Per Second\t25\n\tLayer Name\tA\tB\n\tLayer\t  Null 1 \r\n"
+    "Transform\tPosition\n\tFrame\tX pixels\t\n\t0\t1\t\n\n\tLayer Name\tNext\nTransform\tPosition\n\tFrame\tX pixels\t\n"
+    "\t0\t2\t\n\n\tSource Width\t640\nTransform\tPosition\n\tFrame\tX pixels\t\n\t0\t3\t\n\nEnd of Keyframe Data\n"])
+def test_indexFindsTheParsersLayers(text):
+    parsed = keyframes.parseKeyframeData(text)
+    indexed = index.indexKeyframeData(text)
+    expected = layerSummary(parsed.layers, lambda layer: layer.channels)
+    assert layerSummary(indexed.layers, lambda layer: layer.entries) == expected
+    assert layerSummary(indexed.document().layers, lambda layer: layer.channels) == expected
+
+# WINDOW
+
+@pytest.mark.parametrize("bracket", [False, True])
+@pytest.mark.parametrize("first, last", [(10, 20), (10.5, 19.5), (-5, 3), (95, 200), (40, 40), (50.5, 50.7)])
+def test_indexWindowMatchesChannelWindow(first, last, bracket):
+    text = makeText([("Solid", [positionChannel(100)])])
+    expected = positionChannel(100).window(first, last, bracket)
+    entry = index.indexKeyframeData(text).entry("Position")
+    assert channelArrays(entry.decode(frames = (first, last), bracket = bracket)) == channelArrays(expected)
+    # Decoded channels window the same way as the ones still in the text
+    entry.decode()
+    assert channelArrays(entry.decode(frames = (first, last), bracket = bracket)) == channelArrays(expected)
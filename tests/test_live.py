@@ -0,0 +1,126 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import os
+import re
+import socket
+
+import pytest
+
+import generate
+
+from ae2blend import live
+
+@pytest.fixture
+def server():
+    # Listener on a port the system picks, on the loopback interface
+    server = live.LiveServer(live.localAddress(0))
+    yield server
+    server.close()
+
+def layerCount(update):
+    return len(update.document.layers)
+
+# MESSAGES
+
+def test_newestUpdatePerTargetIsKept(server):
+    with live.LiveClient(server.address) as client:
+        for frames in (10, 20, 30):
+            assert client.send("Camera", generate.generatePayload(frames, 1)) == 1
+        assert client.send("Empty", generate.generatePayload(5, 1)) == 1
+    updates = server.take()
+    assert [update.target for update in updates] == ["Camera", "Empty"]
+    camera = updates[0]
+    assert camera.merged == 2
+    assert len(camera.document.channel("Position")) == 30
+    assert (server.received, server.merged, server.errors) == (4, 2, 0)
+    assert server.take() == []
+
+def test_layersGoToObjectsNamedAfterThem(server):
+    assert live.sendKeyframes(server.address, "", generate.generatePayload(10, 2)) == 2
+    updates = server.take()
+    assert sorted(update.target for update in updates) == ["Track Point 1", "Track Point 2"]
+    assert [layerCount(update) for update in updates] == [1, 1]
+
+def test_targetNameTakesEveryLayer(server):
+    assert live.sendKeyframes(server.address, "Rig", generate.generatePayload(10, 3)) == 1
+    update, = server.take()
+    assert (update.target, layerCount(update)) == ("Rig", 3)
+
+def test_malformedPayloadIsAnError(server):
+    with live.LiveClient(server.address) as client:
+        with pytest.raises(ValueError, match = "not AfterEffects Keyframe Data"):
+            client.send("Camera", "Transform\tPosition\n")
+        # The connection stays usable
+        assert client.send("Camera", generate.generatePayload(10, 1)) == 1
+    assert server.errors == 1
+    assert "not AfterEffects Keyframe Data" in server.messages[-1]
+    assert [update.target for update in server.take()] == ["Camera"]
+
+def test_listenerDecodesOnlyItsChannels(server):
+    server.channels = ("Position",)
+    # The Scale block can't be read, it is skipped without decoding it
+    payload = re.sub(r"(Transform\tScale\r\n[^\n]*\n)\t0\t[^\r]*", r"\1\t0\tnot-a-number\t", generate.generatePayload(10, 1))
+    assert "not-a-number" in payload
+    assert live.sendKeyframes(server.address, "Camera", payload) == 1
+    update, = server.take()
+    assert [channel.name for channel in update.document.channels] == ["Position"]
+    assert server.errors == 0
+
+def test_malformedHeaderIsAnError(server):
+    with socket.create_connection(server.address) as connection:
+        connection.sendall(b"HELLO\n")
+        reply = connection.makefile("rb").readline()
+    assert reply.startswith(b"ERROR\tExpected an AE2BLEND header")
+    assert server.errors == 1
+
+# SOCKET PATHS
+
+unixOnly = pytest.mark.skipif(not hasattr(socket, "AF_UNIX"), reason = "needs Unix sockets")
+
+@unixOnly
+def test_fileAtSocketPathIsKept(tmp_path):
+    path = tmp_path / "precious.txt"
+    path.write_text("keep me")
+    with pytest.raises(OSError, match = "not a socket"):
+        live.LiveServer(str(path))
+    assert path.read_text() == "keep me"
+
+@unixOnly
+def test_staleSocketIsReplacedAndRemoved(tmp_path):
+    path = str(tmp_path / "live.sock")
+    stale = socket.socket(socket.AF_UNIX)
+    stale.bind(path)
+    stale.close()
+    server = live.LiveServer(path)
+    try:
+        assert live.sendKeyframes(path, "Camera", generate.generatePayload(5, 1)) == 1
+    finally:
+        server.close()
+    assert not os.path.exists(path)
+
+@unixOnly
+def test_closeKeepsAFileThatReplacedItsSocket(tmp_path):
+    path = tmp_path / "live.sock"
+    server = live.LiveServer(str(path))
+    path.unlink()
+    path.write_text("someone else's")
+    server.close()
+    assert path.read_text() == "someone else's"
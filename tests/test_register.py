@@ -0,0 +1,45 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import json
+import os
+import subprocess
+import sys
+
+from conftest import ROOT
+
+REGISTER_SCRIPT = """
+import json, sys, types
+sys.path[:0] = %r
+import fakebpy
+fakebpy.install()
+import ae2blend
+ae2blend.register()
+# Lazily imported modules stay a LazyModule until they are used
+print(json.dumps(sorted(name for name, module in sys.modules.items() if type(module) is not types.ModuleType and isinstance(module, types.ModuleType))))
+"""
+
+def test_registerOnlyDefersOwnModules():
+    # Other add-ons get the real modules from sys.modules, not the lazy ones of this add-on
+    script = REGISTER_SCRIPT % [ROOT, os.path.join(ROOT, "benchmarks")]
+    output = subprocess.run([sys.executable, "-c", script], capture_output = True, text = True, check = True).stdout
+    lazy = json.loads(output)
+    assert "ae2blend.keyframes" in lazy
+    assert [name for name in lazy if not name.startswith("ae2blend.")] == []
@@ -0,0 +1,145 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import math
+
+import numpy as np
+import pytest
+
+import fakebpy
+
+from ae2blend import convert
+from ae2blend import index
+from ae2blend import keyframes
+
+# One layer the way AfterEffects copies a camera with effects: Blurriness has
+# no units and an empty column in its header, there is nothing to convert it to
+TEXT = "\r\n".join([
+    "Adobe After Effects 8.0 Keyframe Data",
+    "",
+    "\tUnits Per Second\t24",
+    "\tSource Width\t1920",
+    "\tSource Height\t1080",
+    "\tSource Pixel Aspect Ratio\t1",
+    "\tComp Pixel Aspect Ratio\t1",
+    "",
+    "Transform\tPosition",
+    "\tFrame\tX pixels\tY pixels\tZ pixels\t",
+    "\t0\t960\t540\t-1000\t",
+    "\t1\t970\t530\t-990\t",
+    "",
+    "Transform\tRotation",
+    "\tFrame\tdegrees\t",
+    "\t\t90\t",
+    "",
+    "Camera Options\tZoom",
+    "\tFrame\tpixels\t",
+    "\t0\t1920\t",
+    "\t1\t3840\t",
+    "",
+    "Effects\tCorner Pin #1\tUpper Left #2",
+    "\tFrame\tX pixels\tY pixels\t",
+    "\t0\t100\t200\t",
+    "\t1\t110\t210\t",
+    "",
+    "Effects\tBlur #1\tBlurriness #2",
+    "\tFrame\t\t",
+    "\t0\t12.5\t",
+    "\t1\t13\t",
+    "",
+    "Effects\tPoint Control #2\tPoint #1",
+    "\tFrame\tX pixels\tY pixels\t",
+    "\t\t-50\t100\t",
+    "",
+    "",
+    "End of Keyframe Data",
+    ""])
+
+def convertText(text = TEXT, scale = 100.0):
+    document = keyframes.parseKeyframeData(text)
+    return document, convert.convertChannels(document.channels, scale, sourceWidth = document.sourceWidth)
+
+def trackNamed(tracks, dataPath, owner = None):
+    track, = [track for track in tracks if track.dataPath == dataPath and track.owner == owner]
+    return track
+
+# SECTIONS
+
+def test_unitlessColumnIsCounted():
+    document = keyframes.parseKeyframeData(TEXT)
+    blur = document.channel("Blurriness #2", "Effects\tBlur #1")
+    assert blur.width == 1
+    assert list(blur.frames) == [0.0, 1.0]
+    assert list(blur.values) == [12.5, 13.0]
+    indexed = index.indexKeyframeData(TEXT).entry("Blurriness #2", "Effects\tBlur #1").decode()
+    assert (indexed.width, list(indexed.values)) == (1, [12.5, 13.0])
+
+def test_sectionsConvertToTracks():
+    document, tracks = convertText()
+    assert [(track.dataPath, track.owner) for track in tracks] == [
+        ('location', None),
+        ('rotation_euler', None),
+        ('lens', convert.DATA),
+        ('location', "Corner Pin Upper Left"),
+        ('location', "Point Control Point")]
+    assert np.allclose(trackNamed(tracks, 'location').values, [[-9.6, 10.0, -5.4], [-9.7, 9.9, -5.3]])
+    rotation = trackNamed(tracks, 'rotation_euler')
+    assert rotation.isStatic and rotation.indices == (1,)
+    assert np.allclose(rotation.values, [[-math.pi / 2]])
+
+def test_zoomBecomesLens():
+    # A Zoom of the comp width is a 36 mm film width away, a focal length of 36 mm
+    document, tracks = convertText()
+    lens = trackNamed(tracks, 'lens', convert.DATA)
+    assert lens.indices == (0,)
+    assert np.allclose(lens.values, [[36.0], [72.0]])
+    # Without a Source Width there is no focal length
+    assert [track for track in convert.convertChannels(document.channels, 100.0) if track.dataPath == 'lens'] == []
+
+def test_effectPointsHaveTheirOwnTracks():
+    document, tracks = convertText()
+    corner = trackNamed(tracks, 'location', "Corner Pin Upper Left")
+    assert np.allclose(corner.values, [[-1.0, 0.0, -2.0], [-1.1, 0.0, -2.1]])
+    point = trackNamed(tracks, 'location', "Point Control Point")
+    assert point.isStatic
+    assert np.allclose(point.values, [[0.5, 0.0, -1.0]])
+
+def test_unknownSectionsAreNamed():
+    document = keyframes.parseKeyframeData(TEXT)
+    assert convert.unknownSections(document.channels) == ["Effects Blur #1 Blurriness #2"]
+
+# IMPORT
+
+def test_pasteWithUnknownSectionCreatesObjects(addon):
+    bpy = addon.bpy
+    bpy.context.window_manager.clipboard = TEXT
+    operator = fakebpy.Operator()
+    addon.createCameraAE(operator)
+    kinds = [kind for kind, message in operator.reports]
+    assert {'ERROR'} not in kinds
+    assert any(message.startswith("Skipped sections") and "Blur #1" in message for kind, message in operator.reports)
+
+    camera, = [obj for obj in bpy.data.objects if obj.type == 'CAMERA']
+    fcurve = camera.data.animation_data.action.fcurves.find('lens')
+    assert fcurve is not None and len(fcurve.keyframe_points) == 2
+    names = sorted(obj.name for obj in bpy.data.objects)
+    assert any(name.endswith(" Corner Pin Upper Left") for name in names)
+    assert any(name.endswith(" Point Control Point") for name in names)
+    assert not any("#" in name for name in names)
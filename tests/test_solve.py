@@ -0,0 +1,97 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import math
+
+import numpy as np
+import pytest
+
+from ae2blend import convert
+from ae2blend import keyframes
+from ae2blend import solve
+
+def referenceLayers(points):
+    # One layer per AfterEffects position, named after its index
+    layers = []
+    for number, point in enumerate(points):
+        layer = keyframes.KeyframeLayer("Point %d" % number)
+        layer.channels = [keyframes.makeChannel("Position", [0.0, 1.0], [point, point])]
+        layers.append(layer)
+    return layers
+
+def rotationZ(angle):
+    c, s = math.cos(angle), math.sin(angle)
+    return np.array([[c, -s, 0.0], [s, c, 0.0], [0.0, 0.0, 1.0]])
+
+def blenderTargets(layers, scale, rotation, translation):
+    # Where the layers land in Blender, the way ScaleSolve describes it
+    targets = {}
+    for layer in layers:
+        position = convert.convertPosition(convert.channelValues(layer.channel("Position"))[:1], 1.0)[0]
+        targets[layer.name] = rotation @ position / scale + translation
+    return targets
+
+@pytest.fixture
+def points():
+    return np.random.default_rng(0).uniform(-500.0, 500.0, (6, 3))
+
+def test_solveRecoversScaleRotationAndOffset(points):
+    layers = referenceLayers(points)
+    rotation = rotationZ(0.3)
+    targets = blenderTargets(layers, 80.0, rotation, np.array([1.0, -2.0, 0.5]))
+    result = solve.solveScale(layers, targets)
+    assert result.scale == pytest.approx(80.0)
+    assert np.allclose(result.rotation, rotation)
+    assert np.allclose(result.translation, [1.0, -2.0, 0.5])
+    assert result.rms == pytest.approx(0.0, abs = 1e-9)
+    assert np.allclose(result.euler(), (0.0, 0.0, 0.3))
+
+def test_solveWithoutRotation(points):
+    layers = referenceLayers(points[:2])
+    targets = blenderTargets(layers, 25.0, np.identity(3), np.zeros(3))
+    assert solve.solveScale(layers, targets, rigid = False).scale == pytest.approx(25.0)
+
+def test_solveNamesTheWorstPoint(points):
+    layers = referenceLayers(points)
+    targets = blenderTargets(layers, 50.0, np.identity(3), np.zeros(3))
+    targets["Point 3"] = targets["Point 3"] + [0.5, 0.0, 0.0]
+    result = solve.solveScale(layers, targets)
+    assert result.worst[0] == "Point 3"
+    assert result.rms > 0.0
+
+def test_solveIgnoresLayersWithoutTarget(points):
+    layers = referenceLayers(points)
+    targets = blenderTargets(layers[:3], 10.0, np.identity(3), np.zeros(3))
+    result = solve.solveScale(layers, targets)
+    assert result.names == ["Point 0", "Point 1", "Point 2"]
+    assert result.scale == pytest.approx(10.0)
+
+@pytest.mark.parametrize("count, rigid", [(2, True), (1, False), (0, True)])
+def test_solveNeedsEnoughPoints(points, count, rigid):
+    layers = referenceLayers(points[:count])
+    targets = blenderTargets(layers, 10.0, np.identity(3), np.zeros(3))
+    with pytest.raises(ValueError, match = "at least"):
+        solve.solveScale(layers, targets, rigid)
+
+def test_solveRejectsPointsOnOneSpot():
+    layers = referenceLayers([(100.0, 100.0, 0.0)] * 3)
+    targets = dict.fromkeys((layer.name for layer in layers), np.zeros(3))
+    with pytest.raises(ValueError, match = "same spot"):
+        solve.solveScale(layers, targets)
@@ -0,0 +1,36 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+from ae2blend import stats
+
+class Wrapper:
+    # A bpy wrapper, a new one every time Blender returns the same object
+    def __init__(self, pointer):
+        self.pointer = pointer
+
+    def as_pointer(self):
+        return self.pointer
+
+def test_touchCountsObjectsNotWrappers():
+    importStats = stats.ImportStats("Create Empty")
+    for pointer in (1, 2, 1, 2, 1):
+        importStats.touch(Wrapper(pointer))
+    assert importStats.objects == 2
+    assert importStats.asDict()['objects'] == 2
@@ -0,0 +1,80 @@
+# ##### BEGIN GPL LICENSE BLOCK #####
+#
+#  This program is free software; you can redistribute it and/or
+#  modify it under the terms of the GNU General Public License
+#  as published by the Free Software Foundation; either version 2
+#  of the License, or (at your option) any later version.
+#
+#  This program is distributed in the hope that it will be useful,
+#  but WITHOUT ANY WARRANTY; without even the implied warranty of
+#  MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+#  GNU General Public License for more details.
+#
+#  You should have received a copy of the GNU General Public License
+#  along with this program; if not, write to the Free Software Foundation,
+#  Inc., 51 Franklin Street, Fifth Floor, Boston, MA 02110-1301, USA.
+#
+# ##### END GPL LICENSE BLOCK #####
+#
+# Copyright 2015 Sam Maliszewski
+
+import threading
+
+import fakebpy
+import generate
+
+def prepareClipboard(addon):
+    # What the watcher timer does, waiting for the worker thread
+    settings = addon.bpy.context.scene.AE2Blend
+    settings.AEWatch_property = True
+    addon.watchClipboard()
+    payload = addon.clipboardWatcher.prepared
+    for thread in threading.enumerate():
+        if thread.name == "AE2Blend clipboard":
+            thread.join()
+    return payload
+
+# PREPARED IMPORTS
+
+def test_preparedImportReportsDecimation(addon):
+    addon.bpy.context.scene.AE2Blend.AEDecimate_property = True
+    addon.bpy.context.window_manager.clipboard = generate.generatePayload(200, 2)
+    payload = prepareClipboard(addon)
+    assert payload.ready and payload.document.decimation.total
+    operator = fakebpy.Operator()
+    addon.createEmptyAE(operator)
+    messages = [message for kind, message in operator.reports]
+    assert addon.preparedClipboard() is payload.document
+    assert str(payload.document.decimation) in messages
+
+def test_changedSettingsPrepareAgain(addon):
+    addon.bpy.context.window_manager.clipboard = generate.generatePayload(20, 1)
+    payload = prepareClipboard(addon)
+    assert addon.preparedClipboard() is payload.document
+    addon.bpy.context.scene.AE2Blend.AEScale_property = 50
+    assert addon.preparedClipboard() is None
+    assert prepareClipboard(addon) is not payload
+
+def placedKeys(addon):
+    # Location keys of the Empty an import creates with the cursor and playhead set
+    settings = addon.bpy.context.scene.AE2Blend
+    settings.AEPosition_property = 'Cursor'
+    settings.AEFrame_property = 'Playhead'
+    addon.bpy.context.scene.frame_current = 40
+    addon.bpy.context.scene.cursor.location = (1.0, 2.0, 3.0)
+    addon.createEmptyAE(fakebpy.Operator())
+    target = addon.bpy.context.view_layer.objects.active
+    fcurve = target.animation_data.action.fcurves.find('location', index = 0)
+    return fcurve.keyframe_points.co.tolist()
+
+def test_playheadAndCursorKeepThePreparedPayload(addon):
+    addon.bpy.context.window_manager.clipboard = generate.generatePayload(20, 1)
+    expected = placedKeys(addon)
+    payload = prepareClipboard(addon)
+    assert placedKeys(addon) == expected
+    assert addon.preparedClipboard() is payload.document
+    # Polling again with the playhead and cursor moved starts no new preparation
+    addon.bpy.context.scene.frame_current = 80
+    addon.bpy.context.scene.cursor.location = (0.0, 0.0, 0.0)
+    assert not addon.clipboardWatcher.offer(addon.bpy.context.window_manager.clipboard, addon.cacheSettings())
+    assert expected[0] == [40.0, 1.0]